@@ -0,0 +1,448 @@
+"""
+Supervisor
+Starts the PDF server, Orchestrator, Audio Server, Vision Agent and static web
+server in dependency order, waits for each to report ready, restarts crashed
+processes with backoff and reports their CPU and memory use.
+
+Usage:
+    python scripts/supervisor.py
+    python scripts/supervisor.py --open-browser --ollama
+    python scripts/supervisor.py --audio-args "--profile low_latency" --stats-interval 30
+    python scripts/supervisor.py --single-process   # all servers in one event loop
+"""
+
+import argparse
+import asyncio
+import functools
+import os
+import shlex
+import signal
+import sys
+import threading
+import time
+import webbrowser
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from wait_ready import probe_http, probe_websocket
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SRC_DIR = PROJECT_ROOT / "src"
+GUI_URL = "http://localhost:8000/web/unified_interface.html"
+
+
+class Component:
+    """One supervised server process and its restart bookkeeping"""
+
+    def __init__(self, name, command, probe_url, depends=(), env=None, ready_timeout=180.0):
+        self.name = name
+        self.command = command
+        self.probe_url = probe_url
+        self.depends = tuple(depends)
+        self.env = env or {}
+        self.ready_timeout = ready_timeout
+        self.process = None
+        self.state = 'stopped'
+        self.starts = 0
+        self.failures = 0  # consecutive short-lived runs, for the backoff
+        self.started_at = None
+        self.ready_seconds = None
+        self.restart_requested = False
+        self.first_attempt = asyncio.Event()
+        self.output_task = None
+        self.cpu_sample = None  # (wall time, cpu seconds) of the last stats sample
+
+
+def default_components(args):
+    """The project's servers; each depends on the ones it connects to at startup"""
+    python = sys.executable
+    components = [
+        Component("pdf", [python, "src/presenter/pdf_server.py", *shlex.split(args.pdf_args)],
+                  "ws://localhost:9002/health"),
+        Component("orchestrator", [python, "src/orchestrator/orchestrator.py", *shlex.split(args.orchestrator_args)],
+                  "ws://localhost:9001", depends=("pdf",)),
+        Component("audio", [python, "src/audio/main.py", *shlex.split(args.audio_args)],
+                  "ws://localhost:8765", depends=("orchestrator",)),
+        Component("vision", [python, "src/vision/vision_agent.py", *shlex.split(args.vision_args)],
+                  "ws://localhost:8766", depends=("orchestrator",)),
+        Component("web", [python, "-m", "http.server", "8000"], "http://localhost:8000/"),
+    ]
+    if args.ollama:
+        components.insert(0, Component("ollama", ["ollama", "serve"], "http://localhost:11434/",
+                                       env={"OLLAMA_ORIGINS": "*"}))
+    return components
+
+
+# --- Process statistics ---
+
+_CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def _proc_children():
+    """Parent pid -> child pids, from /proc"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                fields = f.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(entry))
+    return children
+
+
+def _proc_usage(pid):
+    """(cpu seconds, rss bytes) of one process from /proc"""
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS  # utime + stime
+    rss = 0
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                rss = int(line.split()[1]) * 1024
+                break
+    return cpu, rss
+
+
+def process_usage(pid):
+    """
+    Total (cpu seconds, rss bytes) of a process and its descendants, such
+    as the PDF server's render workers. Uses psutil when installed, else
+    /proc; returns None where neither is available.
+    """
+    try:
+        if psutil is not None:
+            root = psutil.Process(pid)
+            tree = [root] + root.children(recursive=True)
+            cpu = rss = 0
+            for p in tree:
+                try:
+                    times = p.cpu_times()
+                    cpu += times.user + times.system
+                    rss += p.memory_info().rss
+                except psutil.Error:
+                    pass
+            return cpu, rss
+        if not os.path.isdir('/proc'):
+            return None
+        children = _proc_children()
+        cpu = rss = 0
+        pending = [pid]
+        while pending:
+            current = pending.pop()
+            try:
+                c, r = _proc_usage(current)
+            except (OSError, ValueError, IndexError):
+                continue
+            cpu += c
+            rss += r
+            pending.extend(children.get(current, []))
+        return cpu, rss
+    except Exception:
+        return None
+
+
+def usage_row(name, pid, state, restarts, usage, previous):
+    """One line of the stats table; previous is the (wall, cpu) sample before"""
+    cpu_text, rss_text = '-', '-'
+    now = time.monotonic()
+    if usage is not None:
+        cpu, rss = usage
+        rss_text = f"{rss / (1024 * 1024):.0f} MB"
+        if previous is not None and now > previous[0]:
+            cpu_text = f"{100 * (cpu - previous[1]) / (now - previous[0]):.1f}%"
+    line = f"  {name:<13} {pid or '-':>7} {state:<9} {restarts:>8} {cpu_text:>7} {rss_text:>8}"
+    return line, (now, usage[0]) if usage is not None else None
+
+
+STATS_HEADER = f"  {'component':<13} {'pid':>7} {'state':<9} {'restarts':>8} {'CPU':>7} {'RSS':>8}"
+
+
+# --- Multi-process supervision ---
+
+class Supervisor:
+    """
+    Runs each component as a child process. Components start one at a
+    time, after the ones they depend on are ready. A crashed child is
+    restarted after a backoff that doubles with every run shorter than
+    stable_after seconds. When a component comes back, the components
+    that depend on it are restarted too, because they connect only once.
+    """
+
+    def __init__(self, components, base_backoff=1.0, max_backoff=30.0, stable_after=60.0,
+                 stats_interval=60.0, shutdown_timeout=5.0):
+        self.components = components
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.stats_interval = stats_interval
+        self.shutdown_timeout = shutdown_timeout
+        self.stopping = False
+        self._tasks = []
+
+    async def _relay_output(self, component, stream):
+        """Prefix each line of a child's output with its name"""
+        while True:
+            line = await stream.readline()
+            if not line:
+                break
+            print(f"[{component.name}] {line.decode(errors='replace').rstrip()}", flush=True)
+
+    async def _probe(self, component, deadline):
+        if component.probe_url.startswith("ws"):
+            return await probe_websocket(component.probe_url, deadline, 0.2)
+        ready = await asyncio.to_thread(probe_http, component.probe_url, deadline, 0.2)
+        return {'state': 'ready'} if ready else None
+
+    async def start(self, component):
+        """Spawn a component and wait until it is ready, fails or exits"""
+        env = dict(os.environ, PYTHONUNBUFFERED="1", **component.env)
+        component.process = await asyncio.create_subprocess_exec(
+            *component.command, cwd=PROJECT_ROOT, env=env,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+            # Own process group: Ctrl+C reaches the supervisor only, which stops children in order
+            start_new_session=True,
+        )
+        component.starts += 1
+        component.started_at = time.monotonic()
+        component.state = 'starting'
+        component.cpu_sample = None
+        component.output_task = asyncio.create_task(self._relay_output(component, component.process.stdout))
+
+        probe = asyncio.create_task(self._probe(component, component.started_at + component.ready_timeout))
+        exited = asyncio.create_task(component.process.wait())
+        await asyncio.wait({probe, exited}, return_when=asyncio.FIRST_COMPLETED)
+        if exited.done():
+            probe.cancel()
+            component.state = 'exited'
+            return False
+        exited.cancel()
+        reply = probe.result()
+        if reply is None or reply.get('state') != 'ready':
+            reason = reply.get('error') if reply else f"not ready after {component.ready_timeout:.0f} s"
+            print(f"SUPERVISOR: {component.name} failed to start: {reason}")
+            component.state = 'failed'
+            self._terminate(component)
+            return False
+
+        component.state = 'running'
+        component.ready_seconds = time.monotonic() - component.started_at
+        print(f"SUPERVISOR: {component.name} ready in {component.ready_seconds:.2f} s "
+              f"(pid {component.process.pid}, start #{component.starts})")
+        if component.starts > 1:
+            self._restart_dependents(component)
+        return True
+
+    def _restart_dependents(self, component):
+        for other in self.components:
+            if component.name in other.depends and other.state == 'running':
+                print(f"SUPERVISOR: Restarting {other.name} to reconnect to {component.name}")
+                other.restart_requested = True
+                self._terminate(other)
+
+    def _terminate(self, component, sig=signal.SIGTERM):
+        process = component.process
+        if process is not None and process.returncode is None:
+            try:
+                process.send_signal(sig)
+            except ProcessLookupError:
+                pass
+
+    async def supervise(self, component):
+        """Keep one component running until shutdown"""
+        while not self.stopping:
+            ready = await self.start(component)
+            component.first_attempt.set()
+            code = await component.process.wait()
+            if self.stopping:
+                break
+            if component.restart_requested:
+                component.restart_requested = False
+                continue
+            runtime = time.monotonic() - component.started_at
+            component.failures = 0 if ready and runtime >= self.stable_after else component.failures + 1
+            delay = min(self.max_backoff, self.base_backoff * 2 ** (component.failures - 1)) if component.failures else 0.0
+            component.state = 'backoff'
+            print(f"SUPERVISOR: {component.name} exited with code {code} after {runtime:.1f} s; "
+                  f"restarting in {delay:.1f} s")
+            await asyncio.sleep(delay)
+        component.state = 'stopped'
+
+    def print_stats(self):
+        print("SUPERVISOR: Process usage (CPU since the last report, RSS including child processes)")
+        print(STATS_HEADER)
+        for c in self.components:
+            pid = c.process.pid if c.process is not None and c.process.returncode is None else None
+            usage = process_usage(pid) if pid else None
+            line, c.cpu_sample = usage_row(c.name, pid, c.state, max(0, c.starts - 1), usage, c.cpu_sample)
+            print(line)
+
+    async def _report_stats(self):
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            if not self.stopping:
+                self.print_stats()
+
+    async def run(self, on_ready=None):
+        """Start everything in order, then supervise until shutdown() is called"""
+        for component in self.components:
+            for dependency in component.depends:
+                other = next(c for c in self.components if c.name == dependency)
+                if other.state != 'running':
+                    print(f"SUPERVISOR: Starting {component.name} although {dependency} is not ready")
+            self._tasks.append(asyncio.create_task(self.supervise(component)))
+            await component.first_attempt.wait()
+        print("SUPERVISOR: Startup complete: " + ", ".join(
+            f"{c.name} {c.ready_seconds:.2f} s" if c.ready_seconds is not None else f"{c.name} {c.state}"
+            for c in self.components))
+        if on_ready:
+            on_ready()
+        stats_task = asyncio.create_task(self._report_stats()) if self.stats_interval > 0 else None
+        try:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        finally:
+            if stats_task:
+                stats_task.cancel()
+
+    async def shutdown(self):
+        """Stop children in reverse dependency order (SIGINT, then SIGKILL after a timeout)"""
+        if self.stopping:
+            return
+        self.stopping = True
+        print("\nSUPERVISOR: Shutting down...")
+        for component in reversed(self.components):
+            process = component.process
+            if process is None or process.returncode is not None:
+                continue
+            self._terminate(component, signal.SIGINT)
+            try:
+                await asyncio.wait_for(process.wait(), self.shutdown_timeout)
+            except asyncio.TimeoutError:
+                print(f"SUPERVISOR: {component.name} did not stop, killing it")
+                self._terminate(component, signal.SIGKILL)
+                await process.wait()
+            print(f"SUPERVISOR: Stopped {component.name}")
+        # Supervision loops may be waiting out a backoff
+        for task in self._tasks:
+            task.cancel()
+
+
+async def run_supervisor(args):
+    supervisor = Supervisor(default_components(args), max_backoff=args.max_backoff,
+                            stats_interval=args.stats_interval)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, lambda: asyncio.create_task(supervisor.shutdown()))
+    await supervisor.run(on_ready=functools.partial(open_browser, args))
+
+
+# --- Single-process mode ---
+
+def start_web_server(port=8000):
+    """Serve the project directory over HTTP from a background thread"""
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=str(PROJECT_ROOT))
+    server = ThreadingHTTPServer(("", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="web-server").start()
+    print(f"Web server: Serving {PROJECT_ROOT} on http://localhost:{port}")
+    return server
+
+
+async def run_single_process(args):
+    """
+    All asyncio servers share this process and event loop. Memory for the
+    interpreter and libraries is paid once, and the Orchestrator and the
+    audio and vision agents reach their peers through in-process channels
+    instead of sockets. There are no restarts: a crash takes the whole stack down.
+    """
+    for sub in ("presenter", "orchestrator", "audio", "vision"):
+        sys.path.insert(0, str(SRC_DIR / sub))
+    import pdf_server
+    import orchestrator
+    import main as audio_server
+    import vision_agent
+
+    if args.ollama:
+        print("SUPERVISOR: Ollama is not started in single-process mode; run 'ollama serve' yourself")
+    web = start_web_server()
+    servers = [
+        ("pdf", pdf_server, pdf_server.main(pdf_server.parse_args(shlex.split(args.pdf_args)))),
+        ("orchestrator", orchestrator, orchestrator.main(orchestrator.parse_args(shlex.split(args.orchestrator_args)))),
+        ("audio", audio_server, audio_server.main_async(audio_server.parse_args(shlex.split(args.audio_args)))),
+        ("vision", vision_agent, vision_agent.main(vision_agent.parse_args(shlex.split(args.vision_args)))),
+    ]
+    tasks = []
+    for name, module, coroutine in servers:
+        task = asyncio.create_task(coroutine)
+        tasks.append(task)
+        # Start the next server once this one has finished starting
+        while module.READINESS.state == 'starting' and not task.done():
+            await asyncio.sleep(0.05)
+        print(f"SUPERVISOR: {name} {module.READINESS.state}")
+    open_browser(args)
+
+    async def report_stats():
+        previous = None
+        while True:
+            await asyncio.sleep(args.stats_interval)
+            line, previous = usage_row("all", os.getpid(), "running", 0, process_usage(os.getpid()), previous)
+            print("SUPERVISOR: Process usage\n" + STATS_HEADER + "\n" + line)
+
+    stats_task = asyncio.create_task(report_stats()) if args.stats_interval > 0 else None
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                print(f"SUPERVISOR: A server stopped with an error: {task.exception()!r}")
+    finally:
+        if stats_task:
+            stats_task.cancel()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        web.shutdown()
+
+
+def open_browser(args):
+    if args.open_browser:
+        print(f"SUPERVISOR: Opening {GUI_URL}")
+        webbrowser.open(GUI_URL)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Start and supervise all servers")
+    parser.add_argument("--single-process", action="store_true",
+                        help="Run all servers and the web server in one event loop")
+    parser.add_argument("--ollama", action="store_true", help="Also start and supervise 'ollama serve'")
+    parser.add_argument("--open-browser", action="store_true", help="Open the GUI once everything is ready")
+    parser.add_argument("--pdf-args", default="", help="Extra arguments for pdf_server.py")
+    parser.add_argument("--orchestrator-args", default="", help="Extra arguments for orchestrator.py")
+    parser.add_argument("--audio-args", default="", help="Extra arguments for the audio server (main.py)")
+    parser.add_argument("--vision-args", default="", help="Extra arguments for vision_agent.py")
+    parser.add_argument("--max-backoff", type=float, default=30.0, help="Longest wait before a restart (seconds)")
+    parser.add_argument("--stats-interval", type=float, default=60.0,
+                        help="Seconds between CPU/RSS reports (0 disables)")
+    return parser.parse_args(argv)
+
+
+def main(args=None):
+    if args is None:
+        args = parse_args()
+    if args.single_process:
+        try:
+            asyncio.run(run_single_process(args))
+        except KeyboardInterrupt:
+            print("\nSUPERVISOR: Stopped by user.")
+    else:
+        asyncio.run(run_supervisor(args))
+
+
+if __name__ == "__main__":
+    main(parse_args())
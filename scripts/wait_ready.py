@@ -0,0 +1,105 @@
+"""
+Readiness Probe
+Waits until a server reports ready, so the launcher does not have to guess
+with fixed sleeps. WebSocket servers are asked {"type": "health"}; plain
+HTTP servers count as ready once they answer at all.
+
+Usage:
+    python scripts/wait_ready.py ws://localhost:9001 --name Orchestrator
+    python scripts/wait_ready.py http://localhost:8000 --name "Web Server" --timeout 10
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import urllib.error
+import urllib.request
+
+
+async def probe_websocket(url, deadline, interval):
+    """Return the server's health reply once it is no longer 'starting' (None on timeout)"""
+    import websockets
+
+    reply = None
+    while time.monotonic() < deadline:
+        try:
+            async with websockets.connect(url, open_timeout=max(0.1, deadline - time.monotonic())) as ws:
+                while time.monotonic() < deadline:
+                    await ws.send(json.dumps({"type": "health"}))
+                    # Servers may push other messages (captions, grammar) to any client
+                    while True:
+                        message = await asyncio.wait_for(ws.recv(), max(0.1, deadline - time.monotonic()))
+                        if isinstance(message, str):
+                            data = json.loads(message)
+                            if isinstance(data, dict) and data.get('type') == 'health':
+                                reply = data
+                                break
+                    if reply.get('state') != 'starting':
+                        return reply
+                    await asyncio.sleep(interval)
+        except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException, json.JSONDecodeError):
+            # Not listening yet, or restarted under us: try again
+            await asyncio.sleep(interval)
+    return None
+
+
+def probe_http(url, deadline, interval):
+    """Return True once the server answers any HTTP request (False on timeout)"""
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1.0).close()
+            return True
+        except urllib.error.HTTPError:
+            return True  # An error page still means it is serving
+        except (OSError, urllib.error.URLError):
+            time.sleep(interval)
+    return False
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Wait until a server is ready")
+    parser.add_argument("url", help="ws://host:port[/path] (health message) or http://host:port")
+    parser.add_argument("--name", default=None, help="Component name for messages")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait before giving up")
+    parser.add_argument("--interval", type=float, default=0.2, help="Seconds between attempts")
+    parser.add_argument("--report", default=None, help="Append '<name>\\t<seconds>' to this file when ready")
+    return parser.parse_args(argv)
+
+
+def main(args=None):
+    if args is None:
+        args = parse_args()
+    name = args.name or args.url
+    start = time.monotonic()
+    deadline = start + args.timeout
+
+    detail = ""
+    if args.url.startswith(("ws://", "wss://")):
+        reply = asyncio.run(probe_websocket(args.url, deadline, args.interval))
+        if reply is None:
+            ok = False
+        elif reply.get('state') != 'ready':
+            print(f"✗ {name} failed to start: {reply.get('error')}")
+            return 1
+        else:
+            ok = True
+            if reply.get('startup_seconds') is not None:
+                detail = f" (server startup {reply['startup_seconds']:.2f} s)"
+    else:
+        ok = probe_http(args.url, deadline, args.interval)
+
+    elapsed = time.monotonic() - start
+    if not ok:
+        print(f"✗ {name} not ready after {args.timeout:.0f} s")
+        return 2
+    print(f"✓ {name} ready in {elapsed:.2f} s{detail}")
+    if args.report:
+        with open(args.report, "a") as f:
+            f.write(f"{name}\t{elapsed:.2f}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
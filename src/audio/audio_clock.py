@@ -0,0 +1,68 @@
+"""
+Audio Clock
+Maps recognizer time onto a monotonic audio clock: seconds of audio captured
+since the source started, independent of network or queue delays
+"""
+
+import uuid
+from bisect import bisect_right
+
+MAX_BREAKPOINTS = 4096
+
+
+def new_clock_id(name):
+    """Identifier of one audio clock; times from different clocks are not comparable"""
+    return f"{name}-{uuid.uuid4().hex[:8]}"
+
+
+class AudioTimeline:
+    """
+    A recognizer only sees the audio it is fed, so its word times drift
+    from the audio clock whenever silence is skipped by the voice gate or
+    audio is dropped on overflow. The timeline records where each run of
+    fed audio was captured and converts recognizer times back.
+    """
+
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self.fed = 0  # samples fed to the recognizer so far
+        self._fed_marks = [0]
+        self._capture_marks = [0]
+
+    @property
+    def fed_seconds(self):
+        return self.fed / self.sample_rate
+
+    def feed(self, capture_sample, n_samples):
+        """Record that n_samples captured at capture_sample were fed next"""
+        expected = self._capture_marks[-1] + (self.fed - self._fed_marks[-1])
+        if capture_sample != expected:
+            self._fed_marks.append(self.fed)
+            self._capture_marks.append(capture_sample)
+            if len(self._fed_marks) > MAX_BREAKPOINTS:
+                # Old breakpoints only matter for long-finished utterances
+                del self._fed_marks[:MAX_BREAKPOINTS // 2]
+                del self._capture_marks[:MAX_BREAKPOINTS // 2]
+        self.fed += n_samples
+
+    def to_audio_time(self, recognizer_seconds):
+        """Audio clock time (seconds) of a point in the recognizer's input"""
+        sample = recognizer_seconds * self.sample_rate
+        i = max(0, bisect_right(self._fed_marks, sample) - 1)
+        return (self._capture_marks[i] + sample - self._fed_marks[i]) / self.sample_rate
+
+    def words(self, result, offset=0.0):
+        """
+        Word timings of a Vosk result (SetWords(True)) on the audio clock:
+        [{"word", "start", "end", "conf"}, ...]. offset is the recognizer's
+        own start within the fed audio, for recognizers created mid-stream.
+        """
+        return [
+            {
+                'word': w['word'],
+                'start': round(self.to_audio_time(offset + w['start']), 3),
+                'end': round(self.to_audio_time(offset + w['end']), 3),
+                'conf': round(w.get('conf', 1.0), 3),
+            }
+            for w in result.get('result', [])
+        ]
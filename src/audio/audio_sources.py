@@ -0,0 +1,230 @@
+"""
+Audio Sources
+Pluggable 16-bit mono PCM inputs for VoskSTT: microphone, WAV/raw file,
+stdin pipe and in-memory generator
+"""
+
+import abc
+import sys
+import time
+import wave
+
+from ring_buffer import AudioRingBuffer
+
+SAMPLE_WIDTH = 2  # bytes per int16 sample
+
+
+class AudioSource(abc.ABC):
+    """
+    Base class. read(timeout) returns the next chunk of int16 little-endian
+    mono PCM, None if nothing arrived within timeout (live sources), or
+    b'' once the stream has ended.
+    """
+
+    live = False
+
+    def __init__(self, sample_rate=16000, chunk_size=8192):
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size  # samples per chunk
+
+    @property
+    def chunk_bytes(self):
+        return self.chunk_size * SAMPLE_WIDTH
+
+    def start(self):
+        pass
+
+    @abc.abstractmethod
+    def read(self, timeout=0.1):
+        """The next chunk, None if nothing arrived within timeout, or b'' at the end"""
+
+    def close(self):
+        pass
+
+    def stats(self):
+        """Source counters as a dict"""
+        return {}
+
+    def chunks(self):
+        """Iterate over all chunks until the end of the stream"""
+        self.start()
+        try:
+            while True:
+                data = self.read()
+                if data is None:
+                    continue
+                if not data:
+                    return
+                yield data
+        finally:
+            self.close()
+
+    def read_all(self):
+        """The whole stream as one bytes object (not for live sources)"""
+        return b''.join(self.chunks())
+
+
+class MicrophoneSource(AudioSource):
+    """
+    Default input device through PyAudio's callback stream. Captured audio
+    goes into a fixed-size ring buffer, so a recognizer that falls behind
+    loses old audio (see AudioRingBuffer policies) instead of drifting ever
+    further from real time.
+    """
+
+    live = True
+
+    def __init__(self, sample_rate=16000, chunk_size=8192, buffer_seconds=10.0, overflow='drop_oldest',
+                 capture_frames=None):
+        super().__init__(sample_rate, chunk_size)
+        # The device callback may run more often than the recognizer reads
+        self.capture_frames = capture_frames or chunk_size
+        import pyaudio
+
+        self._pyaudio = pyaudio
+        self.ring = AudioRingBuffer(buffer_seconds, sample_rate, overflow)
+        self.status_errors = 0
+        self.p = pyaudio.PyAudio()
+        self.stream = self.p.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=self.sample_rate,
+            input=True,
+            frames_per_buffer=self.capture_frames,
+            stream_callback=self.audio_callback
+        )
+
+    def audio_callback(self, in_data, frame_count, time_info, status):
+        if status:
+            # Overflow in the driver itself; counted, not printed from the audio thread
+            self.status_errors += 1
+        self.ring.write(in_data)
+        return (None, self._pyaudio.paContinue)
+
+    def start(self):
+        self.stream.start_stream()
+
+    def read(self, timeout=0.1):
+        return self.ring.read(self.chunk_size, timeout)
+
+    def stats(self):
+        return dict(self.ring.stats(), device_status_errors=self.status_errors)
+
+    def close(self):
+        self.stream.stop_stream()
+        self.stream.close()
+        self.p.terminate()
+
+
+class StreamSource(AudioSource):
+    """
+    Raw PCM from a binary file object. With realtime=True chunks are paced
+    at the audio's own rate, as if they came from a microphone; otherwise
+    they are delivered as fast as they can be read.
+    """
+
+    def __init__(self, stream, sample_rate=16000, chunk_size=8192, realtime=False):
+        super().__init__(sample_rate, chunk_size)
+        self.stream = stream
+        self.realtime = realtime
+        self._next_time = None
+
+    def _read_bytes(self, n):
+        return self.stream.read(n)
+
+    def read(self, timeout=0.1):
+        data = self._read_bytes(self.chunk_bytes)
+        if not data:
+            return b''
+        if len(data) % SAMPLE_WIDTH:
+            data = data[:-(len(data) % SAMPLE_WIDTH)]
+        if self.realtime:
+            # Like a capture device, a chunk is available once all of it has been "recorded"
+            now = time.monotonic()
+            if self._next_time is None:
+                self._next_time = now
+            self._next_time += len(data) / SAMPLE_WIDTH / self.sample_rate
+            if self._next_time > now:
+                time.sleep(self._next_time - now)
+        return data
+
+
+class FileSource(StreamSource):
+    """
+    A WAV file (16-bit mono, sample rate taken from the header) or a raw
+    int16 PCM file at the given sample rate.
+    """
+
+    def __init__(self, path, sample_rate=16000, chunk_size=8192, realtime=False):
+        self.path = str(path)
+        self._wave = None
+        if self.path.lower().endswith('.wav'):
+            self._wave = wave.open(self.path, 'rb')
+            width, channels = self._wave.getsampwidth(), self._wave.getnchannels()
+            if width != SAMPLE_WIDTH or channels != 1:
+                self._wave.close()
+                raise ValueError(f"{path}: expected 16-bit mono WAV, got {width * 8}-bit with {channels} channels")
+            sample_rate = self._wave.getframerate()
+            stream = None
+        else:
+            stream = open(self.path, 'rb')
+        super().__init__(stream, sample_rate, chunk_size, realtime)
+
+    def _read_bytes(self, n):
+        if self._wave is not None:
+            return self._wave.readframes(n // SAMPLE_WIDTH)
+        return self.stream.read(n)
+
+    def close(self):
+        if self._wave is not None:
+            self._wave.close()
+        if self.stream is not None:
+            self.stream.close()
+
+
+class StdinSource(StreamSource):
+    """Raw int16 PCM piped on stdin, e.g. from `arecord -f S16_LE -r 16000 -c 1`"""
+
+    live = True
+
+    def __init__(self, sample_rate=16000, chunk_size=8192):
+        super().__init__(sys.stdin.buffer, sample_rate, chunk_size)
+
+    def _read_bytes(self, n):
+        # A pipe returns short reads; keep reading until a full chunk or EOF
+        parts = []
+        remaining = n
+        while remaining > 0:
+            part = self.stream.read(remaining)
+            if not part:
+                break
+            parts.append(part)
+            remaining -= len(part)
+        return b''.join(parts)
+
+
+class GeneratorSource(AudioSource):
+    """PCM chunks from any iterable of bytes, e.g. synthetic audio in tests or benchmarks"""
+
+    def __init__(self, chunks, sample_rate=16000, chunk_size=8192):
+        super().__init__(sample_rate, chunk_size)
+        self._iterator = iter(chunks)
+
+    def read(self, timeout=0.1):
+        for data in self._iterator:
+            if data:
+                return bytes(data)
+        return b''
+
+
+def open_source(spec, sample_rate=16000, chunk_size=8192, realtime=False,
+                buffer_seconds=10.0, overflow='drop_oldest', capture_frames=None):
+    """
+    Build a source from a command line value: None or 'mic' for the
+    microphone, '-' for stdin, anything else is a WAV or raw PCM file.
+    """
+    if spec in (None, 'mic'):
+        return MicrophoneSource(sample_rate, chunk_size, buffer_seconds, overflow, capture_frames)
+    if spec == '-':
+        return StdinSource(sample_rate, chunk_size)
+    return FileSource(spec, sample_rate, chunk_size, realtime=realtime)
@@ -0,0 +1,163 @@
+"""
+Latency Benchmark
+Replays a recording as if it came from a microphone and measures, for each
+latency profile, how long after a word is spoken it reaches a callback
+
+Usage:
+    python latency_benchmark.py talk.wav
+    python latency_benchmark.py talk.wav --profiles low_latency balanced --json
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+
+from audio_sources import SAMPLE_WIDTH, AudioSource, open_source
+from latency_profiles import PROFILES, get_profile
+from ring_buffer import AudioRingBuffer
+from transcribe import DEFAULT_MODEL
+from vosk_stt import VoskSTT, load_model
+
+# Silence appended after the recording so the last utterance can end naturally
+TRAILING_SILENCE = 2.0
+
+
+class ReplaySource(AudioSource):
+    """
+    Plays PCM into a ring buffer in capture_frames pieces at real time from
+    a background thread, exactly like MicrophoneSource's device callback.
+    """
+
+    live = True
+
+    def __init__(self, pcm, sample_rate, chunk_size, capture_frames):
+        super().__init__(sample_rate, chunk_size)
+        self.pcm = pcm
+        self.capture_frames = capture_frames
+        self.ring = AudioRingBuffer(len(pcm) / SAMPLE_WIDTH / sample_rate + 1.0, sample_rate)
+        self.start_time = None
+        self._done = False
+        self._stopped = False
+
+    def start(self):
+        self.start_time = time.monotonic()
+        threading.Thread(target=self._play, daemon=True).start()
+
+    def _play(self):
+        step = self.capture_frames * SAMPLE_WIDTH
+        for i, offset in enumerate(range(0, len(self.pcm), step)):
+            if self._stopped:
+                break
+            # A capture buffer is delivered once it is full
+            delay = self.start_time + (i + 1) * self.capture_frames / self.sample_rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.ring.write(self.pcm[offset:offset + step])
+        self._done = True
+
+    def read(self, timeout=0.1):
+        data = self.ring.read(self.chunk_size, timeout)
+        if data is None and self._done:
+            return b''
+        return data
+
+    def close(self):
+        self._stopped = True
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def summarize(latencies):
+    if not latencies:
+        return None
+    return {
+        'words': len(latencies),
+        'median_ms': round(statistics.median(latencies) * 1000),
+        'p90_ms': round(percentile(latencies, 0.9) * 1000),
+        'max_ms': round(max(latencies) * 1000),
+    }
+
+
+def run_profile(model, pcm, sample_rate, profile):
+    """Replay pcm through VoskSTT with one profile and measure word latencies"""
+    source = ReplaySource(pcm, sample_rate, profile.feed_frames, profile.capture_frames)
+    # Word timings are on the audio clock, i.e. seconds into the recording
+    stt = VoskSTT(None, source=source, profile=profile, model=model)
+
+    finals = []    # (callback time, utterance id, word timings)
+    partials = []  # (callback time, utterance id, words)
+
+    def on_final(text, utterance_id, words):
+        finals.append((time.monotonic(), utterance_id, words))
+
+    def on_partial(text, utterance_id, revision, audio_time):
+        partials.append((time.monotonic(), utterance_id, text.split()))
+
+    cpu_start = time.process_time()
+    stt.process_audio(on_final, on_partial if profile.partials else None)
+    cpu_seconds = time.process_time() - cpu_start
+
+    final_latency = []
+    first_seen_latency = []
+    for final_time, utterance_id, words in finals:
+        for i, word in enumerate(words):
+            spoken = source.start_time + word['end']
+            final_latency.append(final_time - spoken)
+            seen = final_time
+            for partial_time, partial_utterance, partial_words in partials:
+                if (partial_utterance == utterance_id and len(partial_words) > i
+                        and partial_words[i] == word['word']):
+                    seen = min(seen, partial_time)
+                    break
+            first_seen_latency.append(seen - spoken)
+
+    duration = len(pcm) / SAMPLE_WIDTH / sample_rate
+    return {
+        'profile': profile.name,
+        'final': summarize(final_latency),
+        'first_seen': summarize(first_seen_latency),
+        'utterances': len(finals),
+        'cpu_percent': round(100 * cpu_seconds / duration, 1),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Word-to-callback latency per latency profile")
+    parser.add_argument("input", help="16-bit mono WAV or raw PCM recording")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Vosk model directory")
+    parser.add_argument("--sample-rate", type=int, default=16000, help="Sample rate of raw PCM input")
+    parser.add_argument("--profiles", nargs="+", default=sorted(PROFILES), choices=sorted(PROFILES))
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    return parser.parse_args(argv)
+
+
+def main(args=None):
+    if args is None:
+        args = parse_args()
+    source = open_source(args.input, sample_rate=args.sample_rate)
+    sample_rate = source.sample_rate
+    pcm = source.read_all() + bytes(int(TRAILING_SILENCE * sample_rate) * SAMPLE_WIDTH)
+    model = load_model(args.model)
+    print(f"Replaying {len(pcm) / SAMPLE_WIDTH / sample_rate:.1f} s of audio in real time per profile...")
+
+    results = [run_profile(model, pcm, sample_rate, get_profile(name)) for name in args.profiles]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"\n{'profile':<12} {'final median':>13} {'final p90':>10} {'first seen':>11} {'p90':>6} {'CPU':>7}")
+    for r in results:
+        final, seen = r['final'] or {}, r['first_seen'] or {}
+        print(f"{r['profile']:<12} {final.get('median_ms', '-'):>10} ms {final.get('p90_ms', '-'):>7} ms "
+              f"{seen.get('median_ms', '-'):>8} ms {seen.get('p90_ms', '-'):>6} {r['cpu_percent']:>6}%")
+    print("\nLatency = callback time - end of the word in the recording. 'first seen' counts a word")
+    print("as delivered when it first appears in a partial result (profiles with partials only).")
+
+
+if __name__ == "__main__":
+    main(parse_args())
@@ -0,0 +1,61 @@
+"""
+Latency Profiles
+Capture buffer size, recognizer feed size and endpointing, tuned together
+"""
+
+from typing import NamedTuple
+
+
+class LatencyProfile(NamedTuple):
+    """One consistent set of latency/CPU trade-offs for capture and recognition"""
+    name: str
+    capture_frames: int     # samples per PyAudio callback
+    feed_frames: int        # samples handed to AcceptWaveform at a time
+    endpointer_mode: str    # Vosk EndpointerMode: 'short', 'default', 'long' or 'very_long'
+    t_start_max: float      # seconds of silence before an utterance is abandoned
+    t_end: float            # trailing silence that ends an utterance
+    t_max: float            # longest utterance before a result is forced
+    partials: bool          # stream partial hypotheses to the orchestrator
+    vad_hangover_ms: int    # how long the voice gate stays open after speech
+
+
+PROFILES = {
+    # Commands land a few hundred ms after they are spoken; most CPU per second of audio
+    'low_latency': LatencyProfile('low_latency', capture_frames=800, feed_frames=1600,
+                                  endpointer_mode='short', t_start_max=5.0, t_end=0.3, t_max=10.0,
+                                  partials=True, vad_hangover_ms=300),
+    'balanced': LatencyProfile('balanced', capture_frames=1600, feed_frames=4000,
+                               endpointer_mode='default', t_start_max=5.0, t_end=0.5, t_max=20.0,
+                               partials=False, vad_hangover_ms=400),
+    # Whole sentences for captions; fewest wake-ups
+    'throughput': LatencyProfile('throughput', capture_frames=8192, feed_frames=8192,
+                                 endpointer_mode='long', t_start_max=10.0, t_end=1.0, t_max=30.0,
+                                 partials=False, vad_hangover_ms=600),
+}
+DEFAULT_PROFILE = 'balanced'
+
+
+def get_profile(name):
+    """Look up a profile by name; raises ValueError for unknown names"""
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown latency profile '{name}', expected one of {sorted(PROFILES)}")
+
+
+def apply_endpointer(recognizer, profile):
+    """
+    Configure a KaldiRecognizer's endpointing for a profile. Older Vosk
+    releases lack these calls; returns False if nothing could be applied.
+    """
+    import vosk
+
+    applied = False
+    mode_enum = getattr(vosk, 'EndpointerMode', None)
+    if mode_enum is not None and hasattr(recognizer, 'SetEndpointerMode'):
+        recognizer.SetEndpointerMode(getattr(mode_enum, profile.endpointer_mode.upper()))
+        applied = True
+    if hasattr(recognizer, 'SetEndpointerDelays'):
+        recognizer.SetEndpointerDelays(profile.t_start_max, profile.t_end, profile.t_max)
+        applied = True
+    return applied
@@ -3,28 +3,44 @@ Real-time Speech-to-Text using Vosk STT model with microphone input
 MODIFIED TO RUN AS A WEBSOCKET SERVER
 """
 
+import argparse
 import threading
 import asyncio
 import websockets
 import json
-from vosk_stt import VoskSTT
+import sys
+from pathlib import Path
+from vosk_stt import VoskSTT, load_model
+from stream_pool import PoolFullError, RecognizerPool
+from vad import VoiceActivityGate
+from audio_sources import open_source
+from latency_profiles import DEFAULT_PROFILE, PROFILES, get_profile
 
-# Global set to store all connected WebSocket clients
-CONNECTED_CLIENTS = set()
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.broadcast import Broadcaster
+from common.health import Readiness, is_health_request
+from common.local_channel import open_connection
+
+# All connected WebSocket clients, each with its own bounded outbox
+CONNECTED_CLIENTS = Broadcaster("Audio Server")
 # Global event loop reference
 MAIN_LOOP = None
 # WebSocket connection to Orchestrator
 ORCHESTRATOR_CONNECTION = None
+# Speech recognizer and command line options, set in main_async
+STT = None
+ARGS = None
+# Recognizers for audio streamed by clients, sharing the dictation model
+RECOGNIZER_POOL = None
+# Startup state for health probes; ready once the models are loaded
+READINESS = Readiness("Audio Server")
 
 async def broadcast_text(text: str):
     """
     Send a text message to all connected clients asynchronously.
+    Each client drains its own outbox, so a slow client never delays the rest.
     """
-    if CONNECTED_CLIENTS:
-        # Create list of send tasks, one per client
-        tasks = [client.send(text) for client in CONNECTED_CLIENTS]
-        # Execute all send tasks in parallel
-        await asyncio.gather(*tasks, return_exceptions=True)
+    CONNECTED_CLIENTS.publish(text)
 
 async def send_to_orchestrator(message: str):
     """
@@ -47,37 +63,146 @@ async def connect_to_orchestrator():
     orchestrator_uri = "ws://localhost:9001"
 
     try:
-        ORCHESTRATOR_CONNECTION = await websockets.connect(orchestrator_uri)
+        ORCHESTRATOR_CONNECTION = await open_connection(orchestrator_uri)
         print(f"Connected to Orchestrator at {orchestrator_uri}")
+        if STT is not None and STT.command_model is not None:
+            # Ask for the command grammar; updates follow whenever the rules reload
+            await ORCHESTRATOR_CONNECTION.send(json.dumps({"type": "admin", "command": "get_grammar"}))
+            asyncio.create_task(listen_to_orchestrator(ORCHESTRATOR_CONNECTION))
     except Exception as e:
         print(f"Could not connect to Orchestrator at {orchestrator_uri}: {e}")
         print("Audio STT will continue without orchestrator integration.")
         ORCHESTRATOR_CONNECTION = None
 
+async def listen_to_orchestrator(connection):
+    """
+    Read messages pushed by the Orchestrator; grammar messages carry the
+    trigger phrases for the command recognizer.
+    """
+    try:
+        async for message in connection:
+            try:
+                data = json.loads(message)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(data, dict) and data.get('type') == 'grammar':
+                phrases = data.get('phrases', [])
+                print(f"Received command grammar from Orchestrator: {len(phrases)} phrases")
+                if STT is not None:
+                    STT.set_grammar(phrases)
+    except websockets.exceptions.ConnectionClosed:
+        print("Orchestrator connection closed; keeping the last command grammar")
+
+def on_stream_result(websocket, stream, kind: str, text: str, words: list):
+    """
+    Results of a client's audio stream go back to that client; finals are
+    also forwarded to the Orchestrator, tagged with the stream and
+    utterance ids and with word timings on the stream's audio clock.
+    """
+    payload = json.dumps({"type": kind, "stream_id": stream.stream_id, "text": text})
+    # A newer partial replaces an unsent older one
+    CONNECTED_CLIENTS.send(websocket, payload, key='partial' if kind == 'partial' else None)
+    if kind == 'final':
+        asyncio.create_task(send_to_orchestrator(json.dumps({
+            "source": "audio_stt",
+            "type": "final",
+            "stream_id": stream.stream_id,
+            "utterance_id": stream.utterance_id,
+            "clock": stream.clock_id,
+            "words": words,
+            "content": text
+        })))
+
+async def close_stream(stream):
+    """
+    Finish a client stream and tell the Orchestrator its audio clock
+    ended, after the stream's last final, so it can drop the clock's state
+    """
+    await stream.finish()
+    asyncio.create_task(send_to_orchestrator(json.dumps({
+        "source": "audio_stt",
+        "type": "end_of_stream",
+        "stream_id": stream.stream_id,
+        "clock": stream.clock_id,
+        "content": ""
+    })))
+
+async def handle_stream_command(websocket, data, stream):
+    """
+    Control messages for client audio streams:
+      {"type": "start_stream", "sample_rate": 16000}  then binary int16 PCM frames
+      {"type": "end_stream"}
+      {"type": "stats"}  capture buffer, VAD and pool counters
+    Returns the client's stream after the command.
+    """
+    command = data.get('type')
+    if command == 'start_stream':
+        if stream is not None:
+            await close_stream(stream)
+            stream = None
+        if RECOGNIZER_POOL is None:
+            error = "Model is still loading" if READINESS.state == 'starting' else "Streaming is disabled"
+            CONNECTED_CLIENTS.send(websocket, json.dumps({"type": "stream_error", "error": error}))
+            return None
+        try:
+            stream = RECOGNIZER_POOL.open_stream(
+                lambda s, kind, text, words: on_stream_result(websocket, s, kind, text, words),
+                sample_rate=int(data.get('sample_rate', 16000)))
+        except (PoolFullError, ValueError) as e:
+            CONNECTED_CLIENTS.send(websocket, json.dumps({"type": "stream_error", "error": str(e)}))
+            return None
+        CONNECTED_CLIENTS.send(websocket, json.dumps({"type": "stream_started", "stream_id": stream.stream_id}))
+    elif command == 'end_stream' and stream is not None:
+        await close_stream(stream)
+        CONNECTED_CLIENTS.send(websocket, json.dumps({"type": "stream_ended", "stream_id": stream.stream_id}))
+        stream = None
+    elif command in ('stream_stats', 'stats'):
+        CONNECTED_CLIENTS.send(websocket, json.dumps({
+            "type": "stats",
+            "capture": STT.stats() if STT is not None else None,
+            "pool": RECOGNIZER_POOL.stats() if RECOGNIZER_POOL else None,
+            "clients": CONNECTED_CLIENTS.stats(),
+        }))
+    return stream
+
 async def connection_handler(websocket):
     """
     Handle a new WebSocket connection, adding it to the global set
-    and removing it when the connection closes.
+    and removing it when the connection closes. Clients may also stream
+    their own microphone audio for transcription.
     """
     print(f"New client connected: {websocket.remote_address}")
     CONNECTED_CLIENTS.add(websocket)
+    stream = None
     try:
-        # Keep connection alive until client disconnects
         async for message in websocket:
-            # Echo back any messages (optional)
-            pass
+            if isinstance(message, bytes):
+                if stream is not None:
+                    stream.feed(message)
+                continue
+            try:
+                data = json.loads(message)
+            except json.JSONDecodeError:
+                continue
+            if is_health_request(data):
+                CONNECTED_CLIENTS.send(websocket, READINESS.message())
+            elif isinstance(data, dict):
+                stream = await handle_stream_command(websocket, data, stream)
     except websockets.exceptions.ConnectionClosed:
         pass
     finally:
         print(f"Client disconnected: {websocket.remote_address}")
-        CONNECTED_CLIENTS.discard(websocket)
+        if stream is not None:
+            await close_stream(stream)
+        CONNECTED_CLIENTS.remove(websocket)
 
 
-def on_transcription(text: str):
+def on_transcription(text: str, utterance_id: int = None, words: list = None):
     """
     Callback function to handle transcribed text.
     This function is called from a different thread, so we use
     asyncio.run_coroutine_threadsafe to interact with the event loop.
+    words are the per-word timings on the capture's audio clock.
     """
     if text and MAIN_LOOP:
         # Send text via WebSocket to all connected clients
@@ -86,6 +211,10 @@ def on_transcription(text: str):
         # Send text to orchestrator with proper JSON format
         orchestrator_payload = json.dumps({
             "source": "audio_stt",
+            "type": "final",
+            "utterance_id": utterance_id,
+            "clock": STT.clock_id,
+            "words": words or [],
             "content": text
         })
         asyncio.run_coroutine_threadsafe(
@@ -93,51 +222,193 @@ def on_transcription(text: str):
             MAIN_LOOP
         )
 
-async def main_async():
+def on_partial(text: str, utterance_id: int, revision: int, audio_time: float = None):
     """
-    Main asynchronous function to set up STT and run the WebSocket server.
+    Callback for in-progress hypotheses (low-latency mode).
+    Partials go to the orchestrator only; browser clients still get finals.
     """
-    global MAIN_LOOP
-    MAIN_LOOP = asyncio.get_running_loop()
+    if text and MAIN_LOOP:
+        orchestrator_payload = json.dumps({
+            "source": "audio_stt",
+            "type": "partial",
+            "utterance_id": utterance_id,
+            "revision": revision,
+            "clock": STT.clock_id,
+            "audio_time": audio_time,
+            "content": text
+        })
+        asyncio.run_coroutine_threadsafe(
+            send_to_orchestrator(orchestrator_payload),
+            MAIN_LOOP
+        )
 
+def on_command(text: str, words: list = None):
+    """
+    Callback for phrases from the grammar-constrained command recognizer.
+    Called from the audio thread like on_transcription.
+    """
+    if text and MAIN_LOOP:
+        if ARGS.command_only:
+            # No dictation captions in this mode: show the commands instead
+            asyncio.run_coroutine_threadsafe(broadcast_text(text), MAIN_LOOP)
+        orchestrator_payload = json.dumps({
+            "source": "audio_stt",
+            "type": "command",
+            "clock": STT.clock_id,
+            "words": words or [],
+            "content": text
+        })
+        asyncio.run_coroutine_threadsafe(
+            send_to_orchestrator(orchestrator_payload),
+            MAIN_LOOP
+        )
+
+def parse_args(argv=None):
+    """Command line options for the audio server"""
+    parser = argparse.ArgumentParser(description="Vosk speech-to-text WebSocket server")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default=DEFAULT_PROFILE,
+                        help="Latency profile: capture/feed sizes, endpointing and partial results together")
+    parser.add_argument("--low-latency", action="store_true",
+                        help="Shorthand for --profile low_latency")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="Override the profile's recognizer feed size (samples)")
+    parser.add_argument("--model", default="Models/vosk-model-en-us-0.42-gigaspeech",
+                        help="Vosk model for dictation")
+    parser.add_argument("--command-model", default=None,
+                        help="Small Vosk model for the grammar-constrained command recognizer "
+                             "(e.g. Models/vosk-model-small-en-us-0.15)")
+    parser.add_argument("--command-only", action="store_true",
+                        help="Run only the command recognizer; no dictation or captions")
+    parser.add_argument("--input", default="mic",
+                        help="Audio input: 'mic' (default), '-' for raw 16 kHz PCM on stdin, a WAV/raw file, "
+                             "or 'none' to only transcribe audio streamed by clients")
+    parser.add_argument("--as-fast-as-possible", action="store_true",
+                        help="Do not pace file input at real time")
+    parser.add_argument("--buffer-seconds", type=float, default=10.0,
+                        help="Capacity of the microphone ring buffer")
+    parser.add_argument("--overflow", choices=("drop_oldest", "skip_to_live"), default="drop_oldest",
+                        help="What to drop when the recognizer falls behind by more than --buffer-seconds")
+    parser.add_argument("--no-vad", action="store_true",
+                        help="Send all audio to the recognizer, including silence")
+    parser.add_argument("--vad-threshold", type=float, default=9.0,
+                        help="Speech threshold in dB above the adaptive noise floor")
+    parser.add_argument("--max-streams", type=int, default=4,
+                        help="Client audio streams decoded at once with the shared model (0 disables)")
+    parser.add_argument("--stream-workers", type=int, default=None,
+                        help="Decoder threads for client streams (default: --max-streams)")
+    return parser.parse_args(argv)
+
+def load_recognizers(args, profile):
+    """
+    Open the audio input and load the Vosk models. Blocking and slow (large
+    models take many seconds), so main_async runs it in a worker thread.
+    Returns (stt, model); stt is None when there is no local input.
+    """
     # --- VOSK MODEL CONFIGURATION ---
     # IMPORTANT: You need to download a Vosk model and place it in the `Models` directory.
     # Download from: https://alphacephei.com/vosk/models
     # For example, download 'vosk-model-small-en-us-0.15' and unzip it to 'Models/vosk-model-small-en-us-0.15'
-    model_path = "Models/vosk-model-en-us-0.42-gigaspeech"
+    # The command recognizer needs a small model that supports grammars; in
+    # --command-only mode without --command-model, --model is used for it.
+    model_path = args.model
+    chunk_size = args.chunk_size or profile.feed_frames
+    if args.input == 'none':
+        # No local capture: the model only serves client streams
+        return None, load_model(model_path)
+    # Files are replayed at their real speed unless asked otherwise
+    source = open_source(args.input, chunk_size=chunk_size, realtime=not args.as_fast_as_possible,
+                         buffer_seconds=args.buffer_seconds, overflow=args.overflow,
+                         capture_frames=profile.capture_frames)
+    # Skip silence before it reaches the recognizers
+    vad = None if args.no_vad else VoiceActivityGate(sample_rate=source.sample_rate,
+                                                     threshold_db=args.vad_threshold,
+                                                     hangover_ms=profile.vad_hangover_ms)
+    stt = VoskSTT(model_path=model_path, chunk_size=chunk_size,
+                  command_model_path=args.command_model, dictation=not args.command_only,
+                  vad=vad, source=source, profile=profile)
+    return stt, stt.model
 
+async def start_recognition(args, profile):
+    """
+    Load the models in the background while the server is already
+    listening, then start transcription and report readiness.
+    """
+    global STT, RECOGNIZER_POOL
+    loop = asyncio.get_running_loop()
     try:
-        stt = VoskSTT(model_path=model_path)
+        stt, model = await loop.run_in_executor(None, load_recognizers, args, profile)
     except FileNotFoundError as e:
         print(f"Error: {e}")
-        print("Please make sure the Vosk model is in the correct path.")
+        print("Please make sure the Vosk model and audio input are in the correct path.")
+        READINESS.mark_failed(e)
         return
+    except Exception as e:
+        print(f"Error: {e}")
+        READINESS.mark_failed(e)
+        return
+    STT = stt
+
+    # Client streams reuse the already loaded dictation model
+    if model is not None and args.max_streams > 0:
+        vad_factory = None
+        if not args.no_vad:
+            vad_factory = lambda rate: VoiceActivityGate(sample_rate=rate, threshold_db=args.vad_threshold,
+                                                         hangover_ms=profile.vad_hangover_ms)
+        RECOGNIZER_POOL = RecognizerPool(model, max_streams=args.max_streams, workers=args.stream_workers,
+                                         vad_factory=vad_factory, profile=profile)
+
+    if stt is not None:
+        # Start microphone capture and transcription in a separate thread
+        # so it doesn't block the async event loop
+        # Profiles with partials stream in-progress hypotheses to the orchestrator too
+        partial_callback = on_partial if profile.partials else None
+        command_callback = on_command if stt.command_model is not None else None
+        mic_thread = threading.Thread(target=stt.process_audio,
+                                      args=(on_transcription, partial_callback, command_callback))
+        mic_thread.daemon = True
+        mic_thread.start()
+
+    # Connect to Orchestrator (after loading, so the grammar request knows the command model)
+    await connect_to_orchestrator()
+    READINESS.mark_ready(input=args.input, profile=profile.name,
+                         dictation=model is not None, commands=bool(stt and stt.command_model))
 
-    # Start microphone capture and transcription in a separate thread
-    # so it doesn't block the async event loop
-    mic_thread = threading.Thread(target=stt.process_audio, args=(on_transcription,))
-    mic_thread.daemon = True
-    mic_thread.start()
+async def main_async(args=None):
+    """
+    Main asynchronous function: bind the WebSocket server at once, then
+    load the models and start transcription in the background.
+    """
+    if args is None:
+        args = parse_args()
+    global MAIN_LOOP, ARGS
+    MAIN_LOOP = asyncio.get_running_loop()
+    ARGS = args
+
+    profile = get_profile('low_latency' if args.low_latency else args.profile)
+    print(f"Latency profile: {profile.name} (capture {profile.capture_frames}, feed {profile.feed_frames} "
+          f"samples, utterance end after {profile.t_end} s of silence)")
 
     # Start the WebSocket server
     host = "localhost"
     port = 8765
     print(f"Starting WebSocket server on ws://{host}:{port}")
 
-    # Connect to Orchestrator
-    await connect_to_orchestrator()
-
     try:
         async with websockets.serve(connection_handler, host, port):
-            print("WebSocket server is now listening for connections...")
+            print("WebSocket server is now listening for connections; loading models...")
+            await start_recognition(args, profile)
             await asyncio.Future()  # Run forever
     except OSError as e:
         print(f"Failed to start server, maybe the port {port} is already in use?")
         print(e)
+    finally:
+        # An open client connection would keep the process from exiting on Ctrl+C
+        if ORCHESTRATOR_CONNECTION is not None:
+            await ORCHESTRATOR_CONNECTION.close()
 
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main_async())
+        asyncio.run(main_async(parse_args()))
     except KeyboardInterrupt:
         print("\nServer stopped by user.")
\ No newline at end of file
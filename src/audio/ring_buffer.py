@@ -0,0 +1,130 @@
+"""
+Audio Ring Buffer
+Fixed-capacity, preallocated int16 buffer between the capture callback and
+the recognizer, with an overflow policy and lag/drop counters
+"""
+
+import threading
+import time
+
+import numpy as np
+
+OVERFLOW_POLICIES = ('drop_oldest', 'skip_to_live')
+
+
+class AudioRingBuffer:
+    """
+    Single-producer, single-consumer ring of int16 samples. Memory is
+    allocated once; write() never blocks the capture thread.
+
+    When a write does not fit:
+      drop_oldest   discard just enough of the oldest audio to make room,
+                    so the recognizer always has the latest capacity seconds
+      skip_to_live  discard everything buffered and continue from the new
+                    audio, so a slow machine jumps back to real time at once
+    """
+
+    def __init__(self, capacity_seconds=10.0, sample_rate=16000, policy='drop_oldest'):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{policy}', expected one of {OVERFLOW_POLICIES}")
+        self.sample_rate = sample_rate
+        self.capacity = max(1, int(capacity_seconds * sample_rate))
+        self.policy = policy
+        self._buffer = np.zeros(self.capacity, dtype='<i2')
+        self._read_pos = 0
+        self._size = 0
+        self._cond = threading.Condition()
+
+        # Counters
+        self.samples_written = 0
+        self.samples_read = 0
+        self.samples_dropped = 0
+        self.overruns = 0
+        self.max_depth = 0
+        self.max_lag_seconds = 0.0
+        self.last_overrun_time = None
+
+    @property
+    def depth(self):
+        """Buffered samples not yet read"""
+        return self._size
+
+    @property
+    def lag_seconds(self):
+        """How far the reader is behind the live input"""
+        return self._size / self.sample_rate
+
+    def _drop(self, n):
+        self._read_pos = (self._read_pos + n) % self.capacity
+        self._size -= n
+        self.samples_dropped += n
+
+    def write(self, data):
+        """Append int16 PCM bytes from the capture thread"""
+        samples = np.frombuffer(data, dtype='<i2')
+        with self._cond:
+            if len(samples) > self.capacity:
+                # Larger than the whole buffer: only its newest part can be kept
+                self.samples_dropped += len(samples) - self.capacity
+                samples = samples[-self.capacity:]
+            n = len(samples)
+            overflow = self._size + n - self.capacity
+            if overflow > 0:
+                self.overruns += 1
+                self.last_overrun_time = time.monotonic()
+                self._drop(self._size if self.policy == 'skip_to_live' else overflow)
+
+            start = (self._read_pos + self._size) % self.capacity
+            first = min(n, self.capacity - start)
+            self._buffer[start:start + first] = samples[:first]
+            if first < n:
+                self._buffer[:n - first] = samples[first:]
+            self._size += n
+            self.samples_written += n
+            if self._size > self.max_depth:
+                self.max_depth = self._size
+            self._cond.notify()
+
+    def read(self, max_samples, timeout=0.1):
+        """
+        Return up to max_samples as bytes, waiting up to timeout for a full
+        chunk. Returns whatever is buffered at the timeout, or None if empty.
+        """
+        with self._cond:
+            if self._size < max_samples:
+                self._cond.wait_for(lambda: self._size >= max_samples, timeout)
+            if self._size == 0:
+                return None
+            lag = self._size / self.sample_rate
+            if lag > self.max_lag_seconds:
+                self.max_lag_seconds = lag
+            n = min(max_samples, self._size)
+            start = self._read_pos
+            first = min(n, self.capacity - start)
+            if first == n:
+                out = self._buffer[start:start + n].tobytes()
+            else:
+                out = self._buffer[start:].tobytes() + self._buffer[:n - first].tobytes()
+            self._read_pos = (start + n) % self.capacity
+            self._size -= n
+            self.samples_read += n
+            return out
+
+    def clear(self):
+        with self._cond:
+            self._read_pos = 0
+            self._size = 0
+
+    def stats(self):
+        """Return buffer counters as a dict"""
+        with self._cond:
+            return {
+                'policy': self.policy,
+                'capacity_seconds': self.capacity / self.sample_rate,
+                'depth_seconds': round(self._size / self.sample_rate, 3),
+                'max_depth_seconds': round(self.max_depth / self.sample_rate, 3),
+                'max_lag_seconds': round(self.max_lag_seconds, 3),
+                'overruns': self.overruns,
+                'dropped_seconds': round(self.samples_dropped / self.sample_rate, 3),
+                'written_seconds': round(self.samples_written / self.sample_rate, 3),
+            }
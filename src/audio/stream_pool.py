@@ -0,0 +1,225 @@
+"""
+Recognizer Pool
+Independent audio streams decoded against one shared Vosk model, each with
+its own KaldiRecognizer, on a bounded set of worker threads
+"""
+
+import asyncio
+import itertools
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from audio_clock import AudioTimeline, new_clock_id
+from latency_profiles import apply_endpointer
+
+
+class PoolFullError(RuntimeError):
+    """Raised when every stream slot is taken"""
+
+
+class RecognizerStream:
+    """
+    One audio stream (a browser tab, a room microphone). Chunks are queued
+    and decoded strictly in order by a single task, so the recognizer is
+    never used from two threads at once; the decoding itself runs on the
+    pool's worker threads (Vosk releases the GIL while decoding).
+    """
+
+    def __init__(self, pool, stream_id, recognizer, sample_rate, on_result,
+                 vad=None, max_pending=64, time_base=0.0):
+        self.pool = pool
+        self.stream_id = stream_id
+        self.recognizer = recognizer
+        self.sample_rate = sample_rate
+        # The stream's audio clock counts the samples the client sent.
+        # Vosk keeps counting time across Reset(), so a reused recognizer
+        # starts at time_base seconds rather than zero.
+        self.clock_id = new_clock_id(f"stream{stream_id}")
+        self.timeline = AudioTimeline(sample_rate)
+        self.time_base = time_base
+        self.received = 0  # samples received, including dropped chunks
+        self.decoded = 0   # capture position the decoder has reached
+        self.on_result = on_result
+        self.vad = vad
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.last_partial = ''
+        # Utterance the next results belong to; advances after each final
+        self.utterance_id = 0
+        self.chunks = 0
+        self.dropped = 0
+        self.audio_seconds = 0.0
+        self.closed = False
+        self._task = asyncio.create_task(self._run())
+
+    def feed(self, data):
+        """Queue raw int16 PCM; drops the chunk if the stream is too far behind"""
+        if self.closed:
+            return False
+        position = self.received
+        self.received += len(data) // 2
+        try:
+            self.queue.put_nowait((position, data))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        return True
+
+    async def finish(self):
+        """Flush the last words and release the recognizer"""
+        if self.closed:
+            return
+        self.closed = True
+        await self.queue.put(None)
+        await self._task
+
+    def _decode(self, position, data):
+        """Worker thread: run one chunk through the gate and recognizer"""
+        results = []
+        if position != self.decoded and self.vad is not None:
+            # Chunks were dropped in between
+            self.vad.gap(position - self.decoded)
+        self.decoded = position + len(data) // 2
+        runs = [(position, len(data) // 2)]
+        pieces = [(data, False)]
+        if self.vad is not None:
+            data, _ = self.vad.process(data)
+            runs = self.vad.last_runs
+            # Finalize each closed segment before the next one's audio is fed
+            pieces = self.vad.split(data)
+        for run_position, n_samples in runs:
+            self.timeline.feed(run_position, n_samples)
+        for piece, ended in pieces:
+            if piece:
+                self.audio_seconds += len(piece) / 2 / self.sample_rate
+                if self.recognizer.AcceptWaveform(piece):
+                    results.extend(self._final(self.recognizer.Result()))
+                    self.last_partial = ''
+                elif not ended:
+                    partial = json.loads(self.recognizer.PartialResult()).get('partial', '')
+                    if partial and partial != self.last_partial:
+                        self.last_partial = partial
+                        results.append(('partial', partial, []))
+            if ended:
+                results.extend(self._flush())
+        return results
+
+    def _final(self, result):
+        result = json.loads(result)
+        text = result.get('text', '')
+        if not text:
+            return []
+        return [('final', text, self.timeline.words(result, -self.time_base))]
+
+    def _flush(self):
+        self.last_partial = ''
+        return self._final(self.recognizer.FinalResult())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                item = await self.queue.get()
+                if item is None:
+                    results = await loop.run_in_executor(self.pool.executor, self._flush)
+                else:
+                    self.chunks += 1
+                    results = await loop.run_in_executor(self.pool.executor, self._decode, *item)
+                for kind, text, words in results:
+                    try:
+                        self.on_result(self, kind, text, words)
+                    except Exception as e:
+                        print(f"Recognizer pool: Result handler failed for stream {self.stream_id}: {e}")
+                    if kind == 'final':
+                        self.utterance_id += 1
+                if item is None:
+                    break
+        except Exception as e:
+            print(f"Recognizer pool: Stream {self.stream_id} failed: {e}")
+        finally:
+            self.closed = True
+            self.pool._release(self)
+
+    def stats(self):
+        return {
+            'stream_id': self.stream_id,
+            'sample_rate': self.sample_rate,
+            'chunks': self.chunks,
+            'pending': self.queue.qsize(),
+            'dropped': self.dropped,
+            'audio_seconds': round(self.audio_seconds, 1),
+        }
+
+
+class RecognizerPool:
+    """
+    Hands out recognizers for a model that is loaded once. At most
+    max_streams streams are open at a time; released recognizers are
+    reset and reused for the next stream with the same sample rate.
+    """
+
+    def __init__(self, model, max_streams=4, workers=None, vad_factory=None, profile=None):
+        self.model = model
+        self.profile = profile
+        self.max_streams = max_streams
+        self.vad_factory = vad_factory
+        self.executor = ThreadPoolExecutor(max_workers=workers or max_streams,
+                                           thread_name_prefix='recognizer')
+        self.streams = {}
+        self._idle = {}  # sample_rate -> [(KaldiRecognizer, seconds it has decoded)]
+        self._ids = itertools.count(1)
+        self.rejected = 0
+
+    def _recognizer(self, sample_rate):
+        idle = self._idle.get(sample_rate)
+        if idle:
+            return idle.pop()
+        import vosk
+        recognizer = vosk.KaldiRecognizer(self.model, sample_rate)
+        recognizer.SetWords(True)
+        if self.profile is not None:
+            apply_endpointer(recognizer, self.profile)
+        return recognizer, 0.0
+
+    def open_stream(self, on_result, sample_rate=16000):
+        """
+        Start a stream; on_result(stream, kind, text, words) is called on the
+        event loop for every 'partial' and 'final' result, with the word
+        timings of finals on the stream's audio clock. Raises PoolFullError.
+        """
+        if len(self.streams) >= self.max_streams:
+            self.rejected += 1
+            raise PoolFullError(f"All {self.max_streams} recognizer streams are in use")
+        stream_id = next(self._ids)
+        vad = self.vad_factory(sample_rate) if self.vad_factory else None
+        recognizer, time_base = self._recognizer(sample_rate)
+        stream = RecognizerStream(self, stream_id, recognizer, sample_rate, on_result,
+                                  vad=vad, time_base=time_base)
+        self.streams[stream_id] = stream
+        print(f"Recognizer pool: Opened stream {stream_id} at {sample_rate} Hz "
+              f"({len(self.streams)}/{self.max_streams} in use)")
+        return stream
+
+    def _release(self, stream):
+        if self.streams.pop(stream.stream_id, None) is None:
+            return
+        # Clear any half-decoded utterance, then keep it for the next stream
+        if hasattr(stream.recognizer, 'Reset'):
+            stream.recognizer.Reset()
+        time_base = stream.time_base + stream.timeline.fed_seconds
+        self._idle.setdefault(stream.sample_rate, []).append((stream.recognizer, time_base))
+        print(f"Recognizer pool: Closed stream {stream.stream_id} "
+              f"({stream.audio_seconds:.1f} s of speech, {stream.dropped} chunks dropped)")
+
+    def stats(self):
+        """Pool counters and per-stream stats as a dict"""
+        return {
+            'max_streams': self.max_streams,
+            'open': len(self.streams),
+            'idle_recognizers': sum(len(r) for r in self._idle.values()),
+            'rejected': self.rejected,
+            'streams': [s.stats() for s in self.streams.values()],
+        }
+
+    async def shutdown(self):
+        await asyncio.gather(*(s.finish() for s in list(self.streams.values())), return_exceptions=True)
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,177 @@
+"""
+Batch Transcription
+Transcribe a recording as fast as the CPU allows, optionally split at quiet
+points and decoded in parallel worker processes, and report the real-time factor
+
+Usage:
+    python transcribe.py talk.wav --workers 4
+    arecord -f S16_LE -r 16000 -c 1 -d 60 | python transcribe.py -
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from audio_sources import SAMPLE_WIDTH, open_source
+
+DEFAULT_MODEL = "Models/vosk-model-en-us-0.42-gigaspeech"
+# Bytes handed to AcceptWaveform at a time; large feeds keep Python overhead negligible
+FEED_BYTES = 16000 * SAMPLE_WIDTH * 4
+
+# Per-worker Vosk model, loaded once by the pool initializer
+_WORKER_MODEL = None
+
+
+def _worker_init(model_path):
+    global _WORKER_MODEL
+    from vosk_stt import load_model
+    _WORKER_MODEL = load_model(model_path)
+
+
+def _transcribe_segment(pcm, sample_rate):
+    """Pool task: decode one segment with this worker's model"""
+    start = time.perf_counter()
+    text = transcribe_pcm(_WORKER_MODEL, pcm, sample_rate)
+    return text, time.perf_counter() - start
+
+
+def transcribe_pcm(model, pcm, sample_rate):
+    """Decode a whole int16 PCM buffer and return its transcript"""
+    import vosk
+
+    recognizer = vosk.KaldiRecognizer(model, sample_rate)
+    pieces = []
+    for i in range(0, len(pcm), FEED_BYTES):
+        if recognizer.AcceptWaveform(pcm[i:i + FEED_BYTES]):
+            text = json.loads(recognizer.Result()).get('text', '')
+            if text:
+                pieces.append(text)
+    text = json.loads(recognizer.FinalResult()).get('text', '')
+    if text:
+        pieces.append(text)
+    return " ".join(pieces)
+
+
+def split_segments(pcm, sample_rate, segment_seconds=30.0, search_seconds=2.0, frame_ms=20):
+    """
+    Byte ranges of roughly segment_seconds each. Every cut is moved to the
+    quietest 20 ms frame within search_seconds of its target, so words are
+    not split between two workers.
+    """
+    frame = int(sample_rate * frame_ms / 1000)
+    samples = np.frombuffer(pcm, dtype='<i2')
+    n_frames = len(samples) // frame
+    step = max(1, int(segment_seconds * 1000 / frame_ms))
+    search = int(search_seconds * 1000 / frame_ms)
+    if n_frames <= step + search:
+        return [(0, len(pcm))]
+
+    x = samples[:n_frames * frame].astype(np.float32).reshape(n_frames, frame)
+    energy = np.mean(x * x, axis=1)
+
+    cuts = [0]
+    target = step
+    while target + search < n_frames:
+        lo = max(target - search, cuts[-1] + 1)
+        hi = min(target + search, n_frames)
+        cut = lo + int(np.argmin(energy[lo:hi]))
+        cuts.append(cut)
+        target = cut + step
+    bounds = [c * frame * SAMPLE_WIDTH for c in cuts] + [len(pcm)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def transcribe_parallel(model_path, pcm, sample_rate, workers, segment_seconds=30.0):
+    """
+    Split pcm at quiet points, decode the segments across a process pool
+    and return (transcript, summed decode seconds, segment count).
+    """
+    segments = split_segments(pcm, sample_rate, segment_seconds)
+    workers = max(1, min(workers, len(segments)))
+    # Spawned workers each load the model once; results come back in order
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_worker_init, initargs=(model_path,)) as executor:
+        futures = [executor.submit(_transcribe_segment, pcm[start:end], sample_rate)
+                   for start, end in segments]
+        results = [f.result() for f in futures]
+    transcript = " ".join(text for text, _ in results if text)
+    return transcript, sum(seconds for _, seconds in results), len(segments)
+
+
+def parse_args(argv=None):
+    """Command line options for batch transcription"""
+    parser = argparse.ArgumentParser(description="Transcribe a recording faster than real time")
+    parser.add_argument("input", help="WAV or raw int16 PCM file, or '-' for stdin")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Vosk model directory")
+    parser.add_argument("--sample-rate", type=int, default=16000,
+                        help="Sample rate of raw PCM input (WAV files use their header)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes; 1 decodes in this process")
+    parser.add_argument("--segment-seconds", type=float, default=30.0,
+                        help="Target length of the segments decoded in parallel")
+    parser.add_argument("--output", help="Write the transcript to this file instead of stdout")
+    parser.add_argument("--json", action="store_true", help="Print the timing summary as JSON")
+    return parser.parse_args(argv)
+
+
+def main(args=None):
+    if args is None:
+        args = parse_args()
+
+    source = open_source(args.input, sample_rate=args.sample_rate)
+    pcm = source.read_all()
+    sample_rate = source.sample_rate
+    duration = len(pcm) / SAMPLE_WIDTH / sample_rate
+    if duration == 0:
+        print("No audio in input")
+        return
+
+    start = time.perf_counter()
+    if args.workers <= 1:
+        from vosk_stt import load_model
+        model = load_model(args.model)
+        load_seconds = time.perf_counter() - start
+        decode_start = time.perf_counter()
+        transcript = transcribe_pcm(model, pcm, sample_rate)
+        decode_seconds = time.perf_counter() - decode_start
+        segments = 1
+    else:
+        transcript, decode_seconds, segments = transcribe_parallel(
+            args.model, pcm, sample_rate, args.workers, args.segment_seconds)
+        load_seconds = None
+    wall_seconds = time.perf_counter() - start
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(transcript + "\n")
+    else:
+        print(transcript)
+
+    summary = {
+        'audio_seconds': round(duration, 2),
+        'wall_seconds': round(wall_seconds, 2),
+        'decode_seconds': round(decode_seconds, 2),
+        'model_load_seconds': round(load_seconds, 2) if load_seconds is not None else None,
+        'segments': segments,
+        'workers': min(args.workers, segments),
+        # Real-time factor: processing time / audio time; below 1 is faster than real time
+        'rtf': round(wall_seconds / duration, 3),
+        'decode_rtf': round(decode_seconds / duration, 3),
+    }
+    if args.json:
+        print(json.dumps(summary))
+    else:
+        print("-" * 50)
+        print(f"Audio: {duration:.1f} s in {segments} segment(s), {summary['workers']} worker(s)")
+        print(f"Wall time: {wall_seconds:.2f} s  (RTF {summary['rtf']:.3f}, {1 / summary['rtf']:.1f}x real time)")
+        print(f"Decode CPU time: {decode_seconds:.2f} s  (RTF {summary['decode_rtf']:.3f})")
+
+
+if __name__ == "__main__":
+    main(parse_args())
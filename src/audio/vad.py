@@ -0,0 +1,184 @@
+"""
+Voice Activity Gate
+Energy + zero-crossing voice activity detection over 16-bit PCM, with
+pre-roll and hangover, so only speech segments reach the recognizer
+"""
+
+from collections import deque
+
+import numpy as np
+
+
+class VoiceActivityGate:
+    """
+    Splits incoming audio into fixed frames and classifies them in one
+    vectorized pass: a frame is speech when its energy is well above the
+    adaptive noise floor, or moderately above it with a high zero-crossing
+    rate (unvoiced onsets such as "s" or "f").
+
+    A segment opens after trigger_ms of speech and includes the preroll_ms
+    of audio before it, so word onsets are not clipped. It stays open for
+    hangover_ms after the last speech frame, then closes.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=20, threshold_db=9.0,
+                 trigger_ms=40, hangover_ms=400, preroll_ms=300,
+                 fricative_zcr=0.25, min_floor_db=-70.0, floor_adapt=0.05):
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.threshold_db = threshold_db
+        self.trigger_frames = max(1, trigger_ms // frame_ms)
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.fricative_zcr = fricative_zcr
+        self.min_floor_db = min_floor_db
+        self.floor_adapt = floor_adapt
+
+        self.noise_floor_db = None
+        self.preroll = deque(maxlen=max(1, preroll_ms // frame_ms))
+        self.in_speech = False
+        self.speech_run = 0
+        self.silence_run = 0
+        self._remainder = b''
+        # Input samples framed so far: the capture position of the next frame
+        self.samples_seen = 0
+        # Where the audio returned by the last process() call came from:
+        # [(capture sample, sample count), ...] in output order
+        self.last_runs = []
+        # Byte offsets in that audio at which a speech segment closed
+        self.last_ends = []
+
+        # Counters
+        self.frames_in = 0
+        self.frames_passed = 0
+        self.segments = 0
+
+    def frame_features(self, samples):
+        """Per-frame energy in dBFS and zero-crossing rate for an (n, frame_length) int16 array"""
+        x = samples.astype(np.float32) / 32768.0
+        energy_db = 10.0 * np.log10(np.mean(x * x, axis=1) + 1e-10)
+        signs = np.signbit(samples)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame_length - 1)
+        return energy_db, zcr
+
+    def classify(self, energy_db, zcr):
+        """Boolean speech decision per frame; also adapts the noise floor"""
+        if self.noise_floor_db is None:
+            self.noise_floor_db = max(float(np.min(energy_db)), self.min_floor_db)
+        floor = self.noise_floor_db
+        speech = (energy_db > floor + self.threshold_db) | (
+            (energy_db > floor + self.threshold_db / 2) & (zcr > self.fricative_zcr)
+        )
+        quiet = energy_db[~speech]
+        if quiet.size:
+            # Track the floor quickly downwards and slowly upwards
+            level = float(np.mean(quiet))
+            rate = 0.5 if level < floor else self.floor_adapt
+            self.noise_floor_db = max(floor + rate * (level - floor), self.min_floor_db)
+        return speech
+
+    def process(self, data):
+        """
+        Feed raw int16 little-endian PCM bytes. Returns (audio, ended):
+        the bytes to pass to the recognizer (possibly empty) and whether a
+        speech segment closed within this chunk.
+        """
+        data = self._remainder + data
+        frame_bytes = self.frame_length * 2
+        n_frames = len(data) // frame_bytes
+        self._remainder = data[n_frames * frame_bytes:]
+        self.last_runs = []
+        self.last_ends = []
+        if n_frames == 0:
+            return b'', False
+
+        samples = np.frombuffer(data, dtype='<i2', count=n_frames * self.frame_length)
+        frames = samples.reshape(n_frames, self.frame_length)
+        speech = self.classify(*self.frame_features(frames))
+        self.frames_in += n_frames
+
+        passed = []
+        ended = False
+        base = self.samples_seen
+        self.samples_seen += n_frames * self.frame_length
+        for i in range(n_frames):
+            frame = data[i * frame_bytes:(i + 1) * frame_bytes]
+            position = base + i * self.frame_length
+            if self.in_speech:
+                passed.append(frame)
+                self._record_run(position)
+                if speech[i]:
+                    self.silence_run = 0
+                else:
+                    self.silence_run += 1
+                    if self.silence_run >= self.hangover_frames:
+                        self.in_speech = False
+                        self.speech_run = 0
+                        ended = True
+                        self.last_ends.append(len(passed) * frame_bytes)
+                continue
+
+            self.preroll.append((position, frame))
+            self.speech_run = self.speech_run + 1 if speech[i] else 0
+            if self.speech_run >= self.trigger_frames:
+                # Speech onset: release the pre-roll, which includes the trigger frames
+                self.in_speech = True
+                self.silence_run = 0
+                self.segments += 1
+                for preroll_position, preroll_frame in self.preroll:
+                    passed.append(preroll_frame)
+                    self._record_run(preroll_position)
+                self.preroll.clear()
+
+        self.frames_passed += len(passed)
+        return b''.join(passed), ended
+
+    def split(self, audio):
+        """
+        Cut the audio returned by the last process() call at its segment
+        ends: [(piece, ended), ...], so each utterance can be finalized
+        before the next one's onset is fed.
+        """
+        pieces = []
+        start = 0
+        for end in self.last_ends:
+            pieces.append((audio[start:end], True))
+            start = end
+        if start < len(audio) or not pieces:
+            pieces.append((audio[start:], False))
+        return pieces
+
+    def _record_run(self, position):
+        """Extend the last output run, or start a new one after a gap"""
+        runs = self.last_runs
+        if runs and runs[-1][0] + runs[-1][1] == position:
+            runs[-1] = (runs[-1][0], runs[-1][1] + self.frame_length)
+        else:
+            runs.append((position, self.frame_length))
+
+    def gap(self, n_samples):
+        """
+        Input audio was lost (e.g. dropped on buffer overflow): advance the
+        capture position and start over without the stale partial frame.
+        """
+        self.samples_seen += n_samples + len(self._remainder) // 2
+        self._remainder = b''
+        self.preroll.clear()
+
+    def reset(self):
+        """Forget segment state (the noise floor estimate is kept)"""
+        self.preroll.clear()
+        self.in_speech = False
+        self.speech_run = 0
+        self.silence_run = 0
+        self._remainder = b''
+
+    def stats(self):
+        """Return gate counters as a dict"""
+        return {
+            'frames_in': self.frames_in,
+            'frames_passed': self.frames_passed,
+            'pass_ratio': (self.frames_passed / self.frames_in) if self.frames_in else 0.0,
+            'segments': self.segments,
+            'noise_floor_db': self.noise_floor_db,
+            'in_speech': self.in_speech,
+        }
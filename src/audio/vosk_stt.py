@@ -1,85 +1,226 @@
-import vosk
-import pyaudio
-import queue
 import json
 import os
+import threading
 import time
+from audio_clock import AudioTimeline, new_clock_id
+from audio_sources import MicrophoneSource
+from latency_profiles import apply_endpointer
+
+def load_model(model_path):
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"Vosk model not found at {model_path}. Please download it from https://alphacephei.com/vosk/models")
+    # Imported on first use: the server can listen before Vosk is loaded
+    import vosk
+    return vosk.Model(model_path)
 
 class VoskSTT:
-    def __init__(self, model_path, sample_rate=16000, chunk_size=8192):
-        if not os.path.exists(model_path):
-            raise FileNotFoundError(f"Vosk model not found at {model_path}. Please download it from https://alphacephei.com/vosk/models")
-
-        self.model = vosk.Model(model_path)
-        self.sample_rate = sample_rate
-        self.chunk_size = chunk_size
-        self.audio_queue = queue.Queue()
+    def __init__(self, model_path, sample_rate=16000, chunk_size=8192,
+                 command_model_path=None, dictation=True, vad=None, source=None, profile=None,
+                 model=None):
+        # Large-vocabulary model for captions (or an already loaded one); skipped in command-only mode
+        self.model = None
+        if dictation:
+            self.model = model if model is not None else load_model(model_path)
+        # Model for the grammar-constrained command recognizer. Grammars need
+        # a model with a dynamic graph (the small models); big models ignore them.
+        self.command_model = None
+        if command_model_path:
+            self.command_model = load_model(command_model_path)
+        elif not dictation:
+            self.command_model = load_model(model_path)
+        # Where audio comes from; the default input device unless given
+        self.source = source if source is not None else MicrophoneSource(sample_rate, chunk_size)
+        self.sample_rate = self.source.sample_rate
+        self.chunk_size = self.source.chunk_size
         self.running = False
+        # Optional VoiceActivityGate: only speech segments reach the recognizers
+        self.vad = vad
+        # Optional LatencyProfile: endpointing of the dictation recognizer
+        self.profile = profile
+        # Word timings of the latest final result, on the audio clock
+        self.last_words = []
+        # Audio clock of the current process_audio() run: word times are
+        # seconds of captured audio since the source started
+        self.clock_id = None
+        self.timeline = None
+
+        # Command phrases, set from the orchestrator's rule table at any time
+        self._grammar_lock = threading.Lock()
+        self._grammar = None
+        self._grammar_version = 0
+        self._reported_overruns = 0
+        self._last_overrun_report = 0.0
+
+    def set_grammar(self, phrases):
+        """
+        Replace the command phrases. Safe to call from any thread; the
+        command recognizer is rebuilt on the audio thread before the next chunk.
+        """
+        with self._grammar_lock:
+            self._grammar = sorted(set(phrases))
+            self._grammar_version += 1
+
+    def _build_command_recognizer(self):
+        with self._grammar_lock:
+            phrases = self._grammar
+            version = self._grammar_version
+        if not phrases or self.command_model is None:
+            return None, version
+        # "[unk]" absorbs everything that is not a command
+        import vosk
+        grammar = json.dumps(phrases + ["[unk]"])
+        print(f"Command recognizer: grammar of {len(phrases)} phrases")
+        recognizer = vosk.KaldiRecognizer(self.command_model, self.sample_rate, grammar)
+        recognizer.SetWords(True)
+        return recognizer, version
+
+    def stats(self):
+        """Capture and gate counters as a dict"""
+        return {
+            'source': type(self.source).__name__,
+            'capture': self.source.stats(),
+            'vad': self.vad.stats() if self.vad is not None else None,
+        }
+
+    def _report_overruns(self):
+        """Log (at most every 5 s) when the capture buffer had to drop audio"""
+        ring = getattr(self.source, 'ring', None)
+        if ring is None or ring.overruns == self._reported_overruns:
+            return
+        now = time.time()
+        if now - self._last_overrun_report < 5.0:
+            return
+        new = ring.overruns - self._reported_overruns
+        self._reported_overruns = ring.overruns
+        self._last_overrun_report = now
+        print(f"Audio: recognizer fell behind, {new} buffer overrun(s) ({ring.policy}); "
+              f"{ring.samples_dropped / ring.sample_rate:.1f} s dropped in total")
 
-        self.p = pyaudio.PyAudio()
-        self.stream = self.p.open(
-            format=pyaudio.paInt16,
-            channels=1,
-            rate=self.sample_rate,
-            input=True,
-            frames_per_buffer=self.chunk_size,
-            stream_callback=self.audio_callback
-        )
-
-    def audio_callback(self, in_data, frame_count, time_info, status):
-        if status:
-            print(f"Audio status: {status}")
-        self.audio_queue.put(in_data)
-        return (in_data, pyaudio.paContinue)
-
-    def process_audio(self, process_callback):
+    def process_audio(self, process_callback, partial_callback=None, command_callback=None):
+        """
+        Transcribe until stopped. process_callback(text, utterance_id, words)
+        gets each final sentence with its word timings on the audio clock
+        ({"word", "start", "end", "conf"}). If partial_callback is given, it
+        is called as partial_callback(text, utterance_id, revision, audio_time)
+        whenever the running hypothesis changes, and once more when it holds
+        unchanged, so the receiver can tell which words have settled;
+        audio_time is the audio clock at the end of the audio decoded so far.
+        command_callback(text, words) gets phrases from the grammar-constrained
+        command recognizer, which is fed the same audio chunks.
+        """
         self.running = True
-        self.stream.start_stream()
+        self.clock_id = new_clock_id(type(self.source).__name__.lower())
+        timeline = self.timeline = AudioTimeline(self.sample_rate)
+        ring = getattr(self.source, 'ring', None)
+        dropped = ring.samples_dropped if ring is not None else 0
+        captured = 0  # capture position of the next chunk, in samples
+        self.source.start()
         print("\nListening for audio to transcribe... (Press Ctrl+C in console to stop server)")
         print("-" * 50)
 
-        recognizer = vosk.KaldiRecognizer(self.model, self.sample_rate)
-        recognizer.SetWords(True)
+        import vosk
+        recognizer = None
+        if self.model is not None:
+            recognizer = vosk.KaldiRecognizer(self.model, self.sample_rate)
+            recognizer.SetWords(True)
+            if self.profile is not None and not apply_endpointer(recognizer, self.profile):
+                print("Vosk endpointer settings unavailable in this Vosk version; using its defaults")
+        command_recognizer = None
+        command_offset = 0.0
+        grammar_version = 0
+
+        utterance_id = 0
+        revision = 0
+        last_partial = ''
+        partial_repeated = False
 
-        sentence_buffer = []
-        last_recognition_time = time.time()
+        def finish(result):
+            # The endpointer decides where utterances end; every non-empty result is one sentence
+            nonlocal utterance_id, revision, last_partial, partial_repeated
+            text = result.get('text', '')
+            if not text:
+                return
+            self.last_words = timeline.words(result)
+            process_callback(text, utterance_id, self.last_words)
+            utterance_id += 1
+            revision = 0
+            last_partial = ''
+            partial_repeated = False
+
+        def command_result(result):
+            words = [w for w in timeline.words(json.loads(result), command_offset) if w['word'] != '[unk]']
+            if words:
+                command_callback(" ".join(w['word'] for w in words), words)
 
         while self.running:
             try:
-                data = self.audio_queue.get(timeout=0.1)
-                if recognizer.AcceptWaveform(data):
-                    result = json.loads(recognizer.Result())
-                    text = result.get('text', '')
-                    if text:
-                        sentence_buffer.append(text)
-                        full_sentence = " ".join(sentence_buffer)
-                        process_callback(full_sentence)
-                        sentence_buffer = []
-                        last_recognition_time = time.time()
-                else:
-                    partial_result = json.loads(recognizer.PartialResult())
-                    partial_text = partial_result.get('partial', '')
-                    if partial_text:
-                        last_recognition_time = time.time()
-
-                # Check for end of speech (e.g., 2 seconds of silence)
-                if sentence_buffer and (time.time() - last_recognition_time > 2.0):
-                    full_sentence = " ".join(sentence_buffer)
-                    process_callback(full_sentence)
-                    sentence_buffer = []
-
-
-            except queue.Empty:
-                if sentence_buffer and (time.time() - last_recognition_time > 2.0):
-                    full_sentence = " ".join(sentence_buffer)
-                    process_callback(full_sentence)
-                    sentence_buffer = []
-                continue
+                if ring is not None and ring.samples_dropped != dropped:
+                    # Audio lost on overflow still advances the audio clock
+                    lost = ring.samples_dropped - dropped
+                    dropped = ring.samples_dropped
+                    captured += lost
+                    if self.vad is not None:
+                        self.vad.gap(lost)
+                data = self.source.read(timeout=0.1)
+                self._report_overruns()
+                if data is None:
+                    # Nothing from a live source yet
+                    continue
+                if not data:
+                    # End of a file or pipe: flush whatever is still being decoded
+                    if command_recognizer:
+                        command_result(command_recognizer.FinalResult())
+                    if recognizer:
+                        finish(json.loads(recognizer.FinalResult()))
+                    print("Audio source ended")
+                    break
+                # Audio for the recognizers as (piece, segment ended after it)
+                pieces = [(data, False)]
+                runs = [(captured, len(data) // 2)]
+                captured += len(data) // 2
+                if self.vad is not None:
+                    data, _ = self.vad.process(data)
+                    runs = self.vad.last_runs
+                    pieces = self.vad.split(data)
+
+                if command_callback and grammar_version != self._grammar_version:
+                    command_recognizer, grammar_version = self._build_command_recognizer()
+                    # A new recognizer counts time from the audio fed from now on
+                    command_offset = timeline.fed_seconds
+                for position, n_samples in runs:
+                    timeline.feed(position, n_samples)
+
+                for piece, segment_ended in pieces:
+                    if command_callback and command_recognizer:
+                        if piece and command_recognizer.AcceptWaveform(piece):
+                            command_result(command_recognizer.Result())
+                        if segment_ended:
+                            command_result(command_recognizer.FinalResult())
+
+                    if recognizer is None:
+                        continue
+                    if piece and recognizer.AcceptWaveform(piece):
+                        finish(json.loads(recognizer.Result()))
+                    elif piece and partial_callback and not segment_ended:
+                        partial_text = json.loads(recognizer.PartialResult()).get('partial', '')
+                        if partial_text and (partial_text != last_partial or not partial_repeated):
+                            partial_repeated = partial_text == last_partial
+                            last_partial = partial_text
+                            partial_callback(partial_text, utterance_id, revision,
+                                             round(timeline.to_audio_time(timeline.fed_seconds), 3))
+                            revision += 1
+                    if segment_ended:
+                        # The gate stopped passing audio: flush the utterance now,
+                        # before the next segment's audio, instead of waiting for
+                        # an endpoint that will never come
+                        finish(json.loads(recognizer.FinalResult()))
+
             except Exception as e:
                 print(f"\nError processing audio: {e}")
 
     def stop(self):
         self.running = False
-        self.stream.stop_stream()
-        self.stream.close()
-        self.p.terminate()
+        if self.vad is not None:
+            stats = self.vad.stats()
+            print(f"VAD: passed {stats['pass_ratio']:.0%} of audio in {stats['segments']} speech segments")
+        self.source.close()
@@ -0,0 +1,171 @@
+"""
+Broadcast Fan-out
+Per-client bounded outboxes so one slow websocket never holds up the others
+"""
+
+import asyncio
+from collections import OrderedDict
+import itertools
+
+import websockets.exceptions
+
+# Default limits shared by all servers
+DEFAULT_MAX_PENDING = 16
+DEFAULT_SEND_TIMEOUT = 5.0
+
+
+class ClientOutbox:
+    """
+    Bounded, latest-wins send queue for a single websocket.
+
+    Each queued item is a list of frames that is sent back to back, so
+    a metadata frame and its binary payload are never interleaved with
+    other messages. Items queued with a key replace any still-unsent
+    item with the same key (e.g. a newer 'slide_update' supersedes an
+    older one). When the outbox is full the oldest item is dropped.
+    A send that takes longer than send_timeout closes the connection.
+    """
+
+    def __init__(self, websocket, name="client", max_pending=DEFAULT_MAX_PENDING,
+                 send_timeout=DEFAULT_SEND_TIMEOUT, on_close=None):
+        self.websocket = websocket
+        self.name = name
+        self.max_pending = max_pending
+        self.send_timeout = send_timeout
+        self.on_close = on_close
+        self.sent = 0
+        self.dropped = 0
+        self.closed = False
+        # key -> frames; unkeyed items get a unique key so they are never coalesced
+        self._pending = OrderedDict()
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def put(self, frames, key=None):
+        """Queue frames for sending without waiting; returns False if closed"""
+        if self.closed:
+            return False
+        if isinstance(frames, (str, bytes)):
+            frames = [frames]
+        if key is None:
+            key = ('_', next(self._sequence))
+        elif key in self._pending:
+            # Latest wins: drop the stale, unsent item
+            del self._pending[key]
+            self.dropped += 1
+        self._pending[key] = frames
+        while len(self._pending) > self.max_pending:
+            self._pending.popitem(last=False)
+            self.dropped += 1
+        self._wakeup.set()
+        return True
+
+    @property
+    def depth(self):
+        """Number of items waiting to be sent"""
+        return len(self._pending)
+
+    async def _run(self):
+        """Send queued items in order until the connection goes away"""
+        try:
+            while True:
+                if not self._pending:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                _, frames = self._pending.popitem(last=False)
+                for frame in frames:
+                    await asyncio.wait_for(self.websocket.send(frame), self.send_timeout)
+                self.sent += 1
+        except asyncio.TimeoutError:
+            print(f"{self.name}: Send timed out after {self.send_timeout}s, disconnecting {self.websocket.remote_address}")
+            asyncio.create_task(self.websocket.close(code=1011, reason="send timeout"))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.closed = True
+            self._pending.clear()
+            if self.on_close:
+                self.on_close(self)
+
+    def close(self):
+        """Stop the sender task; unsent items are discarded"""
+        self.closed = True
+        self._task.cancel()
+
+
+class Broadcaster:
+    """
+    Registry of connected websockets, each with its own ClientOutbox.
+    publish() returns immediately; every client drains at its own pace.
+    """
+
+    def __init__(self, name, max_pending=DEFAULT_MAX_PENDING, send_timeout=DEFAULT_SEND_TIMEOUT):
+        self.name = name
+        self.max_pending = max_pending
+        self.send_timeout = send_timeout
+        self._outboxes = {}
+
+    def add(self, websocket):
+        """Register a websocket and return its outbox"""
+        outbox = ClientOutbox(
+            websocket,
+            name=self.name,
+            max_pending=self.max_pending,
+            send_timeout=self.send_timeout,
+            on_close=self._forget,
+        )
+        self._outboxes[websocket] = outbox
+        return outbox
+
+    def remove(self, websocket):
+        """Unregister a websocket and stop its sender"""
+        outbox = self._outboxes.pop(websocket, None)
+        if outbox:
+            outbox.close()
+
+    def _forget(self, outbox):
+        if self._outboxes.get(outbox.websocket) is outbox:
+            del self._outboxes[outbox.websocket]
+
+    @property
+    def clients(self):
+        """The currently registered websockets"""
+        return list(self._outboxes)
+
+    def __len__(self):
+        return len(self._outboxes)
+
+    def __bool__(self):
+        return bool(self._outboxes)
+
+    def __contains__(self, websocket):
+        return websocket in self._outboxes
+
+    def send(self, websocket, frames, key=None):
+        """Queue frames for one client; returns False if it is not connected"""
+        outbox = self._outboxes.get(websocket)
+        if outbox is None:
+            return False
+        return outbox.put(frames, key=key)
+
+    def publish(self, frames, key=None, clients=None):
+        """Queue the same, already-encoded frames for every (or the given) client"""
+        targets = self._outboxes.values() if clients is None else (
+            self._outboxes[c] for c in clients if c in self._outboxes
+        )
+        for outbox in list(targets):
+            outbox.put(frames, key=key)
+
+    def stats(self):
+        """Per-broadcaster counters as a dict"""
+        outboxes = list(self._outboxes.values())
+        return {
+            'clients': len(outboxes),
+            'queued': sum(o.depth for o in outboxes),
+            'sent': sum(o.sent for o in outboxes),
+            'dropped': sum(o.dropped for o in outboxes),
+        }
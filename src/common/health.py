@@ -0,0 +1,62 @@
+"""
+Health and Readiness
+Servers bind their port first and load models in the background; clients
+and the launcher ask {"type": "health"} to learn when they are usable
+"""
+
+import json
+import os
+import time
+
+STARTING = 'starting'
+READY = 'ready'
+FAILED = 'failed'
+
+
+def is_health_request(data):
+    """True for a parsed {"type": "health"} message"""
+    return isinstance(data, dict) and data.get('type') == 'health'
+
+
+class Readiness:
+    """
+    Startup state of one server: 'starting' until its models and files
+    are loaded, then 'ready' (or 'failed' with the reason). The time from
+    construction to ready is reported as startup_seconds.
+    """
+
+    def __init__(self, component):
+        self.component = component
+        self.state = STARTING
+        self.started = time.monotonic()
+        self.startup_seconds = None
+        self.error = None
+        self.detail = {}
+
+    @property
+    def is_ready(self):
+        return self.state == READY
+
+    def mark_ready(self, **detail):
+        self.state = READY
+        self.startup_seconds = time.monotonic() - self.started
+        self.detail.update(detail)
+        print(f"{self.component}: Ready after {self.startup_seconds:.2f} s")
+
+    def mark_failed(self, error):
+        self.state = FAILED
+        self.error = str(error)
+        print(f"{self.component}: Startup failed: {self.error}")
+
+    def message(self):
+        """The reply to a health request, as JSON"""
+        return json.dumps({
+            'type': 'health',
+            'component': self.component,
+            'state': self.state,
+            'pid': os.getpid(),
+            'uptime_seconds': round(time.monotonic() - self.started, 3),
+            'startup_seconds': round(self.startup_seconds, 3) if self.startup_seconds is not None else None,
+            'error': self.error,
+            'detail': self.detail,
+        })
@@ -0,0 +1,81 @@
+"""
+Local Channels
+In-process stand-ins for websocket connections, so servers sharing one
+event loop (the supervisor's single-process mode) skip the network hop
+"""
+
+import asyncio
+
+import websockets
+
+# URI -> connection handler of the servers running in this process
+LOCAL_HANDLERS = {}
+
+
+def serve_locally(uri, handler):
+    """Route open_connection(uri) in this process straight to handler(connection)"""
+    LOCAL_HANDLERS[uri] = handler
+
+
+class LocalConnection:
+    """
+    One end of an in-process channel. Offers the part of the websocket
+    API the servers use: send, recv, async iteration, close and
+    remote_address; a closed channel raises ConnectionClosedOK.
+    """
+
+    def __init__(self, name):
+        self.remote_address = ('local', name)
+        self.closed = False
+        self.peer = None
+        self._inbox = asyncio.Queue()
+        self._task = None
+
+    async def send(self, message):
+        if self.closed:
+            raise websockets.exceptions.ConnectionClosedOK(None, None)
+        self.peer._inbox.put_nowait(message)
+
+    async def recv(self):
+        message = await self._inbox.get()
+        if message is None:
+            # Leave the end-of-stream marker for any later reader
+            self._inbox.put_nowait(None)
+            raise websockets.exceptions.ConnectionClosedOK(None, None)
+        return message
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.recv()
+        except websockets.exceptions.ConnectionClosed:
+            raise StopAsyncIteration
+
+    async def close(self, code=1000, reason=''):
+        for end in (self, self.peer):
+            if not end.closed:
+                end.closed = True
+                end._inbox.put_nowait(None)
+
+
+async def open_connection(uri):
+    """
+    Connect to uri: through a local channel when that server runs in this
+    process, otherwise over a real websocket.
+    """
+    handler = LOCAL_HANDLERS.get(uri)
+    if handler is None:
+        return await websockets.connect(uri)
+    client, server = LocalConnection(uri), LocalConnection('in-process')
+    client.peer, server.peer = server, client
+
+    async def serve():
+        try:
+            await handler(server)
+        finally:
+            await server.close()
+
+    server._task = asyncio.create_task(serve())
+    return client
@@ -0,0 +1,270 @@
+"""
+Executive Backends
+Routes the Orchestrator's actions to the agents that carry them out. Every
+backend has its own bounded queue and worker, so a slow camera action never
+holds up a slide change
+"""
+
+import abc
+import asyncio
+import functools
+import json
+import time
+
+import websockets
+
+# Actions a backend may have waiting before new ones are dropped
+DEFAULT_QUEUE_SIZE = 16
+# Seconds to connect to, send to, or hear back from a remote agent
+DEFAULT_TIMEOUT = 5.0
+
+
+class ExecutiveError(Exception):
+    """An executive agent could not carry out an action"""
+
+
+class ActionStats:
+    """Dispatch counts and latency of one action"""
+
+    def __init__(self):
+        self.done = 0
+        self.failed = 0
+        self.dropped = 0
+        self.wait_seconds = 0.0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, wait, total, ok):
+        if ok:
+            self.done += 1
+        else:
+            self.failed += 1
+        self.wait_seconds += wait
+        self.total_seconds += total
+        self.max_seconds = max(self.max_seconds, total)
+
+    def as_dict(self):
+        finished = self.done + self.failed
+        return {
+            'done': self.done,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'avg_wait_ms': round(1000 * self.wait_seconds / finished, 2) if finished else 0.0,
+            'avg_ms': round(1000 * self.total_seconds / finished, 2) if finished else 0.0,
+            'max_ms': round(1000 * self.max_seconds, 2),
+        }
+
+
+class ExecutiveBackend(abc.ABC):
+    """
+    An executive agent behind a bounded queue. Its worker carries out one
+    action at a time, in the order they were dispatched; when the queue is
+    full a new action is dropped instead of waiting behind a stuck agent.
+    """
+
+    def __init__(self, name, queue_size=DEFAULT_QUEUE_SIZE):
+        self.name = name
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self._task = None
+
+    @property
+    def connected(self):
+        return True
+
+    def handles(self, action):
+        """Whether this backend can carry out action"""
+        return True
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def submit(self, action, params, stats):
+        """Queue an action without waiting; returns False if the queue is full"""
+        try:
+            self.queue.put_nowait((action, params, time.monotonic(), stats))
+        except asyncio.QueueFull:
+            stats.dropped += 1
+            return False
+        return True
+
+    async def _run(self):
+        while True:
+            action, params, queued_at, stats = await self.queue.get()
+            started = time.monotonic()
+            try:
+                await self.execute(action, params)
+                ok = True
+            except Exception as e:
+                print(f"ORCHESTRATOR ERROR: {self.name} could not carry out {action}: {e}")
+                ok = False
+            finished = time.monotonic()
+            stats.record(started - queued_at, finished - queued_at, ok)
+            if ok:
+                print(f"ORCHESTRATOR: {action} done by {self.name} in {1000 * (finished - queued_at):.1f} ms")
+
+    @abc.abstractmethod
+    async def execute(self, action, params):
+        """Carry out one action; raises on failure"""
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+class ControllerBackend(ExecutiveBackend):
+    """
+    An in-process controller object. methods maps each action to the
+    controller method that carries it out and how the action's params name
+    that method's arguments: {'OPEN_PRESENTATION': ('open_presentation',
+    {'path': 'file_path'})}. The method runs in a worker thread so a
+    blocking controller never stalls the event loop.
+    """
+
+    def __init__(self, name, controller, methods, queue_size=DEFAULT_QUEUE_SIZE):
+        super().__init__(name, queue_size)
+        self.controller = controller
+        self.methods = methods
+
+    def handles(self, action):
+        return action in self.methods and callable(getattr(self.controller, self.methods[action][0], None))
+
+    async def execute(self, action, params):
+        name, arguments = self.methods[action]
+        unknown = sorted(set(params) - set(arguments))
+        if unknown:
+            raise ExecutiveError(f"{name}() takes no {', '.join(unknown)}")
+        method = getattr(self.controller, name)
+        kwargs = {arguments[param]: value for param, value in params.items()}
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, functools.partial(method, **kwargs))
+
+
+class WebSocketBackend(ExecutiveBackend):
+    """
+    A remote agent reached over a websocket. encode(action, params) builds
+    the message; with reply_type set, an action is done once the agent
+    answers with a message of that type (and fails if it says ok: false).
+    The connection is opened on demand and reopened after a failure, so the
+    agent may start, or restart, after the Orchestrator.
+    """
+
+    def __init__(self, name, uri, encode, reply_type=None, connect=websockets.connect,
+                 timeout=DEFAULT_TIMEOUT, queue_size=DEFAULT_QUEUE_SIZE):
+        super().__init__(name, queue_size)
+        self.uri = uri
+        self.encode = encode
+        self.reply_type = reply_type
+        self.connect = connect
+        self.timeout = timeout
+        self.connection = None
+
+    @property
+    def connected(self):
+        return self.connection is not None and not getattr(self.connection, 'closed', False)
+
+    async def open(self):
+        """Connect now if not connected; returns whether the agent is reachable"""
+        if self.connected:
+            return True
+        self.connection = None
+        try:
+            self.connection = await asyncio.wait_for(self.connect(self.uri), self.timeout)
+        except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException) as e:
+            print(f"ORCHESTRATOR: Could not connect to {self.name} at {self.uri}: {e}")
+            return False
+        print(f"ORCHESTRATOR: Connected to {self.name} at {self.uri}")
+        return True
+
+    async def execute(self, action, params):
+        if not await self.open():
+            raise ExecutiveError("not connected")
+        try:
+            await asyncio.wait_for(self.connection.send(json.dumps(self.encode(action, params))), self.timeout)
+            reply = None
+            if self.reply_type:
+                reply = await asyncio.wait_for(self._reply(), self.timeout)
+        except (asyncio.TimeoutError, websockets.exceptions.ConnectionClosed) as e:
+            # Start over with a fresh connection on the next action
+            print(f"ORCHESTRATOR: Lost connection to {self.name}: {e!r}")
+            self._drop()
+            raise ExecutiveError("connection lost")
+        if reply is not None and reply.get('ok') is False:
+            raise ExecutiveError(reply.get('error', 'rejected'))
+
+    async def _reply(self):
+        while True:
+            message = await self.connection.recv()
+            try:
+                reply = json.loads(message)
+            except (TypeError, json.JSONDecodeError):
+                continue
+            if isinstance(reply, dict) and reply.get('type') == self.reply_type:
+                return reply
+
+    def _drop(self):
+        connection, self.connection = self.connection, None
+        if connection is not None:
+            asyncio.create_task(connection.close())
+
+    async def close(self):
+        await super().close()
+        if self.connection is not None:
+            await self.connection.close()
+            self.connection = None
+
+
+class ActionDispatcher:
+    """
+    Maps action names to executive backends. dispatch() only queues the
+    action, so rule matching never waits for an executive agent.
+    """
+
+    def __init__(self):
+        self.routes = {}  # action -> backend
+        self.backends = []
+        self.actions = {}  # action -> ActionStats
+
+    def register(self, backend, actions):
+        """Route actions to backend; a later registration of an action replaces the earlier one"""
+        if backend not in self.backends:
+            self.backends.append(backend)
+        for action in actions:
+            if backend.handles(action):
+                self.routes[action] = backend
+            else:
+                print(f"ORCHESTRATOR: {backend.name} cannot carry out {action}, not routing it")
+
+    def start(self):
+        for backend in self.backends:
+            backend.start()
+
+    def dispatch(self, action, params):
+        """Queue action for its backend; returns False if it has none or the queue is full"""
+        backend = self.routes.get(action)
+        if backend is None:
+            print(f"ORCHESTRATOR: No executive agent handles {action}, ignoring")
+            return False
+        stats = self.actions.setdefault(action, ActionStats())
+        if not backend.submit(action, params, stats):
+            print(f"ORCHESTRATOR ERROR: {backend.name} is backed up, dropping {action}")
+            return False
+        return True
+
+    def stats(self):
+        return {
+            'backends': {
+                backend.name: {
+                    'connected': backend.connected,
+                    'queued': backend.queue.qsize(),
+                    'actions': sorted(a for a, b in self.routes.items() if b is backend),
+                }
+                for backend in self.backends
+            },
+            'actions': {action: stats.as_dict() for action, stats in sorted(self.actions.items())},
+        }
+
+    async def close(self):
+        for backend in self.backends:
+            await backend.close()
@@ -4,17 +4,101 @@ Receives data from perception agents (Audio STT & Vision VLM)
 Applies rule-based logic to recognize intent and delegate actions
 """
 
+import argparse
 import asyncio
 import json
+import sys
 import websockets
+from pathlib import Path
 from typing import Dict, Any, Optional
-from collections import deque
 import time
+from collections import deque
+from executive import ActionDispatcher, ControllerBackend, WebSocketBackend
+from trigger_matcher import tokenize
+from rule_loader import (
+    DEFAULT_RULES_PATH, RuleSet, RuleFileWatcher, compile_rule_file, compile_rule_file_async,
+)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.broadcast import Broadcaster
+from common.health import Readiness, is_health_request
+from common.local_channel import open_connection, serve_locally
+
+# All connected perception agents, each with its own bounded outbox
+CONNECTED_CLIENTS = Broadcaster("ORCHESTRATOR")
+# Agents that asked for a source's grammar (websocket -> source); they get it again on every rule reload
+GRAMMAR_SUBSCRIBERS = {}
+# Seconds within which a dictation match of an action already fired by the
+# command recognizer is treated as the same utterance
+COMMAND_DEDUP_WINDOW = 5.0
+# Audio clocks whose phrase matching state is kept; the least recently heard is dropped beyond this
+MAX_AUDIO_CLOCKS = 16
+# Actions carried out by the presentation (PDF server, or SlideController)
+SLIDE_ACTIONS = ('OPEN_PRESENTATION', 'NEXT_SLIDE', 'PREVIOUS_SLIDE', 'GO_TO_SLIDE', 'GO_TO_TOPIC')
+# Actions carried out by the camera (the vision agent's digital PTZ, or CameraController)
+CAMERA_ACTIONS = ('ZOOM_ON_OBJECT', 'ZOOM_IN', 'ZOOM_OUT', 'RESET_ZOOM', 'PAN_TO', 'TILT')
+# The in-process controllers' method for each action, and the method argument each action param fills
+SLIDE_CONTROLLER_METHODS = {
+    'OPEN_PRESENTATION': ('open_presentation', {'path': 'file_path'}),
+    'NEXT_SLIDE': ('next_slide', {}),
+    'PREVIOUS_SLIDE': ('previous_slide', {}),
+    'GO_TO_SLIDE': ('go_to_slide', {'slide_number': 'slide_number'}),
+    'GO_TO_TOPIC': ('go_to_topic', {'query': 'query'}),
+}
+CAMERA_CONTROLLER_METHODS = {
+    'ZOOM_ON_OBJECT': ('zoom_on_object', {'target': 'target', 'box': 'box'}),
+    'ZOOM_IN': ('zoom_in', {'level': 'level'}),
+    'ZOOM_OUT': ('zoom_out', {'level': 'level'}),
+    'RESET_ZOOM': ('reset_zoom', {}),
+    'PAN_TO': ('pan_to', {'x': 'x', 'y': 'y'}),
+    'TILT': ('tilt', {'angle': 'angle'}),
+}
+PDF_SERVER_URI = "ws://localhost:9002/control"
+# Startup state for health probes
+READINESS = Readiness("ORCHESTRATOR")
+
+
+def event_matches(rule: Dict[str, Any], event: Optional[str]) -> bool:
+    """
+    Whether a rule applies to a message with this event: plain messages
+    fire rules without an event, 'enter' also fires them, and event rules
+    need their own event.
+    """
+    wanted = rule.get('event')
+    if event is None:
+        return wanted is None
+    return wanted == event or (wanted is None and event == 'enter')
+
+
+def common_prefix(a, b):
+    """Longest common leading run of two word lists"""
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return a[:n]
+
+
+class AudioClockState:
+    """
+    Phrase matching state of one audio clock (a capture run or a client
+    stream): words on different clocks are never matched together, so
+    interleaved streams cannot complete or wipe each other's triggers.
+    """
 
-# Global set to store all connected clients
-CONNECTED_CLIENTS = set()
-# Connection to PDF server
-PDF_SERVER_CONNECTION: Optional[websockets.WebSocketClientProtocol] = None
+    def __init__(self, clock: Optional[str], matcher):
+        self.clock = clock
+        # Incremental trigger matcher over the current rule set's trie
+        self.matcher = matcher
+        # Recent words as (word, audio time, confidence), replayed into a reloaded matcher
+        self.phrase_buffer = deque(maxlen=10)
+        # Latest audio time heard on this clock
+        self.last_audio_time = None
+        # Capture rule waiting for its query words, as (rule, matched_at, confidence)
+        self.pending_capture = None
+        # Streaming hypothesis of the current utterance (low-latency audio)
+        self.partial = None
 
 
 class OrchestratorAgent:
@@ -23,76 +107,140 @@ class OrchestratorAgent:
     based on rule-based decision logic.
     """
 
-    def __init__(self):
-        self.rules = self._initialize_rules()
-        # Phrase buffer to accumulate recent words for multi-word trigger matching
-        self.phrase_buffer = deque(maxlen=10)  # Keep last 10 words
-        self.phrase_timestamps = deque(maxlen=10)  # Track when each word arrived
+    def __init__(self, rules_path=DEFAULT_RULES_PATH, dispatcher=None):
+        self.rules_path = rules_path
+        # Executive agents, by action
+        self.dispatcher = dispatcher or ActionDispatcher()
         self.phrase_window = 3.0  # Seconds - words within this window form a phrase
+        # Compiled rule table; replaced as a whole on reload
+        self.rule_set = self._initialize_rules()
+        # Audio clock id -> its AudioClockState, least recently heard first.
+        # Agents that send no word timings share the None clock: arrival time is used.
+        self.audio_clocks = {}
+        # State of the clock of the audio message being handled
+        self.audio = None
+        # Actions fired by the command recognizer, as (action, time), awaiting
+        # the dictation transcript of the same words
+        self.command_hits = deque()
         self.triggered_phrases = {}  # Track recently triggered phrases to avoid duplicates
 
-    def _initialize_rules(self):
-        """Initialize the rule-based decision engine"""
-        return {
-            'audio_stt': [
-                {
-                    'trigger': 'open presentation',
-                    'action': 'OPEN_PRESENTATION',
-                    'params': {}
-                },
-                {
-                    'trigger': 'next',
-                    'action': 'NEXT_SLIDE',
-                    'params': {}
-                },
-                {
-                    'trigger': 'previous',
-                    'action': 'PREVIOUS_SLIDE',
-                    'params': {}
-                },
-            ],
-            'vision_vlm': [
-                {
-                    'trigger': 'cardboard',
-                    'action': 'ZOOM_ON_OBJECT',
-                    'params': {'target': 'cardboard'}
-                },
-                {
-                    'trigger': 'person',
-                    'action': 'ZOOM_ON_OBJECT',
-                    'params': {'target': 'person'}
-                },
-                {
-                    'trigger': 'bottle',
-                    'action': 'ZOOM_ON_OBJECT',
-                    'params': {'target': 'bottle'}
-                },
-            ]
-        }
-
-    def _clean_old_phrases(self):
-        """Remove words from buffer that are older than the phrase window"""
-        current_time = time.time()
-        while self.phrase_timestamps and (current_time - self.phrase_timestamps[0]) > self.phrase_window:
-            self.phrase_timestamps.popleft()
-            self.phrase_buffer.popleft()
-
-    def _get_recent_phrase(self) -> str:
-        """Get the accumulated phrase from recent words"""
-        self._clean_old_phrases()
-        return ' '.join(self.phrase_buffer).lower()
-
-    def _was_recently_triggered(self, action: str, cooldown: float = 2.0) -> bool:
-        """Check if an action was recently triggered to avoid duplicates"""
-        current_time = time.time()
-        if action in self.triggered_phrases:
-            if (current_time - self.triggered_phrases[action]) < cooldown:
-                return True
-        return False
-
-    def _mark_triggered(self, action: str):
+    def _initialize_rules(self) -> RuleSet:
+        """Initialize the rule-based decision engine from the rule file"""
+        try:
+            rule_set = compile_rule_file(self.rules_path, self.phrase_window)
+        except (OSError, ValueError) as e:
+            print(f"ORCHESTRATOR ERROR: Could not load rules from {self.rules_path}: {e}")
+            print("ORCHESTRATOR: Starting with no rules; fix the file and it will be reloaded.")
+            return RuleSet({}, self.phrase_window, path=self.rules_path)
+        print(f"ORCHESTRATOR: Loaded {rule_set.rule_count} rules from {self.rules_path} "
+              f"in {rule_set.compile_ms:.1f} ms")
+        return rule_set
+
+    @property
+    def rules(self):
+        return self.rule_set.rules
+
+    @property
+    def matchers(self):
+        return self.rule_set.matchers
+
+    def swap_rules(self, rule_set: RuleSet):
+        """
+        Atomically replace the rule table. Partial matches are rebuilt from
+        the phrase buffer and cooldowns are kept, so nothing in flight is lost.
+        """
+        audio_matcher = rule_set.matchers.get('audio_stt')
+        for state in self.audio_clocks.values():
+            state.matcher = audio_matcher.fork() if audio_matcher is not None else None
+            if state.matcher is not None:
+                now = state.last_audio_time if state.clock is not None else time.time()
+                state.matcher.prime(self._recent_words(state, now))
+        self.rule_set = rule_set
+        publish_grammar(rule_set)
+        print(f"ORCHESTRATOR: Rules reloaded from {rule_set.path}: {rule_set.rule_count} rules, "
+              f"compiled in {rule_set.compile_ms:.1f} ms")
+
+    async def reload_rules(self) -> Dict[str, Any]:
+        """Recompile the rule file off the event loop and swap it in"""
+        try:
+            rule_set = await compile_rule_file_async(self.rules_path, self.phrase_window)
+        except (OSError, ValueError) as e:
+            print(f"ORCHESTRATOR ERROR: Rule reload failed, keeping current rules: {e}")
+            return {'ok': False, 'error': str(e)}
+        self.swap_rules(rule_set)
+        return {'ok': True, 'rules': rule_set.rule_count, 'compile_ms': round(rule_set.compile_ms, 3)}
+
+    def _recent_words(self, state: AudioClockState, now: float):
+        """(word, time) pairs from a clock's phrase buffer still inside the phrase window"""
+        return [(w, t) for w, t, _ in state.phrase_buffer if now - t <= self.phrase_window]
+
+    def _was_recently_triggered(self, action: str, cooldown: float = 2.0,
+                                clock: Optional[str] = None, at: Optional[float] = None) -> bool:
+        """
+        Check if an action was recently triggered to avoid duplicates.
+        Two audio triggers on the same audio clock are compared by when
+        their words were spoken, so delayed messages cannot fool the cooldown.
+        """
+        last = self.triggered_phrases.get(action)
+        if last is None:
+            return False
+        last_clock, last_at, last_wall = last
+        if clock is not None and clock == last_clock and at is not None and last_at is not None:
+            return abs(at - last_at) < cooldown
+        return time.time() - last_wall < cooldown
+
+    def _mark_triggered(self, action: str, clock: Optional[str] = None, at: Optional[float] = None):
         """Mark an action as recently triggered"""
-        self.triggered_phrases[action] = time.time()
+        self.triggered_phrases[action] = (clock, at, time.time())
+
+    def _sync_audio_clock(self, matcher, clock: Optional[str]) -> AudioClockState:
+        """
+        The matching state of an audio clock, created on its first words.
+        Word times from different clocks (capture runs, client streams)
+        cannot be compared, so each clock matches phrases on its own.
+        """
+        state = self.audio_clocks.pop(clock, None)
+        if state is None:
+            state = AudioClockState(clock, matcher.fork())
+            while len(self.audio_clocks) >= MAX_AUDIO_CLOCKS:
+                # Most likely a capture run that ended without saying so
+                del self.audio_clocks[next(iter(self.audio_clocks))]
+        # Reinserted: the dict stays ordered by when each clock was last heard
+        self.audio_clocks[clock] = state
+        return state
+
+    def close_audio_clock(self, clock: Optional[str]):
+        """Forget the matching state of an audio stream that ended"""
+        if self.audio_clocks.pop(clock, None) is not None:
+            print(f"ORCHESTRATOR: Audio stream on clock {clock} ended")
+
+    def _word_times(self, data: Dict[str, Any], words):
+        """
+        Audio time and confidence of each word. Finals and commands carry
+        per-word timings (the word's end is used); partials only carry the
+        audio time decoded so far and no confidences. Without an audio
+        clock, words are stamped with their arrival time.
+        """
+        timed = data.get('words') or []
+        times, confidences = [], []
+        for entry in timed:
+            for _ in tokenize(str(entry.get('word', ''))):
+                times.append(float(entry.get('end', 0.0)))
+                confidences.append(entry.get('conf'))
+        if timed and len(times) == len(words):
+            return times, confidences
+        at = data.get('audio_time')
+        if at is None and timed:
+            at = timed[-1].get('end')
+        if at is None or data.get('clock') is None:
+            at = time.time()
+        return [float(at)] * len(words), [None] * len(words)
+
+    def _trigger_confidence(self, rule: Dict[str, Any]) -> Optional[float]:
+        """Lowest confidence among the trigger words just fed (None if unknown)"""
+        n = len(tokenize(rule['trigger']))
+        known = [c for _, _, c in list(self.audio.phrase_buffer)[-n:] if c is not None]
+        return min(known) if known else None
 
     def parse_message(self, message: str) -> Dict[str, Any]:
         """Parse incoming JSON message from perception agents"""
@@ -109,78 +257,217 @@ class OrchestratorAgent:
     def apply_rules(self, data: Dict[str, Any]):
         """
         Apply rule-based logic to determine if action is needed.
-        Checks content against triggers and delegates commands.
-        Uses phrase buffering for multi-word triggers.
+        Audio words are fed one at a time into the compiled trigger matcher,
+        which keeps multi-word triggers in progress across messages.
         """
         source = data.get('source')
         content = data.get('content', '').strip()
 
+        if source == 'audio_stt' and data.get('type') == 'end_of_stream':
+            self.close_audio_clock(data.get('clock'))
+            return
         if not source or not content:
             return
 
-        # For audio STT, add word to phrase buffer
-        if source == 'audio_stt':
-            # Add each word separately to buffer
-            words = content.lower().split()
-            for word in words:
-                self.phrase_buffer.append(word)
-                self.phrase_timestamps.append(time.time())
-
-            # Get the accumulated recent phrase
-            recent_phrase = self._get_recent_phrase()
+        matcher = self.matchers.get(source)
+        if matcher is None:
+            return
 
-            # Debug: print the current phrase buffer
-            print(f"ORCHESTRATOR: Phrase buffer: '{recent_phrase}'")
+        words = tokenize(content)
+        now = time.time()
 
+        if source == 'audio_stt':
+            if not words:
+                return
+            audio = self.audio = self._sync_audio_clock(matcher, data.get('clock'))
+            matcher = audio.matcher
+            times, confidences = self._word_times(data, words)
+            audio.last_audio_time = max(times[-1], audio.last_audio_time or times[-1])
+            utterance_id = data.get('utterance_id')
+            if data.get('type') == 'command':
+                # A complete phrase from the grammar-constrained recognizer
+                known = [c for c in confidences if c is not None]
+                confidence = min(known) if known else None
+                fired = set()
+                for match in matcher.match_all(words, times[-1]):
+                    rule = match.rule
+                    if id(rule) not in fired and not rule.get('capture'):
+                        fired.add(id(rule))
+                        self._fire(source, rule, content, from_command=True,
+                                   at=times[-1], confidence=confidence)
+                return
+            if data.get('type') == 'partial':
+                self._apply_partial(matcher, utterance_id, data.get('revision', 0), words, content, times[-1])
+                return
+            if utterance_id is not None:
+                # Skip the words already acted on from this utterance's partials
+                words = self._finish_utterance(source, utterance_id, words, content, times[-1])
+                skipped = len(times) - len(words)
+                times, confidences = times[skipped:], confidences[skipped:]
+
+            # A capture rule matched at the end of the previous message: these words are its query
+            if audio.pending_capture and words:
+                rule, matched_at, confidence = audio.pending_capture
+                audio.pending_capture = None
+                if times[0] - matched_at <= self.phrase_window:
+                    self._fire(source, rule, content, query=' '.join(words),
+                               at=matched_at, confidence=confidence)
+                    return
+
+            for i, word in enumerate(words):
+                audio.phrase_buffer.append((word, times[i], confidences[i]))
+                for match in matcher.feed(word, times[i]):
+                    rule = match.rule
+                    confidence = self._trigger_confidence(rule)
+                    if rule.get('capture') == 'query':
+                        query = ' '.join(words[i + 1:])
+                        if not query:
+                            # Wait for the topic words to arrive in the next message
+                            audio.pending_capture = (rule, times[i], confidence)
+                            continue
+                        # The rest of the message is the query and must not fire other rules
+                        self._fire(source, rule, content, query=query, at=times[i], confidence=confidence)
+                        matcher.reset()
+                        audio.phrase_buffer.clear()
+                        return
+                    self._fire(source, rule, content, at=times[i], confidence=confidence)
         else:
-            # For vision or other sources, use content directly
-            recent_phrase = content.lower()
-
-        # Get rules for this source
-        source_rules = self.rules.get(source, [])
-
-        # Check each rule
-        for rule in source_rules:
-            trigger = rule['trigger'].lower()
-            action = rule['action']
-            params = rule['params']
-
-            # Check if trigger phrase is in the recent phrase
-            if trigger in recent_phrase:
-                # Avoid triggering the same action multiple times in quick succession
-                if not self._was_recently_triggered(action):
-                    print(f"ORCHESTRATOR: ✓ Matched trigger '{trigger}' in phrase: '{recent_phrase}'")
-                    self._mark_triggered(action)
-                    # Delegate action - schedule as async task
-                    asyncio.create_task(self._delegate_action_async(source, action, params, recent_phrase))
+            # For vision or other sources, match the content as a whole.
+            # Event messages (a label entering or leaving the scene) only fire
+            # rules for that event; rules without one act on 'enter'.
+            event = data.get('event')
+            fired = set()
+            for match in matcher.match_all(words, now):
+                if id(match.rule) in fired or not event_matches(match.rule, event):
+                    continue
+                fired.add(id(match.rule))
+                self._fire(source, match.rule, content)
+
+    def _apply_partial(self, matcher, utterance_id, revision: int, words, content: str, now: float):
+        """
+        Act on the settled part of a streaming hypothesis. A word counts as
+        stable once two consecutive revisions agree on it; stable words are
+        fed to the matcher exactly once per utterance. Partials carry no
+        confidences, so rules with a min_confidence wait for the final.
+        """
+        audio = self.audio
+        state = audio.partial
+        if state is None or state['utterance_id'] != utterance_id:
+            state = audio.partial = {
+                'utterance_id': utterance_id,
+                'revision': -1,
+                'words': [],
+                'consumed': [],
+                'capture': None,
+                'hold': False,
+            }
+        if revision <= state['revision']:
+            return  # Stale or duplicate revision
+        stable = common_prefix(state['words'], words)
+        state['revision'] = revision
+        state['words'] = words
+
+        consumed = state['consumed']
+        if state['capture'] or state['hold'] or stable[:len(consumed)] != consumed:
+            # Waiting for a capture query or for confidences, or the recognizer
+            # revised words already acted on: leave the rest to the final result
+            return
+
+        for word in stable[len(consumed):]:
+            consumed.append(word)
+            audio.phrase_buffer.append((word, now, None))
+            for match in matcher.feed(word, now):
+                if match.rule.get('min_confidence') is not None:
+                    # Hand the trigger words back so the final matches them again
+                    n = len(tokenize(match.rule['trigger']))
+                    del consumed[-n:]
+                    for _ in range(min(n, len(audio.phrase_buffer))):
+                        audio.phrase_buffer.pop()
+                    matcher.prime(self._recent_words(audio, now))
+                    state['hold'] = True
+                    return
+                if match.rule.get('capture') == 'query':
+                    # The query is still being spoken; take it from the final
+                    state['capture'] = (match.rule, len(consumed))
+                    return
+                self._fire('audio_stt', match.rule, content, at=now)
+
+    def _finish_utterance(self, source: str, utterance_id, words, content: str, now: float):
+        """
+        Reconcile a final result with the partials already acted on and
+        return the words that still need matching.
+        """
+        audio = self.audio
+        state = audio.partial
+        if state is None or state['utterance_id'] != utterance_id:
+            return words
+        audio.partial = None
+
+        done = len(common_prefix(state['consumed'], words))
+        if state['capture']:
+            rule, end = state['capture']
+            if done >= end:
+                query = ' '.join(words[end:])
+                if query:
+                    self._fire(source, rule, content, query=query, at=now)
                 else:
-                    print(f"ORCHESTRATOR: ⊘ Trigger '{trigger}' on cooldown, skipping...")
+                    audio.pending_capture = (rule, now, None)
+                audio.matcher.reset()
+                audio.phrase_buffer.clear()
+                return []
+        return words[done:]
+
+    def _take_command_hit(self, action: str) -> bool:
+        """Consume a recent command-recognizer firing of action, if any"""
+        now = time.time()
+        while self.command_hits and now - self.command_hits[0][1] > COMMAND_DEDUP_WINDOW:
+            self.command_hits.popleft()
+        for hit in self.command_hits:
+            if hit[0] == action:
+                self.command_hits.remove(hit)
+                return True
+        return False
 
-    async def _delegate_action_async(self, source: str, action: str, params: Dict, content: str):
+    def _fire(self, source: str, rule: Dict[str, Any], content: str, query: Optional[str] = None,
+              from_command: bool = False, at: Optional[float] = None,
+              confidence: Optional[float] = None):
         """
-        Async version of delegate action that properly awaits PDF server commands.
+        Delegate a matched rule's action unless it is on cooldown or was
+        heard with less than the rule's min_confidence. at is the audio
+        time of the trigger's last word.
         """
-        print("\n" + "="*60)
-        print(f"ORCHESTRATOR: Intent recognized from '{source}'")
-        print(f"ORCHESTRATOR: Trigger content: {content[:50]}...")
+        action = rule['action']
+        params = rule['params']
+        if query is not None:
+            params = dict(params, query=query)
+
+        min_confidence = rule.get('min_confidence')
+        if min_confidence is not None and confidence is not None and confidence < min_confidence:
+            print(f"ORCHESTRATOR: ⊘ Trigger '{rule['trigger']}' heard with confidence "
+                  f"{confidence:.2f} < {min_confidence}, skipping...")
+            return
+        clock = self.audio.clock if source == 'audio_stt' else None
 
-        if params:
-            param_str = ', '.join([f"{k}='{v}'" for k, v in params.items()])
-            print(f"ORCHESTRATOR: Delegating command: {action}({param_str})")
-        else:
-            print(f"ORCHESTRATOR: Delegating command: {action}")
+        # The command recognizer and dictation hear the same words: act once
+        if from_command:
+            self.command_hits.append((action, time.time()))
+        elif source == 'audio_stt' and self._take_command_hit(action):
+            print(f"ORCHESTRATOR: ⊘ Trigger '{rule['trigger']}' already handled by the command recognizer")
+            return
 
-        print("="*60 + "\n")
+        # Avoid triggering the same action multiple times in quick succession
+        if self._was_recently_triggered(action, clock=clock, at=at):
+            print(f"ORCHESTRATOR: ⊘ Trigger '{rule['trigger']}' on cooldown, skipping...")
+            return
 
-        # Send command to PDF server if it's a slide action
-        if action in ['OPEN_PRESENTATION', 'NEXT_SLIDE', 'PREVIOUS_SLIDE', 'GO_TO_SLIDE']:
-            await send_to_pdf_server(action, params)
+        print(f"ORCHESTRATOR: ✓ Matched trigger '{rule['trigger']}' in: '{content[:80]}'")
+        self._mark_triggered(action, clock=clock, at=at)
+        self._delegate_action(source, action, params, content)
 
     def _delegate_action(self, source: str, action: str, params: Dict, content: str):
         """
-        Delegate actions to executive agents.
-        Now actually sends commands to PDF server.
-        DEPRECATED - use _delegate_action_async instead
+        Delegate an action to the executive agent registered for it. The
+        action is only queued, so matching carries on while it is carried out.
         """
         print("\n" + "="*60)
         print(f"ORCHESTRATOR: Intent recognized from '{source}'")
@@ -194,40 +481,102 @@ class OrchestratorAgent:
 
         print("="*60 + "\n")
 
-        # Send command to PDF server if it's a slide action
-        if action in ['OPEN_PRESENTATION', 'NEXT_SLIDE', 'PREVIOUS_SLIDE', 'GO_TO_SLIDE']:
-            asyncio.create_task(send_to_pdf_server(action, params))
+        self.dispatcher.dispatch(action, params)
 
 
-async def send_to_pdf_server(action: str, params: Dict):
-    """Send command to PDF server"""
-    global PDF_SERVER_CONNECTION
+def slide_message(action: str, params: Dict) -> Dict[str, Any]:
+    """A command for the PDF server's control endpoint (and other remote agents)"""
+    return {'action': action, 'params': params}
 
-    if PDF_SERVER_CONNECTION:
-        try:
-            message = json.dumps({
-                'action': action,
-                'params': params
-            })
-            await PDF_SERVER_CONNECTION.send(message)
-            print(f"ORCHESTRATOR: Command sent to PDF server: {action}")
-        except Exception as e:
-            print(f"ORCHESTRATOR ERROR: Failed to send to PDF server: {e}")
-            PDF_SERVER_CONNECTION = None
-
-
-async def connect_to_pdf_server():
-    """Connect to the PDF server control endpoint"""
-    global PDF_SERVER_CONNECTION
-    pdf_server_uri = "ws://localhost:9002/control"
 
+def ptz_message(action: str, params: Dict) -> Dict[str, Any]:
+    """A PTZ command for the vision agent; ZOOM_IN becomes its zoom_in"""
+    return {'type': 'ptz', 'command': action.lower(), 'params': params}
+
+
+def build_dispatcher(args, actions=()) -> ActionDispatcher:
+    """
+    Route slide actions to the PDF server (or SlideController), camera
+    actions to the vision agent (or CameraController), then any --remote
+    routes, which take precedence. Raises ValueError if any of actions
+    (those of the rules) would have no executive agent.
+    """
+    dispatcher = ActionDispatcher()
+    queue_size = args.action_queue
+    if args.slides == 'controller':
+        from presenter.SlideController import SlideController
+        dispatcher.register(ControllerBackend('SlideController', SlideController(), SLIDE_CONTROLLER_METHODS,
+                                              queue_size=queue_size), SLIDE_ACTIONS)
+    else:
+        # Commands are never coalesced: "next next" must move two slides
+        dispatcher.register(WebSocketBackend('pdf_server', PDF_SERVER_URI, slide_message,
+                                             connect=open_connection, queue_size=queue_size), SLIDE_ACTIONS)
+    if args.camera == 'controller':
+        from vision.CameraController import CameraController
+        dispatcher.register(ControllerBackend('CameraController', CameraController(), CAMERA_CONTROLLER_METHODS,
+                                              queue_size=queue_size), CAMERA_ACTIONS)
+    else:
+        dispatcher.register(WebSocketBackend('vision_agent', args.vision_agent, ptz_message, reply_type='ptz_result',
+                                             connect=open_connection, queue_size=queue_size), CAMERA_ACTIONS)
+    for route in args.remote:
+        names, _, uri = route.partition('=')
+        dispatcher.register(WebSocketBackend(uri, uri, slide_message, connect=open_connection, queue_size=queue_size),
+                            [a.strip() for a in names.split(',') if a.strip()])
+    unrouted = sorted(set(actions) - set(dispatcher.routes))
+    if unrouted:
+        raise ValueError(f"No executive agent carries out {', '.join(unrouted)}")
+    return dispatcher
+
+
+def grammar_message(rule_set: RuleSet, source: str = 'audio_stt') -> str:
+    """
+    The trigger phrases of a source: the command recognizer's grammar for
+    audio, the labels to track for vision
+    """
+    return json.dumps({'type': 'grammar', 'source': source, 'phrases': rule_set.grammar(source)})
+
+
+def publish_grammar(rule_set: RuleSet):
+    """Push the grammar of a new rule set to subscribed agents"""
+    for source in set(GRAMMAR_SUBSCRIBERS.values()):
+        clients = [ws for ws, subscribed in GRAMMAR_SUBSCRIBERS.items() if subscribed == source]
+        CONNECTED_CLIENTS.publish(grammar_message(rule_set, source), key='grammar', clients=clients)
+
+
+async def handle_admin_message(websocket, message: str, orchestrator: OrchestratorAgent) -> bool:
+    """
+    Handle {"type": "admin", "command": ...} and {"type": "health"}
+    messages; returns False for anything else so it goes through the
+    normal perception path.
+    """
     try:
-        PDF_SERVER_CONNECTION = await websockets.connect(pdf_server_uri)
-        print(f"ORCHESTRATOR: Connected to PDF server at {pdf_server_uri}")
-    except Exception as e:
-        print(f"ORCHESTRATOR: Could not connect to PDF server at {pdf_server_uri}: {e}")
-        print("ORCHESTRATOR: Slide control will not be available until PDF server is running.")
-        PDF_SERVER_CONNECTION = None
+        data = json.loads(message)
+    except json.JSONDecodeError:
+        return False
+    if is_health_request(data):
+        READINESS.detail['executives'] = {
+            backend.name: backend.connected for backend in orchestrator.dispatcher.backends
+        }
+        CONNECTED_CLIENTS.send(websocket, READINESS.message())
+        return True
+    if not isinstance(data, dict) or data.get('type') != 'admin':
+        return False
+
+    command = data.get('command')
+    if command == 'get_grammar':
+        source = data.get('source') or 'audio_stt'
+        GRAMMAR_SUBSCRIBERS[websocket] = source
+        CONNECTED_CLIENTS.send(websocket, grammar_message(orchestrator.rule_set, source))
+        return True
+    if command == 'reload_rules':
+        result = await orchestrator.reload_rules()
+    elif command == 'dispatch_stats':
+        result = dict(orchestrator.dispatcher.stats(), ok=True)
+    else:
+        result = {'ok': False, 'error': f"Unknown admin command: {command}"}
+
+    CONNECTED_CLIENTS.send(websocket, json.dumps(dict(result, type='admin_result', command=command)))
+    return True
 
 
 async def connection_handler(websocket, orchestrator: OrchestratorAgent):
@@ -240,6 +589,9 @@ async def connection_handler(websocket, orchestrator: OrchestratorAgent):
 
     try:
         async for message in websocket:
+            if await handle_admin_message(websocket, message, orchestrator):
+                continue
+
             # Parse the incoming message
             data = orchestrator.parse_message(message)
 
@@ -254,15 +606,42 @@ async def connection_handler(websocket, orchestrator: OrchestratorAgent):
     except Exception as e:
         print(f"ORCHESTRATOR ERROR: {e}")
     finally:
-        CONNECTED_CLIENTS.discard(websocket)
+        CONNECTED_CLIENTS.remove(websocket)
+        GRAMMAR_SUBSCRIBERS.pop(websocket, None)
         print(f"ORCHESTRATOR: Agent disconnected: {client_address}")
 
 
-async def main():
+def parse_args(argv=None):
+    """Command line options for the orchestrator"""
+    parser = argparse.ArgumentParser(description="Orchestrator Agent")
+    parser.add_argument("--rules", default=str(DEFAULT_RULES_PATH), help="Rule file (JSON or YAML)")
+    parser.add_argument("--no-watch", action="store_true", help="Do not reload the rule file when it changes")
+    parser.add_argument("--slides", choices=("pdf", "controller"), default="pdf",
+                        help="Slide actions go to the PDF server or to an in-process SlideController")
+    parser.add_argument("--camera", choices=("vision", "controller"), default="vision",
+                        help="Camera actions go to the vision agent's digital PTZ or to an in-process CameraController")
+    parser.add_argument("--vision-agent", default="ws://localhost:8766", help="Vision agent websocket URI")
+    parser.add_argument("--remote", action="append", default=[], metavar="ACTION[,ACTION]=URI",
+                        help="Send these actions as {action, params} to another websocket agent (repeatable)")
+    parser.add_argument("--action-queue", type=int, default=16,
+                        help="Actions each executive agent may have waiting before new ones are dropped")
+    return parser.parse_args(argv)
+
+
+async def main(args=None):
     """
     Main function to start the Orchestrator WebSocket server.
     """
-    orchestrator = OrchestratorAgent()
+    if args is None:
+        args = parse_args()
+    orchestrator = OrchestratorAgent(rules_path=Path(args.rules))
+    try:
+        # Refuse to start with rules whose actions would be dropped
+        orchestrator.dispatcher = build_dispatcher(
+            args, {rule['action'] for rules in orchestrator.rules.values() for rule in rules})
+    except ValueError as e:
+        print(f"ORCHESTRATOR ERROR: {e}")
+        sys.exit(1)
 
     host = "localhost"
     port = 9001
@@ -282,8 +661,11 @@ async def main():
             print(f"    - Trigger: '{rule['trigger']}' -> Action: {rule['action']}")
     print("\n" + "="*60 + "\n")
 
-    # Connect to PDF server
-    await connect_to_pdf_server()
+    # Reload the rule file whenever it changes
+    watcher_task = None
+    if not args.no_watch:
+        watcher = RuleFileWatcher(orchestrator.rules_path, orchestrator.phrase_window, orchestrator.swap_rules)
+        watcher_task = asyncio.create_task(watcher.run())
 
     try:
         async with websockets.serve(
@@ -291,6 +673,15 @@ async def main():
             host,
             port
         ):
+            # Listen first, so agents and probes can connect while the executive agents are contacted.
+            # Agents that are not up yet are connected on their first action.
+            orchestrator.dispatcher.start()
+            for backend in orchestrator.dispatcher.backends:
+                if isinstance(backend, WebSocketBackend):
+                    await backend.open()
+            READINESS.mark_ready(rules=orchestrator.rule_set.rule_count)
+            # Agents started in this same process connect without a socket
+            serve_locally(f"ws://{host}:{port}", lambda ws: connection_handler(ws, orchestrator))
             print("ORCHESTRATOR: Ready to receive perception data...\n")
             await asyncio.Future()  # Run forever
     except OSError as e:
@@ -298,10 +689,15 @@ async def main():
         print(f"Error: {e}")
     except KeyboardInterrupt:
         print("\nORCHESTRATOR: Shutting down...")
+    finally:
+        if watcher_task:
+            watcher_task.cancel()
+        print(f"ORCHESTRATOR: Dispatch stats: {json.dumps(orchestrator.dispatcher.stats()['actions'])}")
+        await orchestrator.dispatcher.close()
 
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        asyncio.run(main(parse_args()))
     except KeyboardInterrupt:
         print("\nORCHESTRATOR: Stopped by user.")
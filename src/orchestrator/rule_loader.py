@@ -0,0 +1,163 @@
+"""
+Rule Loader
+Loads, validates and compiles the orchestrator rule file, and watches it for changes
+"""
+
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from trigger_matcher import TriggerMatcher, tokenize
+
+DEFAULT_RULES_PATH = Path(__file__).resolve().parent / "rules.json"
+CAPTURE_MODES = (None, 'query')
+# Vision events: a label became present, or stopped being present
+EVENT_TYPES = (None, 'enter', 'leave')
+
+
+class RuleSet:
+    """
+    An immutable, compiled rule table: the raw rules per source plus a
+    trigger matcher for each. The orchestrator swaps whole RuleSets, so a
+    reload is a single attribute assignment.
+    """
+
+    def __init__(self, rules: Dict[str, List[Dict[str, Any]]], window: float,
+                 path: Optional[Path] = None, compile_ms: float = 0.0):
+        self.rules = rules
+        self.window = window
+        self.path = path
+        self.compile_ms = compile_ms
+        self.matchers = {
+            source: TriggerMatcher(source_rules, window=window)
+            for source, source_rules in rules.items()
+        }
+
+    @property
+    def rule_count(self) -> int:
+        return sum(len(r) for r in self.rules.values())
+
+    def grammar(self, source: str = 'audio_stt') -> List[str]:
+        """
+        Trigger phrases of a source as a speech recognizer grammar, or
+        the labels a vision agent should look for. Capture rules are left
+        out: their query is free text, which only the dictation recognizer
+        can transcribe.
+        """
+        return sorted({
+            ' '.join(tokenize(rule['trigger']))
+            for rule in self.rules.get(source, [])
+            if not rule.get('capture')
+        })
+
+
+def read_rule_file(path: Path) -> Any:
+    """Parse a JSON or YAML rule file"""
+    path = Path(path)
+    text = path.read_text(encoding='utf-8')
+    if path.suffix.lower() in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("PyYAML is required for YAML rule files (pip install pyyaml)")
+        try:
+            return yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML: {e}")
+    return json.loads(text)
+
+
+def validate_rules(data: Any) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Check the structure of a rule table and return it normalized.
+    Raises ValueError describing the first problem found.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Rule file must map each source to a list of rules")
+
+    rules = {}
+    for source, source_rules in data.items():
+        if not isinstance(source_rules, list):
+            raise ValueError(f"Rules for '{source}' must be a list")
+        normalized = []
+        for i, rule in enumerate(source_rules):
+            where = f"{source}[{i}]"
+            if not isinstance(rule, dict):
+                raise ValueError(f"{where}: rule must be an object")
+            trigger = rule.get('trigger')
+            if not isinstance(trigger, str) or not tokenize(trigger):
+                raise ValueError(f"{where}: 'trigger' must be a non-empty phrase")
+            action = rule.get('action')
+            if not isinstance(action, str) or not action:
+                raise ValueError(f"{where}: 'action' must be a non-empty string")
+            params = rule.get('params', {})
+            if not isinstance(params, dict):
+                raise ValueError(f"{where}: 'params' must be an object")
+            if rule.get('capture') not in CAPTURE_MODES:
+                raise ValueError(f"{where}: 'capture' must be one of {CAPTURE_MODES[1:]}")
+            if rule.get('event') not in EVENT_TYPES:
+                raise ValueError(f"{where}: 'event' must be one of {EVENT_TYPES[1:]}")
+            min_confidence = rule.get('min_confidence')
+            if min_confidence is not None and (
+                    isinstance(min_confidence, bool) or not isinstance(min_confidence, (int, float))
+                    or not 0.0 <= min_confidence <= 1.0):
+                raise ValueError(f"{where}: 'min_confidence' must be a number between 0 and 1")
+            normalized.append(dict(rule, params=params))
+        rules[source] = normalized
+    return rules
+
+
+def compile_rule_file(path: Path, window: float) -> RuleSet:
+    """Read, validate and compile a rule file; blocking, run off the event loop"""
+    start = time.perf_counter()
+    rules = validate_rules(read_rule_file(path))
+    rule_set = RuleSet(rules, window, path=Path(path))
+    rule_set.compile_ms = (time.perf_counter() - start) * 1000
+    return rule_set
+
+
+async def compile_rule_file_async(path: Path, window: float) -> RuleSet:
+    """compile_rule_file in a worker thread, keeping the event loop responsive"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, compile_rule_file, path, window)
+
+
+class RuleFileWatcher:
+    """
+    Polls the rule file's modification time and hands a freshly compiled
+    RuleSet to on_reload. A file that fails validation is reported and
+    the current rules stay in place.
+    """
+
+    def __init__(self, path: Path, window: float, on_reload: Callable[[RuleSet], None],
+                 interval: float = 1.0):
+        self.path = Path(path)
+        self.window = window
+        self.on_reload = on_reload
+        self.interval = interval
+        self._signature = self._stat()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    async def run(self):
+        """Watch the file until cancelled"""
+        while True:
+            await asyncio.sleep(self.interval)
+            signature = self._stat()
+            if signature is None or signature == self._signature:
+                continue
+            self._signature = signature
+            try:
+                rule_set = await compile_rule_file_async(self.path, self.window)
+            except (OSError, ValueError) as e:
+                print(f"ORCHESTRATOR ERROR: Rule file {self.path} rejected, keeping current rules: {e}")
+                continue
+            self.on_reload(rule_set)
@@ -0,0 +1,114 @@
+"""
+Trigger Matcher
+Compiled word-level trie over rule triggers, matched incrementally as words arrive
+"""
+
+import copy
+import re
+from typing import Any, Dict, List, NamedTuple, Optional
+
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase words, dropping punctuation"""
+    return WORD_PATTERN.findall(text.lower())
+
+
+class TrieNode:
+    """One word position in the trigger trie"""
+
+    __slots__ = ('children', 'rules')
+
+    def __init__(self):
+        self.children: Dict[str, 'TrieNode'] = {}
+        self.rules: List[Dict[str, Any]] = []
+
+
+class Match(NamedTuple):
+    """A rule whose trigger words were just completed"""
+    rule: Dict[str, Any]
+    start_time: float
+    end_time: float
+
+
+class TriggerMatcher:
+    """
+    Matches rule triggers on whole-word boundaries ("next" never matches
+    "nextgen"). The trie is built once from the rule table; feed() then
+    advances only the partial matches in progress, so the cost per word
+    depends on the longest trigger, not on how many rules there are.
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]], window: float = 3.0):
+        self.window = window
+        self.root = TrieNode()
+        self.max_length = 0
+        for rule in rules:
+            self.add(rule)
+        # Partial matches in progress: (node, start_time)
+        self._active: List = []
+
+    def add(self, rule: Dict[str, Any]):
+        """Insert a rule's trigger into the trie"""
+        words = tokenize(rule['trigger'])
+        if not words:
+            raise ValueError(f"Rule for {rule.get('action')} has an empty trigger")
+        node = self.root
+        for word in words:
+            node = node.children.setdefault(word, TrieNode())
+        node.rules.append(rule)
+        self.max_length = max(self.max_length, len(words))
+
+    def reset(self):
+        """Forget partial matches (e.g. when the phrase buffer is cleared)"""
+        self._active = []
+
+    def fork(self) -> 'TriggerMatcher':
+        """A matcher sharing this one's trie but none of its partial matches, for another word stream"""
+        matcher = copy.copy(self)
+        matcher._active = []
+        return matcher
+
+    def feed(self, word: str, timestamp: float) -> List[Match]:
+        """
+        Advance all partial matches by one word and return the rules whose
+        triggers end on it. A trigger only matches if all its words arrived
+        within the phrase window.
+        """
+        matches = []
+        advanced = []
+        candidates = [(node, start) for node, start in self._active
+                      if timestamp - start <= self.window]
+        candidates.append((self.root, timestamp))
+        for node, start in candidates:
+            child = node.children.get(word)
+            if child is None:
+                continue
+            for rule in child.rules:
+                matches.append(Match(rule, start, timestamp))
+            if child.children:
+                advanced.append((child, start))
+        self._active = advanced
+        return matches
+
+    def prime(self, words):
+        """
+        Rebuild the partial-match state from recent (word, timestamp) pairs
+        without reporting matches, e.g. after swapping in a new rule set.
+        """
+        self._active = []
+        for word, timestamp in words:
+            self.feed(word, timestamp)
+
+    def match_all(self, words: List[str], timestamp: Optional[float] = 0.0) -> List[Match]:
+        """Match a complete text in one go, without touching the incremental state"""
+        saved = self._active
+        self._active = []
+        try:
+            matches = []
+            for word in words:
+                matches.extend(self.feed(word, timestamp))
+            return matches
+        finally:
+            self._active = saved
@@ -34,6 +34,11 @@ class SlideController:
         print(f"SlideController: GO_TO_SLIDE - Jumping to slide {slide_number}")
         # Future: Navigate to specific slide
 
+    def go_to_topic(self, query):
+        """Jump to the slide about a topic"""
+        print(f"SlideController: GO_TO_TOPIC - Jumping to the slide about: {query}")
+        # Future: Search the presentation's slide text
+
 
 if __name__ == "__main__":
     # Test the stub
@@ -42,4 +47,5 @@ if __name__ == "__main__":
     controller.next_slide()
     controller.previous_slide()
     controller.go_to_slide(5)
+    controller.go_to_topic("pricing")
 
@@ -0,0 +1,82 @@
+"""
+Disk Slide Cache
+Persistent cache of rendered slides keyed by PDF content hash and render parameters
+"""
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+EXTENSIONS = {'png': 'png', 'jpeg': 'jpg', 'webp': 'webp'}
+
+
+def content_hash(pdf_path, chunk_size=1024 * 1024):
+    """SHA-256 of the PDF file's bytes, so renames and copies share one cache"""
+    digest = hashlib.sha256()
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_atomic(path, data):
+    """Write bytes to path via a temp file and rename, so readers never see partial files"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class DiskSlideCache:
+    """
+    Rendered slides on disk, laid out as
+    <cache_dir>/<content hash>/<page>_z<zoom>_<format>.<ext>
+    Files are immutable: a changed PDF has a new hash and a new directory.
+    Render workers write the files (render_pool.render_page).
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.hits = 0
+        self.misses = 0
+
+    def document_dir(self, doc_hash):
+        """Directory holding everything cached for one PDF"""
+        return self.cache_dir / doc_hash
+
+    def path_for(self, doc_hash, slide_number, variant):
+        """File path of a rendered variant of a page"""
+        fmt = variant.cache_format.replace(':', '_q')
+        ext = EXTENSIONS.get(variant.fmt, 'bin')
+        return self.document_dir(doc_hash) / f"{slide_number:05d}_z{variant.zoom:g}_{fmt}.{ext}"
+
+    def get(self, doc_hash, slide_number, variant):
+        """Return cached image bytes or None; blocking, call off the event loop"""
+        try:
+            data = self.path_for(doc_hash, slide_number, variant).read_bytes()
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def contains(self, doc_hash, slide_number, variant):
+        return self.path_for(doc_hash, slide_number, variant).exists()
+
+    def stats(self):
+        """Return cache counters as a dict"""
+        return {
+            'dir': str(self.cache_dir),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
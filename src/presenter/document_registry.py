@@ -0,0 +1,200 @@
+"""
+Document Registry
+Open PDF presentations, each with its own session state, loaded lazily
+"""
+
+import time
+from pathlib import Path
+
+from disk_cache import content_hash
+
+
+class DocumentSession:
+    """
+    One presentation: a PDF file plus its navigation state.
+    The fitz handle is opened on first use and can be closed when idle
+    without losing the current slide; page geometry is loaded per page.
+    """
+
+    def __init__(self, doc_id, path, doc_hash):
+        self.doc_id = doc_id
+        self.path = str(path)
+        self.hash = doc_hash
+        self.current_slide = 0
+        self.total_slides = 0
+        self.last_used = time.monotonic()
+        self.text_index = None  # SlideIndex, built in the background after opening
+        self._document = None
+        self._page_sizes = {}
+        self.open()
+
+    @property
+    def is_open(self):
+        return self._document is not None
+
+    def open(self):
+        """Open the fitz handle; only the page tree is read, not the pages"""
+        if self._document is None:
+            import fitz  # PyMuPDF, imported on first use to keep server startup fast
+
+            self._document = fitz.open(self.path)
+            self.total_slides = self._document.page_count
+        return self._document
+
+    def close(self):
+        """Release the fitz handle; state and page sizes are kept"""
+        if self._document is not None:
+            self._document.close()
+            self._document = None
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+    def page_size(self, slide_number):
+        """(width, height) of a page in points, loading only that page"""
+        size = self._page_sizes.get(slide_number)
+        if size is None:
+            rect = self.open().load_page(slide_number).rect
+            size = (rect.width, rect.height)
+            self._page_sizes[slide_number] = size
+        return size
+
+    def next_slide(self):
+        """Move to next slide"""
+        self.touch()
+        if self.current_slide < self.total_slides - 1:
+            self.current_slide += 1
+            print(f"PDF Controller [{self.doc_id}]: Next slide -> {self.current_slide + 1}/{self.total_slides}")
+            return True
+        print(f"PDF Controller [{self.doc_id}]: Already on last slide")
+        return False
+
+    def previous_slide(self):
+        """Move to previous slide"""
+        self.touch()
+        if self.current_slide > 0:
+            self.current_slide -= 1
+            print(f"PDF Controller [{self.doc_id}]: Previous slide -> {self.current_slide + 1}/{self.total_slides}")
+            return True
+        print(f"PDF Controller [{self.doc_id}]: Already on first slide")
+        return False
+
+    def go_to_slide(self, slide_number):
+        """Go to specific slide (0-indexed)"""
+        self.touch()
+        if 0 <= slide_number < self.total_slides:
+            self.current_slide = slide_number
+            print(f"PDF Controller [{self.doc_id}]: Go to slide -> {self.current_slide + 1}/{self.total_slides}")
+            return True
+        print(f"PDF Controller [{self.doc_id}]: Invalid slide number {slide_number}")
+        return False
+
+    def describe(self):
+        """Summary of the session for status messages"""
+        return {
+            'doc_id': self.doc_id,
+            'path': self.path,
+            'slide_number': self.current_slide,
+            'total_slides': self.total_slides,
+            'open': self.is_open,
+        }
+
+
+class DocumentRegistry:
+    """
+    All presentations known to the server, by id. Opening a file that is
+    already registered (by id, path or content) returns the existing
+    session, so switching back to a deck never re-parses it. Paths must
+    lie in docs_dir, except for the files listed in allowed (the deck the
+    server was started with).
+    """
+
+    def __init__(self, docs_dir, idle_timeout=600.0, allowed=()):
+        self.docs_dir = Path(docs_dir).resolve()
+        self.allowed = {Path(path).resolve() for path in allowed}
+        self.idle_timeout = idle_timeout
+        self.sessions = {}
+        self.active = None
+
+    def resolve_path(self, path):
+        """Resolve a requested path inside the documents directory (or an allowed file)"""
+        candidate = Path(path)
+        if not candidate.is_absolute():
+            candidate = self.docs_dir / candidate
+        candidate = candidate.resolve()
+        if self.docs_dir not in candidate.parents and candidate not in self.allowed:
+            raise ValueError(f"{path} is outside the documents directory {self.docs_dir}")
+        if candidate.suffix.lower() != '.pdf' or not candidate.is_file():
+            raise FileNotFoundError(f"PDF file not found: {candidate}")
+        return candidate
+
+    def get(self, doc_id):
+        return self.sessions.get(doc_id)
+
+    def find(self, ref):
+        """Return an already-registered session matching an id or path, if any"""
+        if ref in self.sessions:
+            return self.sessions[ref]
+        try:
+            resolved = str(self.resolve_path(ref))
+        except (ValueError, FileNotFoundError):
+            return None
+        for session in self.sessions.values():
+            if session.path == resolved:
+                return session
+        return None
+
+    def open(self, ref):
+        """
+        Return the session for an id or path, opening the PDF if needed.
+        Blocking (hashes and opens the file); call off the event loop for new files.
+        """
+        session = self.find(ref)
+        if session is not None:
+            session.open()
+            session.touch()
+            return session
+
+        path = self.resolve_path(ref)
+        doc_hash = content_hash(path)
+        for existing in self.sessions.values():
+            if existing.hash == doc_hash:
+                # Same bytes under another name: share the session
+                existing.open()
+                existing.touch()
+                return existing
+
+        doc_id = path.stem
+        if doc_id in self.sessions:
+            doc_id = f"{path.stem}-{doc_hash[:8]}"
+        session = DocumentSession(doc_id, path, doc_hash)
+        self.sessions[doc_id] = session
+        print(f"PDF Server: Opened '{doc_id}' ({session.total_slides} slides) from {path}")
+        return session
+
+    def activate(self, session):
+        """Make a session the one followed by default viewers and commands"""
+        self.active = session
+        session.touch()
+        return session
+
+    def close_idle(self, keep=()):
+        """Close the fitz handles of sessions unused for idle_timeout seconds"""
+        now = time.monotonic()
+        closed = []
+        for session in self.sessions.values():
+            if session is self.active or session in keep or not session.is_open:
+                continue
+            if now - session.last_used > self.idle_timeout:
+                session.close()
+                closed.append(session.doc_id)
+        if closed:
+            print(f"PDF Server: Closed idle documents: {', '.join(closed)}")
+        return closed
+
+    def describe(self):
+        """Summary of all sessions for status messages"""
+        return {
+            'active': self.active.doc_id if self.active else None,
+            'documents': [s.describe() for s in self.sessions.values()],
+        }
@@ -3,139 +3,379 @@ PDF Presentation Server
 Serves PDF slides and receives control commands from Orchestrator
 """
 
+import argparse
 import asyncio
 import json
-import base64
+import sys
+import time
 import websockets
 from pathlib import Path
-import fitz  # PyMuPDF
-from io import BytesIO
-from PIL import Image
+from slide_cache import SlideCache, RenderedSlide
+from render_pool import RenderPool
+from viewer_profile import ViewerProfile, RenderVariant
+from disk_cache import DiskSlideCache
+from document_registry import DocumentRegistry
+from slide_index import SlideIndex
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.broadcast import Broadcaster
+from common.health import Readiness, is_health_request
+from common.local_channel import serve_locally
 
 # Global state
-CURRENT_SLIDE = 0
-PDF_DOCUMENT = None
-TOTAL_SLIDES = 0
-CONNECTED_CLIENTS = set()
+# Open presentations and the active one, created in main()
+REGISTRY = None
+# Viewers, each with a bounded latest-wins outbox
+CONNECTED_CLIENTS = Broadcaster("PDF Server", send_timeout=5.0)
+# Delivery protocol per viewer: 'json' (base64 in JSON, the default) or 'binary'
+CLIENT_PROTOCOLS = {}
+# Negotiated resolution and format per viewer (ViewerProfile)
+CLIENT_PROFILES = {}
+# Document id a viewer is pinned to; viewers without one follow the active document
+CLIENT_DOCUMENTS = {}
+
+# Rendering configuration
+RENDER_ZOOM = 2.0  # 2x zoom for better quality
+RENDER_FORMAT = "png"
+DEFAULT_VARIANT = RenderVariant(RENDER_ZOOM, RENDER_FORMAT, None)
+CACHE_MAX_BYTES = 256 * 1024 * 1024  # Memory budget for rendered slides
+PREFETCH_NEIGHBOURS = 2  # Pages to pre-render on each side of the current slide
+RENDER_WORKERS = None  # Render processes (None = one per CPU core)
+IDLE_TIMEOUT = 600.0  # Seconds before an unused document's handle is closed
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_PDF_PATH = PROJECT_ROOT / "data" / "try.pdf"
+DEFAULT_CACHE_DIR = PROJECT_ROOT / "data" / "cache" / "slides"
+
+SLIDE_CACHE = SlideCache(max_bytes=CACHE_MAX_BYTES)
+# Persistent renders that survive restarts, configured in main()
+DISK_CACHE = None
+# Worker processes that rasterize pages, created in main()
+RENDER_POOL = None
+# In-flight renders by cache key, so a prefetch and a navigation never render twice
+PENDING_RENDERS = {}
+# Background prefetch per document id
+PREFETCH_TASKS = {}
+# Text indexing per document hash, so each deck is indexed once
+INDEX_TASKS = {}
+# Serializes opening new files so two requests never register the same deck twice
+OPEN_LOCK = None
+# Startup state for health probes; set once the first deck is loaded
+READINESS = Readiness("PDF Server")
+# Set when startup finished (either way); viewers and commands wait for it
+STARTUP_DONE = None
 
 def load_pdf(pdf_path):
-    """Load the PDF document"""
-    global PDF_DOCUMENT, TOTAL_SLIDES
+    """Load a PDF document and make it the active presentation"""
     try:
-        PDF_DOCUMENT = fitz.open(pdf_path)
-        TOTAL_SLIDES = len(PDF_DOCUMENT)
-        print(f"PDF loaded: {pdf_path}")
-        print(f"Total slides: {TOTAL_SLIDES}")
+        session = REGISTRY.activate(REGISTRY.open(pdf_path))
+        print(f"PDF loaded: {session.path}")
+        print(f"Total slides: {session.total_slides}")
         return True
     except Exception as e:
         print(f"Error loading PDF: {e}")
         return False
 
-def get_slide_image(slide_number):
+async def open_document(ref):
     """
-    Render a specific slide as a base64-encoded image
+    Return the session for a document id or path, opening it if needed.
+    Already-open documents are returned immediately without touching the file.
     """
-    global PDF_DOCUMENT
-
-    if PDF_DOCUMENT is None or slide_number < 0 or slide_number >= TOTAL_SLIDES:
+    global OPEN_LOCK
+    session = REGISTRY.find(ref)
+    if session is not None and session.is_open:
+        session.touch()
+        return session
+
+    if OPEN_LOCK is None:
+        OPEN_LOCK = asyncio.Lock()
+    async with OPEN_LOCK:
+        loop = asyncio.get_running_loop()
+        try:
+            # Hashing and parsing a new file stays off the event loop
+            return await loop.run_in_executor(None, REGISTRY.open, ref)
+        except (ValueError, OSError, RuntimeError) as e:
+            print(f"PDF Server: Could not open presentation '{ref}': {e}")
+            return None
+
+def session_for(client):
+    """The document a viewer is watching"""
+    doc_id = CLIENT_DOCUMENTS.get(client)
+    if doc_id is None:
+        return REGISTRY.active
+    return REGISTRY.get(doc_id)
+
+def clients_for(session):
+    """All viewers currently watching a document"""
+    return [c for c in CONNECTED_CLIENTS.clients if session_for(c) is session]
+
+def variant_for(client, session, slide_number):
+    """The render variant a viewer needs for a given page"""
+    profile = CLIENT_PROFILES.get(client)
+    if profile is None:
+        return DEFAULT_VARIANT
+    width, height = session.page_size(slide_number)
+    return profile.variant_for(width, height)
+
+async def get_slide_image(session, slide_number, variant=DEFAULT_VARIANT):
+    """
+    Return a specific slide as a RenderedSlide, from the cache when possible.
+    Viewers asking for the same variant share one cache entry.
+    """
+    if session is None or slide_number < 0 or slide_number >= session.total_slides:
         return None
 
-    try:
-        page = PDF_DOCUMENT[slide_number]
-        # Render page to pixmap (higher resolution)
-        mat = fitz.Matrix(2.0, 2.0)  # 2x zoom for better quality
-        pix = page.get_pixmap(matrix=mat)
-
-        # Convert to PNG bytes
-        img_data = pix.tobytes("png")
-
-        # Convert to base64
-        img_base64 = base64.b64encode(img_data).decode('utf-8')
-
-        return img_base64
-    except Exception as e:
-        print(f"Error rendering slide {slide_number}: {e}")
+    key = SlideCache.make_key(session.hash, slide_number, variant.zoom, variant.cache_format)
+    slide = SLIDE_CACHE.get(key)
+    if slide is not None:
+        return slide
+
+    # Join a render that is already running for this page (e.g. a prefetch)
+    future = PENDING_RENDERS.get(key)
+    if future is None:
+        future = asyncio.ensure_future(load_or_render(session, slide_number, variant))
+        PENDING_RENDERS[key] = future
+        future.add_done_callback(lambda f: _store_render(key, variant, f))
+
+    # Shield so a cancelled prefetch does not throw away a finished render
+    img_data = await asyncio.shield(future)
+    if img_data is None:
         return None
-
-async def broadcast_slide_update():
-    """Send current slide to all connected clients"""
-    if not CONNECTED_CLIENTS:
+    return SLIDE_CACHE.get(key) or RenderedSlide(img_data, mime_type=variant.mime_type)
+
+async def load_or_render(session, slide_number, variant):
+    """Read a page from the disk cache, or render it (and persist it) in a worker"""
+    cache_path = None
+    if DISK_CACHE is not None:
+        loop = asyncio.get_running_loop()
+        img_data = await loop.run_in_executor(None, DISK_CACHE.get, session.hash, slide_number, variant)
+        if img_data is not None:
+            return img_data
+        cache_path = DISK_CACHE.path_for(session.hash, slide_number, variant)
+    return await RENDER_POOL.render(
+        session.path, slide_number, variant.zoom, variant.fmt, variant.quality, cache_path=cache_path
+    )
+
+async def prewarm_deck(session, variants=(DEFAULT_VARIANT,)):
+    """Render every page of a deck into the disk cache ahead of a talk"""
+    if DISK_CACHE is None:
+        print("PDF Server: Disk cache disabled, nothing to pre-warm")
+        return
+    start = time.perf_counter()
+    missing = [
+        (n, v) for v in variants for n in range(session.total_slides)
+        if not DISK_CACHE.contains(session.hash, n, v)
+    ]
+    print(f"PDF Server: Pre-warming {len(missing)} of {session.total_slides * len(variants)} renders...")
+    await asyncio.gather(*(
+        RENDER_POOL.render(session.path, n, v.zoom, v.fmt, v.quality,
+                           cache_path=DISK_CACHE.path_for(session.hash, n, v))
+        for n, v in missing
+    ))
+    print(f"PDF Server: Pre-warm done in {time.perf_counter() - start:.1f}s")
+
+def _store_render(key, variant, future):
+    """Move a finished render from the pending table into the cache"""
+    PENDING_RENDERS.pop(key, None)
+    if future.cancelled() or future.exception() is not None:
+        return
+    img_data = future.result()
+    if img_data is not None:
+        SLIDE_CACHE.put(key, RenderedSlide(img_data, mime_type=variant.mime_type))
+
+async def prefetch_neighbours(session, center, radius):
+    """Pre-render the pages around the current slide in parallel, nearest first"""
+    clients = clients_for(session)
+    renders = []
+    for distance in range(1, radius + 1):
+        for slide_number in (center + distance, center - distance):
+            if 0 <= slide_number < session.total_slides:
+                # One render per distinct variant the connected viewers need
+                variants = {variant_for(c, session, slide_number) for c in clients} or {DEFAULT_VARIANT}
+                renders.extend(get_slide_image(session, slide_number, v) for v in variants)
+    await asyncio.gather(*renders, return_exceptions=True)
+
+def schedule_prefetch(session):
+    """Restart the background prefetch around a document's current slide"""
+    if PREFETCH_NEIGHBOURS <= 0:
+        return
+    task = PREFETCH_TASKS.get(session.doc_id)
+    if task and not task.done():
+        # Renders already submitted still finish and land in the cache
+        task.cancel()
+    PREFETCH_TASKS[session.doc_id] = asyncio.create_task(
+        prefetch_neighbours(session, session.current_slide, PREFETCH_NEIGHBOURS)
+    )
+
+async def broadcast_slide_update(session=None, clients=None):
+    """Send a document's current slide to its viewers (or to the given clients)"""
+    session = session or REGISTRY.active
+    if session is None or not CONNECTED_CLIENTS:
         return
 
-    slide_image = get_slide_image(CURRENT_SLIDE)
-    if slide_image:
-        message = json.dumps({
-            'type': 'slide_update',
-            'slide_number': CURRENT_SLIDE,
-            'total_slides': TOTAL_SLIDES,
-            'image': slide_image
-        })
-
-        # Send to all clients
-        tasks = [client.send(message) for client in CONNECTED_CLIENTS]
-        await asyncio.gather(*tasks, return_exceptions=True)
-
-def next_slide():
-    """Move to next slide"""
-    global CURRENT_SLIDE
-    if CURRENT_SLIDE < TOTAL_SLIDES - 1:
-        CURRENT_SLIDE += 1
-        print(f"PDF Controller: Next slide -> {CURRENT_SLIDE + 1}/{TOTAL_SLIDES}")
-        return True
-    else:
-        print(f"PDF Controller: Already on last slide")
-        return False
+    slide_number = session.current_slide
+    clients = clients_for(session) if clients is None else clients
 
-def previous_slide():
-    """Move to previous slide"""
-    global CURRENT_SLIDE
-    if CURRENT_SLIDE > 0:
-        CURRENT_SLIDE -= 1
-        print(f"PDF Controller: Previous slide -> {CURRENT_SLIDE + 1}/{TOTAL_SLIDES}")
-        return True
-    else:
-        print(f"PDF Controller: Already on first slide")
-        return False
+    # Render each distinct variant once, in parallel
+    groups = {}
+    for client in clients:
+        groups.setdefault(variant_for(client, session, slide_number), []).append(client)
+    variants = list(groups)
+    images = await asyncio.gather(*(get_slide_image(session, slide_number, v) for v in variants))
 
-def go_to_slide(slide_number):
-    """Go to specific slide (0-indexed)"""
-    global CURRENT_SLIDE
-    if 0 <= slide_number < TOTAL_SLIDES:
-        CURRENT_SLIDE = slide_number
-        print(f"PDF Controller: Go to slide -> {CURRENT_SLIDE + 1}/{TOTAL_SLIDES}")
-        return True
-    else:
-        print(f"PDF Controller: Invalid slide number {slide_number}")
-        return False
+    # If the slide moved on while rendering, the newer navigation broadcasts instead
+    if slide_number == session.current_slide:
+        for variant, slide_image in zip(variants, images):
+            if slide_image:
+                publish_slide(session, slide_image, slide_number, groups[variant])
 
-async def handle_viewer_client(websocket):
+    schedule_prefetch(session)
+
+def publish_slide(session, slide_image, slide_number, clients):
+    """
+    Queue a slide for viewers, encoding each protocol's frames only once.
+    Binary viewers get a small JSON metadata frame followed by the raw
+    image as a binary frame; everyone else gets base64 inside JSON.
+    A newer slide replaces any unsent older one in each viewer's outbox.
+    """
+    binary_clients = [c for c in clients if CLIENT_PROTOCOLS.get(c) == 'binary']
+    json_clients = [c for c in clients if CLIENT_PROTOCOLS.get(c) != 'binary']
+
+    metadata = {
+        'type': 'slide_update',
+        'doc_id': session.doc_id,
+        'slide_number': slide_number,
+        'total_slides': session.total_slides,
+        'mime_type': slide_image.mime_type,
+    }
+
+    if json_clients:
+        message = json.dumps(dict(metadata, image=slide_image.base64))
+        CONNECTED_CLIENTS.publish([message], key='slide_update', clients=json_clients)
+
+    if binary_clients:
+        header = json.dumps(dict(
+            metadata,
+            encoding='binary',
+            size=len(slide_image.data),
+        ))
+        CONNECTED_CLIENTS.publish([header, slide_image.data], key='slide_update', clients=binary_clients)
+
+async def switch_presentation(ref):
+    """Make a document (opening it if needed) the active presentation"""
+    session = await open_document(ref)
+    if session is None:
+        return None
+    schedule_indexing(session)
+    previous = REGISTRY.active
+    REGISTRY.activate(session)
+    if previous is not session:
+        print(f"PDF Server: Switched presentation to '{session.doc_id}'")
+    await broadcast_slide_update(session)
+    return session
+
+def index_path_for(session):
+    """Where a deck's text index is persisted, next to its rendered slides"""
+    if DISK_CACHE is None:
+        return None
+    return DISK_CACHE.document_dir(session.hash) / "text_index.json"
+
+async def _build_index(session):
+    """Load a deck's persisted text index, or build (and persist) it in a worker"""
+    start = time.perf_counter()
+    index_path = index_path_for(session)
+    index = None
+    if index_path is not None:
+        loop = asyncio.get_running_loop()
+        index = await loop.run_in_executor(None, SlideIndex.load, index_path, session.hash)
+    if index is None:
+        data = await RENDER_POOL.build_text_index(session.path, session.hash, index_path)
+        if data is None:
+            return None
+        index = SlideIndex.from_dict(data)
+    session.text_index = index
+    print(f"PDF Server: Text index for '{session.doc_id}' ready "
+          f"({len(index.postings)} terms, {(time.perf_counter() - start) * 1000:.0f} ms)")
+    return index
+
+def schedule_indexing(session):
+    """Start indexing a deck's text in the background if not done already"""
+    if session.text_index is None and session.hash not in INDEX_TASKS:
+        INDEX_TASKS[session.hash] = asyncio.create_task(_build_index(session))
+    return INDEX_TASKS.get(session.hash)
+
+async def find_slide(session, query):
+    """Resolve a free-text topic to the best matching page of a deck"""
+    if session.text_index is None:
+        task = schedule_indexing(session)
+        if task is not None:
+            await asyncio.shield(task)
+    if session.text_index is None:
+        return None
+    start = time.perf_counter()
+    results = session.text_index.search(query, limit=3)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if not results:
+        print(f"PDF Server: No slide about '{query}' ({elapsed_ms:.2f} ms)")
+        return None
+    ranked = ', '.join(f"{page + 1} ({score:.2f})" for page, score in results)
+    print(f"PDF Server: Slides about '{query}': {ranked} ({elapsed_ms:.2f} ms)")
+    return results[0][0]
+
+async def close_idle_documents(interval=60.0):
+    """Periodically release the handles of documents nobody is using"""
+    while True:
+        await asyncio.sleep(interval)
+        watched = {session_for(c) for c in CONNECTED_CLIENTS.clients}
+        REGISTRY.close_idle(keep=watched)
+
+async def handle_viewer_client(websocket, doc_id=None):
     """Handle connections from the PDF viewer (browser)"""
     client_address = websocket.remote_address
     print(f"PDF Server: Viewer connected: {client_address}")
+    if doc_id is not None:
+        if REGISTRY.get(doc_id) is None:
+            print(f"PDF Server: Unknown document '{doc_id}'")
+            await websocket.close()
+            return
+        CLIENT_DOCUMENTS[websocket] = doc_id
     CONNECTED_CLIENTS.add(websocket)
 
     try:
         # Send initial slide
-        await broadcast_slide_update()
+        await broadcast_slide_update(session_for(websocket), [websocket])
 
         # Listen for client messages
         async for message in websocket:
             try:
                 data = json.loads(message)
                 command = data.get('command')
-
-                if command == 'next':
-                    if next_slide():
-                        await broadcast_slide_update()
+                session = session_for(websocket)
+
+                if command == 'hello':
+                    # Protocol negotiation; viewers that never say hello stay on JSON
+                    protocol = data.get('protocol', 'json')
+                    CLIENT_PROTOCOLS[websocket] = 'binary' if protocol == 'binary' else 'json'
+                    profile = ViewerProfile.from_hello(data, default_zoom=RENDER_ZOOM, default_format=RENDER_FORMAT)
+                    CLIENT_PROFILES[websocket] = profile
+                    print(f"PDF Server: Viewer {client_address} using {CLIENT_PROTOCOLS[websocket]} protocol, "
+                          f"{profile.fmt} for {profile.width or '?'}x{profile.height or '?'} px")
+                    # Re-send the current slide in the negotiated variant
+                    await broadcast_slide_update(session, [websocket])
+                elif command == 'next':
+                    if session.next_slide():
+                        await broadcast_slide_update(session)
                 elif command == 'previous':
-                    if previous_slide():
-                        await broadcast_slide_update()
+                    if session.previous_slide():
+                        await broadcast_slide_update(session)
                 elif command == 'goto':
                     slide_num = data.get('slide_number', 0)
-                    if go_to_slide(slide_num):
-                        await broadcast_slide_update()
+                    if session.go_to_slide(slide_num):
+                        await broadcast_slide_update(session)
                 elif command == 'refresh':
-                    await broadcast_slide_update()
+                    await broadcast_slide_update(session, [websocket])
+                elif command == 'documents':
+                    # Which decks are open, for picking a room's /viewer/<doc_id>
+                    CONNECTED_CLIENTS.send(websocket, json.dumps(dict(REGISTRY.describe(), type='documents')))
 
             except json.JSONDecodeError:
                 print(f"PDF Server: Invalid JSON from client")
@@ -143,7 +383,10 @@ async def handle_viewer_client(websocket):
     except websockets.exceptions.ConnectionClosed:
         print(f"PDF Server: Viewer disconnected: {client_address}")
     finally:
-        CONNECTED_CLIENTS.discard(websocket)
+        CONNECTED_CLIENTS.remove(websocket)
+        CLIENT_PROTOCOLS.pop(websocket, None)
+        CLIENT_PROFILES.pop(websocket, None)
+        CLIENT_DOCUMENTS.pop(websocket, None)
 
 async def handle_orchestrator_commands(websocket):
     """Handle commands from the Orchestrator"""
@@ -159,20 +402,36 @@ async def handle_orchestrator_commands(websocket):
 
                 print(f"PDF Server: Received command - {action}")
 
+                # Commands apply to the active document unless they name another one
+                session = REGISTRY.get(params['doc_id']) if params.get('doc_id') else REGISTRY.active
+                if session is None and action != 'OPEN_PRESENTATION':
+                    print(f"PDF Server: Unknown document '{params.get('doc_id')}'")
+                    continue
+
                 if action == 'NEXT_SLIDE':
-                    if next_slide():
-                        await broadcast_slide_update()
+                    if session.next_slide():
+                        await broadcast_slide_update(session)
                 elif action == 'PREVIOUS_SLIDE':
-                    if previous_slide():
-                        await broadcast_slide_update()
+                    if session.previous_slide():
+                        await broadcast_slide_update(session)
                 elif action == 'GO_TO_SLIDE':
                     slide_num = params.get('slide_number', 0)
-                    if go_to_slide(slide_num):
-                        await broadcast_slide_update()
+                    if session.go_to_slide(slide_num):
+                        await broadcast_slide_update(session)
+                elif action == 'GO_TO_TOPIC':
+                    # "go to the slide about pricing" -> best matching page
+                    slide_num = await find_slide(session, params.get('query', ''))
+                    if slide_num is not None and session.go_to_slide(slide_num):
+                        await broadcast_slide_update(session)
                 elif action == 'OPEN_PRESENTATION':
-                    # Reload PDF or reset to first slide
-                    go_to_slide(0)
-                    await broadcast_slide_update()
+                    ref = params.get('path') or params.get('doc_id')
+                    if ref:
+                        # Open (or switch back to) another deck without reloading anything
+                        await switch_presentation(ref)
+                    else:
+                        # Reset the active presentation to the first slide
+                        session.go_to_slide(0)
+                        await broadcast_slide_update(session)
 
             except json.JSONDecodeError:
                 print(f"PDF Server: Invalid JSON from orchestrator")
@@ -180,6 +439,21 @@ async def handle_orchestrator_commands(websocket):
     except websockets.exceptions.ConnectionClosed:
         print(f"PDF Server: Orchestrator disconnected: {client_address}")
 
+async def handle_health_client(websocket):
+    """Answer {"type": "health"} probes; works while the deck is still loading"""
+    try:
+        async for message in websocket:
+            try:
+                data = json.loads(message)
+            except json.JSONDecodeError:
+                continue
+            if is_health_request(data):
+                if DISK_CACHE is not None:
+                    READINESS.detail['disk_cache'] = DISK_CACHE.stats()
+                await websocket.send(READINESS.message())
+    except websockets.exceptions.ConnectionClosed:
+        pass
+
 async def route_connection(websocket):
     """Route connections based on path"""
     # In websockets 15.x, use request.path instead
@@ -189,26 +463,97 @@ async def route_connection(websocket):
         # Fallback for older versions
         path = getattr(websocket, 'path', '/')
 
+    path = path.split('?', 1)[0]
+    if path == "/health":
+        await handle_health_client(websocket)
+        return
+
     print(f"PDF Server: Connection received for path: {path}")
+    # The port is open before the deck is loaded: hold the connection until it is
+    await STARTUP_DONE.wait()
+    if not READINESS.is_ready:
+        await websocket.close()
+        return
 
     if path == "/viewer":
         await handle_viewer_client(websocket)
+    elif path.startswith("/viewer/"):
+        # Viewer pinned to one document, e.g. /viewer/try
+        await handle_viewer_client(websocket, doc_id=path[len("/viewer/"):])
     elif path == "/control":
         await handle_orchestrator_commands(websocket)
     else:
         print(f"PDF Server: Unknown path: {path}")
         await websocket.close()
 
-async def main():
+def parse_args(argv=None):
+    """Command line options for the PDF server"""
+    parser = argparse.ArgumentParser(description="PDF Presentation Server")
+    parser.add_argument("--pdf", default=str(DEFAULT_PDF_PATH), help="PDF file to present first")
+    parser.add_argument("--docs-dir", default=None,
+                        help="Directory OPEN_PRESENTATION may open PDFs from (default: the --pdf directory)")
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                        help="Seconds before an unused document is closed")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR),
+                        help="Directory for persistent slide renders")
+    parser.add_argument("--no-disk-cache", action="store_true", help="Do not read or write rendered slides on disk")
+    parser.add_argument("--cache-mb", type=int, default=CACHE_MAX_BYTES // (1024 * 1024),
+                        help="Memory budget for rendered slides in MB")
+    parser.add_argument("--prefetch", type=int, default=PREFETCH_NEIGHBOURS,
+                        help="Pages to pre-render on each side of the current slide")
+    parser.add_argument("--workers", type=int, default=RENDER_WORKERS, help="Render worker processes")
+    parser.add_argument("--prewarm", action="store_true",
+                        help="Render the whole deck into the disk cache before serving")
+    parser.add_argument("--prewarm-only", action="store_true",
+                        help="Render the whole deck into the disk cache and exit")
+    return parser.parse_args(argv)
+
+async def load_first_deck(pdf_path, prewarm=False):
+    """
+    Open the first deck off the event loop (PyMuPDF is imported on first
+    use) and report readiness. Runs while the server is already listening.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        if not await loop.run_in_executor(None, load_pdf, pdf_path):
+            READINESS.mark_failed(f"Failed to load PDF {pdf_path}")
+            return
+        schedule_indexing(REGISTRY.active)
+        if prewarm:
+            await prewarm_deck(REGISTRY.active)
+        READINESS.mark_ready(doc_id=REGISTRY.active.doc_id, total_slides=REGISTRY.active.total_slides)
+        # An Orchestrator running in this same process sends commands without a socket
+        serve_locally("ws://localhost:9002/control", handle_orchestrator_commands)
+    finally:
+        STARTUP_DONE.set()
+
+async def main(args=None):
     """Start the PDF server"""
-    pdf_path = Path(__file__).parent.parent.parent / "data" / "try.pdf"
+    global REGISTRY, RENDER_POOL, DISK_CACHE, PREFETCH_NEIGHBOURS, STARTUP_DONE
+    if args is None:
+        args = parse_args()
+    pdf_path = Path(args.pdf).resolve()
 
     if not pdf_path.exists():
         print(f"ERROR: PDF file not found: {pdf_path}")
         return
 
-    if not load_pdf(pdf_path):
-        print("ERROR: Failed to load PDF")
+    REGISTRY = DocumentRegistry(args.docs_dir or pdf_path.parent, idle_timeout=args.idle_timeout,
+                                allowed=[pdf_path])
+    SLIDE_CACHE.max_bytes = args.cache_mb * 1024 * 1024
+    PREFETCH_NEIGHBOURS = args.prefetch
+    if not args.no_disk_cache:
+        DISK_CACHE = DiskSlideCache(args.cache_dir)
+    # Worker processes are spawned on the first render, not here
+    RENDER_POOL = RenderPool(max_workers=args.workers, preload_paths=[pdf_path])
+
+    if args.prewarm_only:
+        if load_pdf(pdf_path):
+            await prewarm_deck(REGISTRY.active)
+            index_task = schedule_indexing(REGISTRY.active)
+            if index_task is not None:
+                await index_task
+        RENDER_POOL.shutdown()
         return
 
     host = "localhost"
@@ -218,25 +563,35 @@ async def main():
     print("PDF PRESENTATION SERVER - Starting...")
     print("="*60)
     print(f"WebSocket server: ws://{host}:{port}")
-    print(f"Viewer endpoint: ws://{host}:{port}/viewer")
+    print(f"Viewer endpoint: ws://{host}:{port}/viewer (active deck) or /viewer/<doc_id>")
     print(f"Control endpoint: ws://{host}:{port}/control")
-    print(f"PDF loaded: {pdf_path}")
-    print(f"Total slides: {TOTAL_SLIDES}")
+    print(f"Health endpoint: ws://{host}:{port}/health")
+    print(f"PDF: {pdf_path}")
+    print(f"Documents directory: {REGISTRY.docs_dir}")
+    print(f"Slide cache: {args.cache_mb} MB, prefetching +/-{PREFETCH_NEIGHBOURS} pages")
+    print(f"Disk cache: {DISK_CACHE.cache_dir if DISK_CACHE else 'disabled'}")
+    print(f"Render workers: {RENDER_POOL.max_workers} processes")
     print("="*60 + "\n")
 
+    STARTUP_DONE = asyncio.Event()
+    idle_task = asyncio.create_task(close_idle_documents())
     try:
         async with websockets.serve(route_connection, host, port):
-            print("PDF Server: Ready to serve slides...\n")
+            print("PDF Server: Listening; loading the presentation...\n")
+            await load_first_deck(pdf_path, prewarm=args.prewarm)
             await asyncio.Future()  # Run forever
     except OSError as e:
         print(f"PDF Server ERROR: Failed to start server on port {port}")
         print(f"Error: {e}")
     except KeyboardInterrupt:
         print("\nPDF Server: Shutting down...")
+    finally:
+        idle_task.cancel()
+        RENDER_POOL.shutdown()
 
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        asyncio.run(main(parse_args()))
     except KeyboardInterrupt:
         print("\nPDF Server: Stopped by user.")
@@ -0,0 +1,148 @@
+"""
+PDF Render Pool
+Rasterizes PDF pages in worker processes so the event loop never blocks
+"""
+
+import asyncio
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from disk_cache import write_atomic
+
+# Per-worker document handles: path -> (mtime, fitz.Document)
+_WORKER_DOCUMENTS = OrderedDict()
+_WORKER_MAX_DOCUMENTS = 4
+
+
+def _worker_init(preload_paths):
+    """Process initializer: open the known decks up front"""
+    for pdf_path in preload_paths:
+        try:
+            _get_document(pdf_path)
+        except Exception as e:
+            print(f"Render worker {os.getpid()}: Could not preload {pdf_path}: {e}")
+
+
+def _get_document(pdf_path):
+    """Return this worker's handle for pdf_path, reopening it if the file changed"""
+    import fitz  # PyMuPDF, imported in the worker process
+
+    mtime = os.path.getmtime(pdf_path)
+    entry = _WORKER_DOCUMENTS.get(pdf_path)
+    if entry is not None and entry[0] == mtime:
+        _WORKER_DOCUMENTS.move_to_end(pdf_path)
+        return entry[1]
+    if entry is not None:
+        entry[1].close()
+
+    document = fitz.open(pdf_path)
+    _WORKER_DOCUMENTS[pdf_path] = (mtime, document)
+    _WORKER_DOCUMENTS.move_to_end(pdf_path)
+    while len(_WORKER_DOCUMENTS) > _WORKER_MAX_DOCUMENTS:
+        _, (_, oldest) = _WORKER_DOCUMENTS.popitem(last=False)
+        oldest.close()
+    return document
+
+
+def render_page(pdf_path, slide_number, zoom, fmt, quality=None, cache_path=None):
+    """
+    Rasterize one page and return the encoded image bytes.
+    Runs inside a worker process; if cache_path is given the result is
+    also written there, keeping disk I/O off the server process.
+    """
+    import fitz  # PyMuPDF, imported in the worker process
+
+    document = _get_document(pdf_path)
+    if slide_number < 0 or slide_number >= len(document):
+        return None
+    page = document[slide_number]
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+    if fmt == 'png':
+        data = pix.tobytes('png')
+    else:
+        data = _encode_lossy(pix, fmt, quality)
+    if cache_path:
+        try:
+            write_atomic(cache_path, data)
+        except OSError as e:
+            print(f"Render worker {os.getpid()}: Could not write {cache_path}: {e}")
+    return data
+
+
+def _encode_lossy(pix, fmt, quality):
+    """Encode an RGB pixmap as JPEG or WebP with Pillow"""
+    from io import BytesIO
+    from PIL import Image
+
+    image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    buffer = BytesIO()
+    if fmt == 'webp':
+        image.save(buffer, format="WEBP", quality=quality or 80, method=4)
+    else:
+        image.save(buffer, format="JPEG", quality=quality or 80, optimize=True)
+    return buffer.getvalue()
+
+
+def build_text_index(pdf_path, doc_hash, index_path=None):
+    """
+    Extract every page's text and build the deck's search index.
+    Runs inside a worker process; returns the index as a dict.
+    """
+    from slide_index import SlideIndex
+
+    document = _get_document(pdf_path)
+    page_texts = [page.get_text() for page in document]
+    index = SlideIndex.build(doc_hash, page_texts)
+    if index_path:
+        try:
+            index.save(index_path)
+        except OSError as e:
+            print(f"Render worker {os.getpid()}: Could not write {index_path}: {e}")
+    return index.to_dict()
+
+
+class RenderPool:
+    """
+    Pool of worker processes, each holding its own fitz document handles.
+    Renders are exposed to the server as awaitables.
+    """
+
+    def __init__(self, max_workers=None, preload_paths=()):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # Spawn keeps workers clear of the parent's open fitz documents
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_worker_init,
+            initargs=(tuple(str(p) for p in preload_paths),),
+        )
+
+    async def render(self, pdf_path, slide_number, zoom, fmt, quality=None, cache_path=None):
+        """Render a page in a worker and return the image bytes (or None)"""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self._executor, render_page, str(pdf_path), slide_number, zoom, fmt, quality,
+                str(cache_path) if cache_path else None
+            )
+        except Exception as e:
+            print(f"Render pool: Error rendering slide {slide_number} of {pdf_path}: {e}")
+            return None
+
+    async def build_text_index(self, pdf_path, doc_hash, index_path=None):
+        """Build a deck's text index in a worker and return it as a dict (or None)"""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self._executor, build_text_index, str(pdf_path), doc_hash,
+                str(index_path) if index_path else None
+            )
+        except Exception as e:
+            print(f"Render pool: Error indexing {pdf_path}: {e}")
+            return None
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
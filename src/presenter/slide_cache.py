@@ -0,0 +1,112 @@
+"""
+Rendered Slide Cache
+In-memory LRU cache of rasterized slides with a memory budget
+"""
+
+import base64
+from collections import OrderedDict
+
+
+class RenderedSlide:
+    """
+    A rendered slide image as encoded bytes (PNG, JPEG, ...).
+    The base64 form is only computed when a client actually needs it.
+    """
+
+    __slots__ = ('data', 'mime_type', '_base64')
+
+    def __init__(self, data, mime_type='image/png'):
+        self.data = data
+        self.mime_type = mime_type
+        self._base64 = None
+
+    @property
+    def base64(self):
+        """Base64 text of the image, computed once on first access"""
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self.data).decode('utf-8')
+        return self._base64
+
+    @property
+    def size(self):
+        """Approximate memory held by this entry in bytes"""
+        size = len(self.data)
+        if self._base64 is not None:
+            size += len(self._base64)
+        return size
+
+
+class SlideCache:
+    """
+    LRU cache of rendered slides keyed by (document, page, zoom, format).
+    Entries are evicted least-recently-used first once the total size
+    exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # key -> (slide, size accounted for that slide)
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def make_key(document, page, zoom, fmt):
+        """Build the cache key for a rendered page"""
+        return (str(document), int(page), round(float(zoom), 3), fmt.lower())
+
+    def get(self, key):
+        """Return the cached slide for key, or None on a miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        slide, accounted = entry
+        if slide.size != accounted:
+            # The base64 form was materialized since insertion
+            self._entries[key] = (slide, slide.size)
+            self.current_bytes += slide.size - accounted
+            self._evict()
+        return slide
+
+    def put(self, key, slide):
+        """Insert a rendered slide and evict old entries if over budget"""
+        if slide.size > self.max_bytes:
+            # Never let a single huge page flush the whole cache
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.current_bytes -= old[1]
+        self._entries[key] = (slide, slide.size)
+        self.current_bytes += slide.size
+        self._evict()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Return cache counters as a dict"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+        }
+
+    def _evict(self):
+        """Evict least-recently-used entries until within budget"""
+        while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+            self.evictions += 1
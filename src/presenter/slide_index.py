@@ -0,0 +1,115 @@
+"""
+Slide Text Index
+In-memory inverted index over page text with BM25 ranking, for
+"go to the slide about X" navigation
+"""
+
+import json
+import math
+import re
+from collections import Counter, defaultdict
+
+from disk_cache import write_atomic
+
+INDEX_VERSION = 1
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a about an and are as at be by for from go how in is it its of on or our show
+slide slides that the this to us we what with you your
+""".split())
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+
+def normalize(token):
+    """Very light stemming so 'price', 'prices' and 'pricing' share one term"""
+    for suffix in ("ing", "es", "ed", "s"):
+        if len(token) > len(suffix) + 2 and token.endswith(suffix):
+            token = token[:-len(suffix)]
+            break
+    if len(token) > 3 and token.endswith("e"):
+        token = token[:-1]
+    return token
+
+
+def tokenize(text):
+    """Lowercase word tokens with stopwords removed"""
+    return [normalize(t) for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class SlideIndex:
+    """
+    Inverted index of a deck: term -> [(page, term frequency), ...].
+    Titles (the first line of a page) are counted twice so a slide named
+    "Pricing" outranks one that merely mentions pricing.
+    """
+
+    def __init__(self, doc_hash, postings, page_lengths):
+        self.doc_hash = doc_hash
+        self.postings = postings
+        self.page_lengths = page_lengths
+        self.page_count = len(page_lengths)
+        self.avg_length = (sum(page_lengths) / self.page_count) if self.page_count else 0.0
+        self.idf = {
+            term: math.log(1 + (self.page_count - len(pages) + 0.5) / (len(pages) + 0.5))
+            for term, pages in postings.items()
+        }
+
+    @classmethod
+    def build(cls, doc_hash, page_texts):
+        """Build the index from the plain text of each page"""
+        postings = defaultdict(list)
+        page_lengths = []
+        for page_number, text in enumerate(page_texts):
+            lines = [line for line in text.splitlines() if line.strip()]
+            title = lines[0] if lines else ""
+            tokens = tokenize(text) + tokenize(title)
+            page_lengths.append(len(tokens))
+            for term, count in Counter(tokens).items():
+                postings[term].append((page_number, count))
+        return cls(doc_hash, dict(postings), page_lengths)
+
+    def search(self, query, limit=5):
+        """Return up to limit (page, score) pairs, best first"""
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            pages = self.postings.get(term)
+            if not pages:
+                continue
+            idf = self.idf[term]
+            for page_number, tf in pages:
+                length_norm = 1 - B + B * (self.page_lengths[page_number] / (self.avg_length or 1.0))
+                scores[page_number] += idf * tf * (K1 + 1) / (tf + K1 * length_norm)
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+    def to_dict(self):
+        return {
+            'version': INDEX_VERSION,
+            'doc_hash': self.doc_hash,
+            'page_lengths': self.page_lengths,
+            'postings': self.postings,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        postings = {term: [tuple(p) for p in pages] for term, pages in data['postings'].items()}
+        return cls(data['doc_hash'], postings, data['page_lengths'])
+
+    def save(self, path):
+        """Persist the index as JSON"""
+        write_atomic(path, json.dumps(self.to_dict()).encode('utf-8'))
+
+    @classmethod
+    def load(cls, path, doc_hash):
+        """Load a persisted index, or return None if missing, stale or unreadable"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('version') != INDEX_VERSION or data.get('doc_hash') != doc_hash:
+            return None
+        return cls.from_dict(data)
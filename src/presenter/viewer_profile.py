@@ -0,0 +1,106 @@
+"""
+Viewer Render Profiles
+Per-viewer resolution and image format negotiation for the PDF server
+"""
+
+from collections import namedtuple
+
+# Formats the server can encode, in order of preference when the viewer has none
+SUPPORTED_FORMATS = ('webp', 'jpeg', 'png')
+LOSSY_FORMATS = ('webp', 'jpeg')
+MIME_TYPES = {'png': 'image/png', 'jpeg': 'image/jpeg', 'webp': 'image/webp'}
+
+DEFAULT_QUALITY = 80
+# Zoom levels are snapped to this step so similar viewports share cached renders
+ZOOM_STEP = 0.25
+MIN_ZOOM = 0.25
+MAX_ZOOM = 4.0
+
+
+class RenderVariant(namedtuple('RenderVariant', 'zoom fmt quality')):
+    """One concrete way of rendering a page: zoom factor, format and quality"""
+
+    __slots__ = ()
+
+    @property
+    def cache_format(self):
+        """Format component of the cache key, including quality for lossy formats"""
+        if self.fmt in LOSSY_FORMATS:
+            return f"{self.fmt}:{self.quality}"
+        return self.fmt
+
+    @property
+    def mime_type(self):
+        return MIME_TYPES.get(self.fmt, 'application/octet-stream')
+
+
+def snap_zoom(zoom):
+    """Round a zoom factor up to the shared step and clamp it"""
+    steps = max(1, -(-zoom // ZOOM_STEP))  # ceil, so slides are never upscaled
+    return min(MAX_ZOOM, max(MIN_ZOOM, steps * ZOOM_STEP))
+
+
+class ViewerProfile:
+    """
+    What a viewer asked for in its hello message: viewport size in device
+    pixels, acceptable formats and lossy quality. Viewers that send no
+    viewport get the server's fixed default zoom.
+    """
+
+    def __init__(self, width=None, height=None, formats=None, quality=DEFAULT_QUALITY,
+                 default_zoom=2.0, default_format='png'):
+        self.width = width
+        self.height = height
+        self.quality = quality
+        self.default_zoom = default_zoom
+        self.fmt = self._choose_format(formats, default_format)
+
+    @classmethod
+    def from_hello(cls, data, default_zoom=2.0, default_format='png'):
+        """Build a profile from a viewer's hello command"""
+        viewport = data.get('viewport') or {}
+        width = height = None
+        try:
+            ratio = float(viewport.get('device_pixel_ratio', 1.0)) or 1.0
+            if viewport.get('width') and viewport.get('height'):
+                width = int(float(viewport['width']) * ratio)
+                height = int(float(viewport['height']) * ratio)
+        except (TypeError, ValueError):
+            width = height = None
+
+        try:
+            quality = int(data.get('quality', DEFAULT_QUALITY))
+        except (TypeError, ValueError):
+            quality = DEFAULT_QUALITY
+        quality = min(100, max(1, quality))
+
+        return cls(
+            width=width,
+            height=height,
+            formats=data.get('formats'),
+            quality=quality,
+            default_zoom=default_zoom,
+            default_format=default_format,
+        )
+
+    @staticmethod
+    def _choose_format(formats, default_format):
+        """Pick the viewer's most preferred format that the server supports"""
+        if not formats:
+            return default_format
+        for fmt in formats:
+            fmt = str(fmt).lower()
+            if fmt == 'jpg':
+                fmt = 'jpeg'
+            if fmt in SUPPORTED_FORMATS:
+                return fmt
+        return default_format
+
+    def variant_for(self, page_width, page_height):
+        """Return the RenderVariant that fits a page of the given size (in points)"""
+        if self.width and self.height and page_width and page_height:
+            zoom = snap_zoom(min(self.width / page_width, self.height / page_height))
+        else:
+            zoom = self.default_zoom
+        quality = self.quality if self.fmt in LOSSY_FORMATS else None
+        return RenderVariant(zoom, self.fmt, quality)
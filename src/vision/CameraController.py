@@ -1,57 +1,276 @@
 """
-Camera Controller Executive Agent (STUB)
-Receives commands from Orchestrator to control camera operations
+Camera Controller Executive Agent
+Digital pan/tilt/zoom: crops and scales camera frames in software, easing
+smoothly between zoom states, for the Orchestrator's camera actions
 """
 
+import math
+import time
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+MAX_ZOOM = 4.0
+# Zoom factor per level of zoom_in / zoom_out
+ZOOM_STEP = 1.5
+# Zoom used by zoom_on_object when the object's position is unknown
+OBJECT_ZOOM = 2.0
+# Share of the view a located object should fill
+OBJECT_FILL = 0.6
+# Vertical field of view of the full frame, for tilt angles
+VERTICAL_FOV = 45.0
+
+
+class DigitalPTZ:
+    """
+    Software pan/tilt/zoom over a frame stream. The view is a zoom factor
+    and a center in normalized frame coordinates; render() eases the
+    current view toward the target (zoom in log space, so every doubling
+    takes the same time) and writes the visible region, scaled to the
+    output size, into a preallocated buffer.
+
+    Scaling uses cv2.warpAffine when OpenCV is installed, else NumPy:
+    'bilinear' (default) or 'nearest'. All per-frame work reuses buffers
+    sized on the first frame; only a change of input or output size
+    allocates.
+    """
+
+    def __init__(self, output_size=None, interpolation='bilinear', smoothing=0.3, use_cv2=True):
+        self.output_size = output_size  # (width, height); None: same as the input
+        self.interpolation = interpolation
+        self.smoothing = smoothing  # seconds for the view to cover ~63% of the way to the target
+        self.use_cv2 = use_cv2 and cv2 is not None
+        self.zoom = self.target_zoom = 1.0
+        self.center = [0.5, 0.5]
+        self.target_center = [0.5, 0.5]
+        self.last_step = None
+        self.output = None
+        self._input_shape = None
+
+    @property
+    def backend(self):
+        return 'cv2' if self.use_cv2 else f'numpy-{self.interpolation}'
+
+    @property
+    def moving(self):
+        return (abs(math.log(self.zoom / self.target_zoom)) > 1e-3
+                or abs(self.center[0] - self.target_center[0]) > 1e-4
+                or abs(self.center[1] - self.target_center[1]) > 1e-4)
+
+    def set_target(self, zoom=None, center=None):
+        """Move the view toward a zoom factor and/or a normalized (x, y) center"""
+        if zoom is not None:
+            self.target_zoom = min(MAX_ZOOM, max(1.0, float(zoom)))
+        if center is not None:
+            self.target_center = [min(1.0, max(0.0, float(center[0]))), min(1.0, max(0.0, float(center[1])))]
+
+    def step(self, now=None):
+        """Advance the current view toward the target by the time since the last step"""
+        now = time.monotonic() if now is None else now
+        dt = 0.0 if self.last_step is None else now - self.last_step
+        self.last_step = now
+        if self.smoothing <= 0 or not self.moving:
+            # Close enough: snap, so a settled view is exact
+            self.zoom = self.target_zoom
+            self.center = list(self.target_center)
+            return
+        alpha = 1.0 - math.exp(-dt / self.smoothing)
+        self.zoom = math.exp(math.log(self.zoom) + (math.log(self.target_zoom) - math.log(self.zoom)) * alpha)
+        for i in (0, 1):
+            self.center[i] += (self.target_center[i] - self.center[i]) * alpha
+
+    def view_box(self, width, height):
+        """The visible region (x0, y0, w, h) in input pixels, kept inside the frame"""
+        w, h = width / self.zoom, height / self.zoom
+        x0 = min(max(self.center[0] * width - w / 2, 0.0), width - w)
+        y0 = min(max(self.center[1] * height - h / 2, 0.0), height - h)
+        return x0, y0, w, h
+
+    def _allocate(self, shape):
+        in_h, in_w, channels = shape
+        out_w, out_h = self.output_size or (in_w, in_h)
+        self._input_shape = shape
+        self.output = np.empty((out_h, out_w, channels), dtype=np.uint8)
+        # Sample positions in double precision, so pixel boundaries are not missed at 1080p
+        self._out_x = np.arange(out_w, dtype=np.float64) + 0.5
+        self._out_y = np.arange(out_h, dtype=np.float64) + 0.5
+        self._src_x = np.empty(out_w, dtype=np.float64)
+        self._src_y = np.empty(out_h, dtype=np.float64)
+        self._x0 = np.empty(out_w, dtype=np.intp)
+        self._x1 = np.empty(out_w, dtype=np.intp)
+        self._y0 = np.empty(out_h, dtype=np.intp)
+        self._y1 = np.empty(out_h, dtype=np.intp)
+        self._xn = np.empty(out_w, dtype=np.intp)
+        self._yn = np.empty(out_h, dtype=np.intp)
+        self._fx = np.empty((1, out_w, 1), dtype=np.float32)
+        self._fy = np.empty((out_h, 1, 1), dtype=np.float32)
+        self._rows0 = np.empty((out_h, in_w, channels), dtype=np.uint8)
+        self._rows1 = np.empty((out_h, in_w, channels), dtype=np.uint8)
+        # Flat, so the blend of any visible width can be viewed contiguously
+        self._rows_f = np.empty(out_h * in_w * channels, dtype=np.float32)
+        self._rows0_f = np.empty(out_h * in_w * channels, dtype=np.float32)
+        self._cols0 = np.empty((out_h, out_w, channels), dtype=np.float32)
+        self._cols1 = np.empty((out_h, out_w, channels), dtype=np.float32)
+        self._affine = np.zeros((2, 3), dtype=np.float64)
+
+    def _nearest_positions(self, start, length, in_size, out_coords, src, near):
+        """Source pixel containing each output pixel's center along one axis"""
+        np.multiply(out_coords, length / out_coords.shape[0], out=src)
+        np.add(src, start, out=src)
+        np.clip(src, 0, in_size - 1, out=src)
+        np.copyto(near, src, casting='unsafe')  # Truncation: floor, as positions are not negative
+
+    def _sample_positions(self, start, length, in_size, out_coords, src, lo, hi, frac):
+        """Source positions of output pixels along one axis: indices lo/hi and weight frac"""
+        np.multiply(out_coords, length / out_coords.shape[0], out=src)
+        np.add(src, start - 0.5, out=src)
+        np.clip(src, 0, in_size - 1, out=src)
+        np.copyto(lo, src, casting='unsafe')
+        np.add(lo, 1, out=hi)
+        np.minimum(hi, in_size - 1, out=hi)
+        np.subtract(src, lo, out=frac.reshape(-1))
+
+    def render(self, frame, now=None):
+        """
+        Return the current view of an (H, W, 3) uint8 frame. The result is
+        the controller's output buffer, overwritten by the next call.
+        """
+        if frame.shape != self._input_shape:
+            self._allocate(frame.shape)
+        self.step(now)
+        in_h, in_w, channels = frame.shape
+        out = self.output
+        out_h, out_w = out.shape[:2]
+        x0, y0, w, h = self.view_box(in_w, in_h)
+
+        if self.zoom == 1.0 and (out_w, out_h) == (in_w, in_h):
+            np.copyto(out, frame)
+            return out
+
+        if self.use_cv2:
+            # Maps the view box onto the output, with subpixel precision
+            # (OpenCV puts pixel centers at integer coordinates)
+            affine = self._affine
+            affine[0, 0] = out_w / w
+            affine[1, 1] = out_h / h
+            affine[0, 2] = (0.5 - x0) * out_w / w - 0.5
+            affine[1, 2] = (0.5 - y0) * out_h / h - 0.5
+            cv2.warpAffine(frame, affine, (out_w, out_h), dst=out,
+                           flags=cv2.INTER_NEAREST if self.interpolation == 'nearest' else cv2.INTER_LINEAR,
+                           borderMode=cv2.BORDER_REPLICATE)
+            return out
+
+        if self.interpolation == 'nearest':
+            self._nearest_positions(x0, w, in_w, self._out_x, self._src_x, self._xn)
+            self._nearest_positions(y0, h, in_h, self._out_y, self._src_y, self._yn)
+            np.take(frame, self._yn, axis=0, out=self._rows0, mode='clip')
+            np.take(self._rows0, self._xn, axis=1, out=out, mode='clip')
+            return out
+
+        self._sample_positions(x0, w, in_w, self._out_x, self._src_x, self._x0, self._x1, self._fx)
+        self._sample_positions(y0, h, in_h, self._out_y, self._src_y, self._y0, self._y1, self._fy)
+        # Whole rows are gathered (a contiguous copy); only the visible
+        # columns take part in the blends
+        first, last = int(self._x0[0]), int(self._x1[-1]) + 1
+        np.take(frame, self._y0, axis=0, out=self._rows0, mode='clip')
+        np.take(frame, self._y1, axis=0, out=self._rows1, mode='clip')
+        np.subtract(self._x0, first, out=self._x0)
+        np.subtract(self._x1, first, out=self._x1)
+        rows0 = self._rows0[:, first:last]
+        rows1 = self._rows1[:, first:last]
+        size = out_h * (last - first) * channels
+        rows_f = self._rows_f[:size].reshape(out_h, last - first, channels)
+        rows0_f = self._rows0_f[:size].reshape(out_h, last - first, channels)
+        # Vertical blend: rows0 + (rows1 - rows0) * fy, in float32 throughout
+        # (mixed uint8/float32 operands would be cast through temporaries)
+        np.copyto(rows0_f, rows0)
+        np.copyto(rows_f, rows1)
+        np.subtract(rows_f, rows0_f, out=rows_f)
+        np.multiply(rows_f, self._fy, out=rows_f)
+        np.add(rows_f, rows0_f, out=rows_f)
+        # Horizontal blend of the two neighbouring columns
+        np.take(rows_f, self._x0, axis=1, out=self._cols0, mode='clip')
+        np.take(rows_f, self._x1, axis=1, out=self._cols1, mode='clip')
+        np.subtract(self._cols1, self._cols0, out=self._cols1)
+        np.multiply(self._cols1, self._fx, out=self._cols1)
+        np.add(self._cols1, self._cols0, out=self._cols1)
+        np.add(self._cols1, 0.5, out=self._cols1)
+        np.copyto(out, self._cols1, casting='unsafe')
+        return out
+
 
 class CameraController:
     """
     Executive agent responsible for controlling camera operations.
-    This is a stub implementation for the PoC.
+    The camera is controlled digitally: commands set the target view of
+    a DigitalPTZ, which the frame stream is rendered through.
     """
 
-    def __init__(self):
-        print("CameraController: Initialized")
+    def __init__(self, ptz=None):
+        self.ptz = ptz or DigitalPTZ()
+        print(f"CameraController: Initialized (digital PTZ, {self.ptz.backend})")
+
+    def render(self, frame, now=None):
+        """The current view of a camera frame"""
+        return self.ptz.render(frame, now)
 
-    def zoom_on_object(self, target):
-        """Zoom camera on a specific detected object"""
-        print(f"CameraController: ZOOM_ON_OBJECT - Zooming on target: {target}")
-        # Future: Implement actual camera zoom logic
-        # e.g., using camera API to adjust zoom level and focus on object coordinates
+    def zoom_on_object(self, target, box=None):
+        """
+        Zoom camera on a specific detected object. box is its normalized
+        [x0, y0, x1, y1] when known; otherwise the view zooms in on its
+        current center.
+        """
+        if box is not None:
+            x0, y0, x1, y1 = (float(v) for v in box)
+            size = max(x1 - x0, y1 - y0, 1e-3)
+            self.ptz.set_target(zoom=OBJECT_FILL / size, center=((x0 + x1) / 2, (y0 + y1) / 2))
+        else:
+            self.ptz.set_target(zoom=max(self.ptz.target_zoom, OBJECT_ZOOM))
+        print(f"CameraController: ZOOM_ON_OBJECT - Zooming on target: {target} "
+              f"(zoom {self.ptz.target_zoom:.2f})")
 
     def zoom_in(self, level=1):
         """Zoom in the camera"""
-        print(f"CameraController: ZOOM_IN - Zooming in by level: {level}")
-        # Future: Send zoom command to camera
+        self.ptz.set_target(zoom=self.ptz.target_zoom * ZOOM_STEP ** level)
+        print(f"CameraController: ZOOM_IN - Zooming in by level: {level} (zoom {self.ptz.target_zoom:.2f})")
 
     def zoom_out(self, level=1):
         """Zoom out the camera"""
-        print(f"CameraController: ZOOM_OUT - Zooming out by level: {level}")
-        # Future: Send zoom command to camera
+        self.ptz.set_target(zoom=self.ptz.target_zoom / ZOOM_STEP ** level)
+        print(f"CameraController: ZOOM_OUT - Zooming out by level: {level} (zoom {self.ptz.target_zoom:.2f})")
 
     def reset_zoom(self):
         """Reset camera zoom to default"""
+        self.ptz.set_target(zoom=1.0, center=(0.5, 0.5))
         print("CameraController: RESET_ZOOM - Resetting zoom to default")
-        # Future: Reset camera zoom level
 
     def pan_to(self, x, y):
-        """Pan camera to specific coordinates"""
+        """Pan camera to normalized frame coordinates (0..1, 0..1)"""
+        self.ptz.set_target(center=(x, y))
         print(f"CameraController: PAN_TO - Panning to coordinates: ({x}, {y})")
-        # Future: Send pan command to camera with target coordinates
 
     def tilt(self, angle):
-        """Tilt camera to specific angle"""
+        """Tilt camera to an angle in degrees (positive is up), within the frame's field of view"""
+        self.ptz.set_target(center=(self.ptz.target_center[0], 0.5 - float(angle) / VERTICAL_FOV))
         print(f"CameraController: TILT - Tilting camera to angle: {angle}")
-        # Future: Send tilt command to camera
 
 
 if __name__ == "__main__":
-    # Test the stub
+    # Zoom a test pattern and report where the view ends up
     controller = CameraController()
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    frame[::40] = 255
     controller.zoom_on_object("person")
     controller.zoom_in(2)
     controller.zoom_out(1)
+    controller.pan_to(0.3, 0.4)
+    controller.tilt(5)
+    for t in range(30):
+        controller.render(frame, now=t / 30)
+    print(f"View after 1 s: zoom {controller.ptz.zoom:.2f}, center "
+          f"({controller.ptz.center[0]:.2f}, {controller.ptz.center[1]:.2f})")
     controller.reset_zoom()
-    controller.pan_to(100, 150)
-    controller.tilt(30)
-
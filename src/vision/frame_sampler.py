@@ -0,0 +1,143 @@
+"""
+Frame Sampler
+Change detection for camera frames, so only frames that differ from the
+last analysed one are downscaled and sent to the vision model
+"""
+
+import io
+import time
+
+import numpy as np
+
+
+def block_mean(gray, rows, cols):
+    """Downscale a 2-D array to rows x cols by averaging the pixels of each block"""
+    height, width = gray.shape
+    row_edges = np.linspace(0, height, rows + 1).astype(np.intp)[:-1]
+    col_edges = np.linspace(0, width, cols + 1).astype(np.intp)[:-1]
+    sums = np.add.reduceat(np.add.reduceat(gray, row_edges, axis=0), col_edges, axis=1)
+    counts = np.outer(np.diff(np.append(row_edges, height)), np.diff(np.append(col_edges, width)))
+    return sums / counts
+
+
+def dhash(gray, hash_size=8):
+    """
+    Difference hash: 1 bit per horizontal brightness gradient of a
+    hash_size x (hash_size + 1) thumbnail. Robust to scaling, JPEG noise
+    and global exposure changes.
+    """
+    small = block_mean(gray, hash_size, hash_size + 1)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming(a, b):
+    """Number of differing bits between two hashes"""
+    return bin(a ^ b).count('1')
+
+
+class SampledFrame:
+    """A frame that passed change detection, downscaled and encoded for the model"""
+
+    __slots__ = ('jpeg', 'width', 'height', 'hash', 'distance', 'difference')
+
+    def __init__(self, jpeg, width, height, frame_hash, distance, difference):
+        self.jpeg = jpeg
+        self.width = width
+        self.height = height
+        self.hash = frame_hash
+        self.distance = distance
+        self.difference = difference
+
+
+class FrameSampler:
+    """
+    Compares each incoming frame with the last accepted one. A frame is
+    accepted when its dHash differs in more than hash_threshold bits, or
+    when more than diff_threshold of the cells of its 32x32 thumbnail
+    changed brightness by over cell_delta (0..1) - the thumbnail catches
+    small objects that barely move the hash, while averaging away sensor
+    noise. Comparing against the last accepted frame rather than
+    the previous one means slow drift still adds up to a change.
+
+    Frames are decoded with JPEG draft mode straight to about input_size,
+    so full-resolution pixels are never materialised.
+    """
+
+    def __init__(self, input_size=448, hash_threshold=6, diff_threshold=0.02, cell_delta=0.08,
+                 jpeg_quality=85):
+        self.input_size = input_size
+        self.hash_threshold = hash_threshold
+        self.diff_threshold = diff_threshold
+        self.cell_delta = cell_delta
+        self.jpeg_quality = jpeg_quality
+
+        self.reference_hash = None
+        self.reference_thumb = None
+        self.frames = 0
+        self.accepted = 0
+        self.skipped = 0
+        self.sample_seconds = 0.0
+
+    def reset(self):
+        """Forget the reference frame, so the next frame is always accepted"""
+        self.reference_hash = None
+        self.reference_thumb = None
+
+    def _decode(self, data):
+        from PIL import Image
+
+        image = Image.open(io.BytesIO(data))
+        # JPEG decoders can scale by 1/2, 1/4 or 1/8 while decoding
+        image.draft('RGB', (self.input_size, self.input_size))
+        image = image.convert('RGB')
+        if max(image.size) > self.input_size:
+            image.thumbnail((self.input_size, self.input_size), Image.BILINEAR)
+        return image
+
+    def sample(self, data, force=False):
+        """
+        Return a SampledFrame for encoded image bytes when the scene changed
+        (or force is set), else None. Raises ValueError for undecodable data.
+        """
+        start = time.perf_counter()
+        self.frames += 1
+        try:
+            image = self._decode(data)
+        except Exception as e:
+            raise ValueError(f"Cannot decode frame: {e}") from e
+        if min(image.size) < 32:
+            raise ValueError(f"Frame too small: {image.width}x{image.height}")
+
+        # ITU-R 601 luma, computed on the already downscaled frame
+        rgb = np.asarray(image, dtype=np.float32)
+        gray = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+        frame_hash = dhash(gray)
+        thumb = block_mean(gray, 32, 32)
+
+        distance = difference = None
+        if self.reference_hash is not None:
+            distance = hamming(frame_hash, self.reference_hash)
+            changed = np.abs(thumb - self.reference_thumb) > self.cell_delta * 255.0
+            difference = float(changed.mean())
+            if not force and distance <= self.hash_threshold and difference <= self.diff_threshold:
+                self.skipped += 1
+                self.sample_seconds += time.perf_counter() - start
+                return None
+
+        self.reference_hash = frame_hash
+        self.reference_thumb = thumb
+        self.accepted += 1
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=self.jpeg_quality)
+        self.sample_seconds += time.perf_counter() - start
+        return SampledFrame(buffer.getvalue(), image.width, image.height, frame_hash, distance, difference)
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'accepted': self.accepted,
+            'skipped': self.skipped,
+            'skip_rate': round(self.skipped / self.frames, 3) if self.frames else 0.0,
+            'avg_sample_ms': round(1000 * self.sample_seconds / self.frames, 2) if self.frames else 0.0,
+        }
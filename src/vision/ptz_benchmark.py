@@ -0,0 +1,95 @@
+"""
+Digital PTZ Benchmark
+Renders a zoom-and-pan animation over synthetic frames and reports frames
+per second and per-frame memory allocation for each scaling backend
+
+Usage:
+    python ptz_benchmark.py
+    python ptz_benchmark.py --sizes 1280x720 1920x1080 --frames 300 --json
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+
+from CameraController import DigitalPTZ, cv2
+
+SIZES = {'720p': (1280, 720), '1080p': (1920, 1080)}
+
+
+def parse_size(text):
+    if text in SIZES:
+        return SIZES[text]
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def test_frame(width, height):
+    """A frame with detail everywhere, so no backend gets an easy case"""
+    y, x = np.mgrid[0:height, 0:width]
+    return np.stack([(x * 7) % 256, (y * 5) % 256, ((x + y) * 3) % 256], axis=-1).astype(np.uint8)
+
+
+def run_backend(frame, interpolation, use_cv2, frames):
+    """Frames per second and traced bytes allocated per frame for one backend"""
+    ptz = DigitalPTZ(interpolation=interpolation, use_cv2=use_cv2, smoothing=0.5)
+    ptz.render(frame, now=0.0)  # sizes the buffers
+    # Zoom in while panning, then back out, at 30 fps view time
+    targets = [(3.0, (0.35, 0.45)), (1.5, (0.65, 0.55))]
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(frames):
+        if i % 30 == 0:
+            zoom, center = targets[(i // 30) % len(targets)]
+            ptz.set_target(zoom=zoom, center=center)
+        ptz.render(frame, now=(i + 1) / 30)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'backend': ptz.backend,
+        'fps': round(frames / elapsed, 1),
+        'ms_per_frame': round(1000 * elapsed / frames, 2),
+        'peak_alloc_bytes': peak,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Digital PTZ frames per second on CPU")
+    parser.add_argument("--sizes", nargs="+", default=['720p', '1080p'],
+                        help="Frame sizes: 720p, 1080p or WIDTHxHEIGHT")
+    parser.add_argument("--frames", type=int, default=150, help="Frames rendered per backend and size")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    return parser.parse_args(argv)
+
+
+def main(args=None):
+    if args is None:
+        args = parse_args()
+    backends = [('nearest', False), ('bilinear', False)]
+    if cv2 is not None:
+        backends += [('nearest', True), ('bilinear', True)]
+    else:
+        print("OpenCV is not installed; benchmarking the NumPy backends only")
+
+    results = []
+    for size in args.sizes:
+        width, height = parse_size(size)
+        frame = test_frame(width, height)
+        for interpolation, use_cv2 in backends:
+            result = run_backend(frame, interpolation, use_cv2, args.frames)
+            result.update(size=f"{width}x{height}", interpolation=interpolation)
+            results.append(result)
+            if not args.json:
+                print(f"{width}x{height:<6} {result['backend']:<16} {interpolation:<9} "
+                      f"{result['fps']:8.1f} fps  {result['ms_per_frame']:7.2f} ms/frame  "
+                      f"peak allocation {result['peak_alloc_bytes'] / 1024:.1f} KiB")
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main(parse_args())
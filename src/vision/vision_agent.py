@@ -0,0 +1,512 @@
+"""
+Vision Perception Agent
+Receives camera frames from the web UI, skips frames where nothing
+changed, and asks the VLM about the rest. Descriptions go back to the
+sending client; the Orchestrator gets 'vision_vlm' events when a label
+enters or leaves the scene. Viewers on /ptz watch the camera through its
+digital pan/tilt/zoom.
+"""
+
+import argparse
+import asyncio
+import base64
+import binascii
+import io
+import json
+import sys
+import time
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import websockets
+
+from CameraController import CameraController, DigitalPTZ
+from frame_sampler import FrameSampler
+from vlm_backends import DEFAULT_MODEL, VLMError, make_backend
+from vlm_client import VLMClient
+from vision_events import LabelTracker, parse_labels
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.broadcast import Broadcaster
+from common.health import Readiness, is_health_request
+from common.local_channel import open_connection, serve_locally
+
+# Connected camera clients, each with its own bounded outbox
+CONNECTED_CLIENTS = Broadcaster("Vision Agent")
+# Viewers of the digital PTZ streams (path /ptz); a slow viewer only ever gets the newest frame
+VIEWERS = Broadcaster("PTZ Viewers")
+# WebSocket connection to Orchestrator
+ORCHESTRATOR_CONNECTION = None
+# Command line options and the cached VLM client, set in main
+ARGS = None
+VLM_CLIENT = None
+# Camera name -> its FrameSampler and the last description
+CAMERAS = {}
+# Labels to track: --labels, else the Orchestrator's vision triggers (None: every content word)
+VOCABULARY = None
+# Startup state for health probes
+READINESS = Readiness("Vision Agent")
+
+
+class FrameMailbox:
+    """
+    One-slot, latest-wins queue with a single worker: handler(*item) runs
+    for one item at a time, and an item that arrives while another is
+    waiting replaces it. A slow handler therefore never builds a backlog,
+    and the next run always sees the newest frame.
+    """
+
+    def __init__(self, name, handler):
+        self.name = name
+        self.handler = handler
+        self.pending = None  # (item, arrival time)
+        self.worker = None
+        self.dropped = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def put(self, *item):
+        """Queue an item, replacing one that is still waiting"""
+        if self.pending is not None:
+            self.dropped += 1
+        self.pending = (item, time.perf_counter())
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self._drain())
+
+    async def _drain(self):
+        while self.pending is not None:
+            item, arrived = self.pending
+            self.pending = None
+            wait = time.perf_counter() - arrived
+            self.waits += 1
+            self.wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+            try:
+                await self.handler(*item)
+            except Exception as e:
+                print(f"Vision Agent: Error in {self.name}: {e}")
+
+    def stats(self):
+        return {
+            'dropped': self.dropped,
+            'avg_queue_wait_ms': round(1000 * self.wait_seconds / self.waits, 1) if self.waits else 0.0,
+            'max_queue_wait_ms': round(1000 * self.max_wait_seconds, 1),
+        }
+
+
+class CameraState:
+    """
+    Change detection, the latest description, the digital PTZ view and
+    the frame mailboxes of one camera. At most one frame per camera is
+    analysed, and one rendered for viewers, at a time.
+    """
+
+    def __init__(self, name, args):
+        self.name = name
+        self.sampler = FrameSampler(input_size=args.input_size, hash_threshold=args.hash_threshold,
+                                    diff_threshold=args.diff_threshold)
+        self.tracker = LabelTracker(window=args.event_window, enter_ratio=args.enter_ratio,
+                                    leave_ratio=args.leave_ratio)
+        self.controller = CameraController(DigitalPTZ(output_size=args.ptz_size,
+                                                      interpolation=args.ptz_interpolation))
+        self.instruction = None
+        self.content = None
+        self.labels = set()
+        self.vlm_calls = 0
+        self.vlm_errors = 0
+        self.vlm_seconds = 0.0
+        self.analysis = FrameMailbox(f"analysis of camera '{name}'", self._analyse)
+        self.view = FrameMailbox(f"PTZ view of camera '{name}'", self._render)
+        # PTZ stream viewers of this camera
+        self.viewers = set()
+        self.rendered = 0
+        self.render_seconds = 0.0
+
+    def submit(self, websocket, data, instruction):
+        """Queue a frame for analysis and, while anyone watches, for the PTZ view"""
+        self.analysis.put(websocket, data, instruction)
+        if self.viewers:
+            self.view.put(data)
+
+    async def _analyse(self, websocket, data, instruction):
+        reply = await analyse_frame(self, data, instruction)
+        CONNECTED_CLIENTS.send(websocket, json.dumps(reply))
+
+    async def _render(self, data):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        jpeg = await loop.run_in_executor(None, render_view, self.controller, data, ARGS.ptz_quality)
+        self.rendered += 1
+        self.render_seconds += time.perf_counter() - start
+        VIEWERS.publish(jpeg, key='frame', clients=self.viewers)
+
+    def stats(self):
+        stats = self.sampler.stats()
+        stats.update(camera=self.name, present=sorted(self.tracker.present), events=self.tracker.events,
+                     vlm_calls=self.vlm_calls, vlm_errors=self.vlm_errors,
+                     avg_vlm_ms=round(1000 * self.vlm_seconds / self.vlm_calls, 1) if self.vlm_calls else 0.0)
+        stats.update(self.analysis.stats())
+        ptz = self.controller.ptz
+        stats.update(viewers=len(self.viewers), ptz_zoom=round(ptz.zoom, 2), ptz_frames=self.rendered,
+                     ptz_dropped=self.view.dropped,
+                     avg_ptz_ms=round(1000 * self.render_seconds / self.rendered, 1) if self.rendered else 0.0)
+        return stats
+
+
+def render_view(controller, data, quality):
+    """Decode a frame, render it through the camera's PTZ view and encode it as JPEG"""
+    from PIL import Image
+
+    frame = np.asarray(Image.open(io.BytesIO(data)).convert('RGB'))
+    view = controller.render(frame)
+    buffer = io.BytesIO()
+    Image.fromarray(view).save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def get_camera(name):
+    camera = CAMERAS.get(name)
+    if camera is None:
+        camera = CAMERAS[name] = CameraState(name, ARGS)
+    return camera
+
+
+def stats_message():
+    return {'type': 'stats', 'vlm': VLM_CLIENT.stats(),
+            'cameras': [camera.stats() for camera in CAMERAS.values()]}
+
+
+def decode_image(image):
+    """Bytes of a base64 image, with or without a data: URL prefix"""
+    if image.startswith('data:'):
+        image = image.split(',', 1)[-1]
+    try:
+        return base64.b64decode(image, validate=True)
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid base64 image: {e}") from e
+
+
+async def send_to_orchestrator(message: str):
+    """
+    Send a message to the Orchestrator agent.
+    """
+    global ORCHESTRATOR_CONNECTION
+
+    if ORCHESTRATOR_CONNECTION:
+        try:
+            await ORCHESTRATOR_CONNECTION.send(message)
+        except Exception as e:
+            print(f"Error sending to orchestrator: {e}")
+            ORCHESTRATOR_CONNECTION = None
+
+
+async def connect_to_orchestrator(uri):
+    """
+    Establish connection to the Orchestrator agent.
+    """
+    global ORCHESTRATOR_CONNECTION
+
+    try:
+        ORCHESTRATOR_CONNECTION = await open_connection(uri)
+        print(f"Connected to Orchestrator at {uri}")
+        if not ARGS.labels:
+            # Track the labels the vision rules trigger on; updates follow whenever the rules reload
+            await ORCHESTRATOR_CONNECTION.send(json.dumps(
+                {"type": "admin", "command": "get_grammar", "source": "vision_vlm"}))
+            asyncio.create_task(listen_to_orchestrator(ORCHESTRATOR_CONNECTION))
+    except Exception as e:
+        print(f"Could not connect to Orchestrator at {uri}: {e}")
+        print("Vision agent will continue without orchestrator integration.")
+        ORCHESTRATOR_CONNECTION = None
+
+
+async def listen_to_orchestrator(connection):
+    """
+    Read messages pushed by the Orchestrator; grammar messages carry the
+    trigger words of the vision rules, which become the tracked labels.
+    """
+    global VOCABULARY
+    try:
+        async for message in connection:
+            try:
+                data = json.loads(message)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(data, dict) and data.get('type') == 'grammar' and data.get('source') == 'vision_vlm':
+                VOCABULARY = data.get('phrases', [])
+                print(f"Received vision labels from Orchestrator: {', '.join(VOCABULARY) or '(none)'}")
+    except websockets.exceptions.ConnectionClosed:
+        print("Orchestrator connection closed; keeping the last vision labels")
+
+
+async def publish_events(camera, labels):
+    """
+    Add one observation to the camera's label tracker and send the
+    resulting enter/leave events to the Orchestrator
+    """
+    events = camera.tracker.update(labels)
+    for event, label, presence in events:
+        print(f"Vision Agent: {camera.name}: '{label}' {event}s the scene (presence {presence:.0%})")
+        await send_to_orchestrator(json.dumps({
+            'source': 'vision_vlm',
+            'event': event,
+            'label': label,
+            'content': label,
+            'presence': round(presence, 2),
+            'camera': camera.name,
+            'description': camera.content,
+        }))
+    return [{'event': event, 'label': label} for event, label, _ in events]
+
+
+async def analyse_frame(camera, data, instruction):
+    """
+    Run one frame through change detection and, if it changed, the VLM.
+    Returns the reply for the sending client.
+    """
+    # A new instruction asks a new question about the same scene
+    force = instruction != camera.instruction
+    loop = asyncio.get_running_loop()
+    try:
+        frame = await loop.run_in_executor(None, camera.sampler.sample, data, force)
+    except ValueError as e:
+        return {'type': 'vision', 'camera': camera.name, 'error': str(e)}
+    if frame is None:
+        # Nothing changed, so the last labels are observed again
+        events = await publish_events(camera, camera.labels)
+        return {'type': 'vision', 'camera': camera.name, 'changed': False, 'content': camera.content,
+                'labels': sorted(camera.labels), 'events': events}
+
+    start = time.perf_counter()
+    try:
+        content, cached = await VLM_CLIENT.describe(instruction, frame)
+    except VLMError as e:
+        camera.vlm_errors += 1
+        # Analyse the next frame again rather than comparing against this one
+        camera.sampler.reset()
+        print(f"Vision Agent: {e}")
+        return {'type': 'vision', 'camera': camera.name, 'error': str(e)}
+    elapsed = time.perf_counter() - start
+    if not cached:
+        camera.vlm_calls += 1
+        camera.vlm_seconds += elapsed
+    camera.instruction = instruction
+    camera.content = content
+    camera.labels = parse_labels(content, VOCABULARY)
+
+    if ARGS.raw_descriptions:
+        await send_to_orchestrator(json.dumps({
+            'source': 'vision_vlm',
+            'content': content,
+            'camera': camera.name,
+        }))
+    events = await publish_events(camera, camera.labels)
+    return {
+        'type': 'vision',
+        'camera': camera.name,
+        'changed': True,
+        'cached': cached,
+        'content': content,
+        'labels': sorted(camera.labels),
+        'events': events,
+        'distance': frame.distance,
+        'size': [frame.width, frame.height],
+        'vlm_ms': round(elapsed * 1000, 1),
+    }
+
+
+# PTZ commands clients may send, by method name; the Orchestrator's action names map onto them
+PTZ_COMMANDS = ('zoom_on_object', 'zoom_in', 'zoom_out', 'reset_zoom', 'pan_to', 'tilt')
+
+
+def handle_ptz_command(request):
+    """
+    Apply {"type": "ptz", "command": "zoom_in", "params": {...}, "camera": ...}
+    to that camera's controller; returns the reply
+    """
+    command = str(request.get('command') or '').lower()
+    camera = get_camera(str(request.get('camera') or 'default'))
+    params = request.get('params') or {}
+    if command not in PTZ_COMMANDS or not isinstance(params, dict):
+        return {'type': 'ptz_result', 'ok': False, 'error': f"Unknown PTZ command: {command}"}
+    try:
+        getattr(camera.controller, command)(**params)
+    except (TypeError, ValueError) as e:
+        return {'type': 'ptz_result', 'ok': False, 'command': command, 'error': str(e)}
+    ptz = camera.controller.ptz
+    return {'type': 'ptz_result', 'ok': True, 'command': command, 'camera': camera.name,
+            'zoom': round(ptz.target_zoom, 3), 'center': [round(c, 3) for c in ptz.target_center]}
+
+
+async def viewer_handler(websocket, path):
+    """
+    Stream a camera's PTZ view to a viewer (path /ptz?camera=<name>) as
+    binary JPEG frames. Viewers may send PTZ commands for that camera.
+    """
+    query = parse_qs(urlparse(path).query)
+    camera = get_camera(query.get('camera', ['default'])[0])
+    print(f"New PTZ viewer for camera '{camera.name}': {websocket.remote_address}")
+    VIEWERS.add(websocket)
+    camera.viewers.add(websocket)
+    try:
+        async for message in websocket:
+            try:
+                request = json.loads(message)
+            except (TypeError, json.JSONDecodeError):
+                continue
+            if is_health_request(request):
+                VIEWERS.send(websocket, READINESS.message())
+            elif isinstance(request, dict) and request.get('type') == 'ptz':
+                VIEWERS.send(websocket, json.dumps(handle_ptz_command(dict(request, camera=camera.name))))
+    except websockets.exceptions.ConnectionClosed:
+        pass
+    finally:
+        camera.viewers.discard(websocket)
+        VIEWERS.remove(websocket)
+        print(f"PTZ viewer disconnected: {websocket.remote_address}")
+
+
+async def connection_handler(websocket):
+    """
+    Handle a camera client. Frames arrive as JSON
+    {"type": "frame", "image": <base64 or data URL>, "instruction": ..., "camera": ...}
+    or as binary JPEG, which reuses the connection's last instruction.
+    Frames are handed to the camera's worker, so reading never waits for the VLM.
+    """
+    path = getattr(websocket, 'path', '/')
+    if urlparse(path).path == '/ptz':
+        await viewer_handler(websocket, path)
+        return
+    print(f"New client connected: {websocket.remote_address}")
+    CONNECTED_CLIENTS.add(websocket)
+    camera_name = 'default'
+    instruction = ARGS.instruction
+    try:
+        async for message in websocket:
+            if isinstance(message, bytes):
+                data = message
+            else:
+                try:
+                    request = json.loads(message)
+                except json.JSONDecodeError:
+                    continue
+                if is_health_request(request):
+                    CONNECTED_CLIENTS.send(websocket, READINESS.message())
+                    continue
+                if not isinstance(request, dict):
+                    continue
+                if request.get('type') == 'stats':
+                    CONNECTED_CLIENTS.send(websocket, json.dumps(stats_message()))
+                    continue
+                if request.get('type') == 'ptz':
+                    CONNECTED_CLIENTS.send(websocket, json.dumps(handle_ptz_command(request)))
+                    continue
+                if request.get('type') != 'frame':
+                    continue
+                camera_name = str(request.get('camera') or camera_name)
+                instruction = request.get('instruction') or instruction
+                try:
+                    data = decode_image(request.get('image') or '')
+                except ValueError as e:
+                    CONNECTED_CLIENTS.send(websocket, json.dumps({'type': 'vision', 'error': str(e)}))
+                    continue
+            get_camera(camera_name).submit(websocket, data, instruction)
+    except websockets.exceptions.ConnectionClosed:
+        pass
+    finally:
+        print(f"Client disconnected: {websocket.remote_address}")
+        CONNECTED_CLIENTS.remove(websocket)
+
+
+def parse_size(text):
+    """WIDTHxHEIGHT as a (width, height) tuple"""
+    try:
+        width, height = (int(v) for v in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got '{text}'")
+    return width, height
+
+
+def parse_args(argv=None):
+    """Command line options for the vision agent"""
+    parser = argparse.ArgumentParser(description="Vision agent: change detection in front of the VLM")
+    parser.add_argument("--port", type=int, default=8766, help="WebSocket port for camera clients")
+    parser.add_argument("--orchestrator", default="ws://localhost:9001", help="Orchestrator URL")
+    parser.add_argument("--backend", choices=("ollama", "stub"), default="ollama",
+                        help="VLM backend; 'stub' answers without a model, for testing")
+    parser.add_argument("--vlm-url", default="http://localhost:11434", help="Ollama server URL")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Ollama vision model")
+    parser.add_argument("--vlm-timeout", type=float, default=60.0, help="Seconds to wait for the VLM")
+    parser.add_argument("--stub-reply", default="a person standing at a desk",
+                        help="Reply of the stub backend ({calls} and {bytes} are filled in)")
+    parser.add_argument("--stub-delay", type=float, default=0.0, help="Seconds the stub backend takes")
+    parser.add_argument("--instruction", default="Describe what you see in 8 words or fewer.",
+                        help="Instruction for frames that do not bring their own")
+    parser.add_argument("--input-size", type=int, default=448,
+                        help="Longest side of the frames sent to the model, in pixels")
+    parser.add_argument("--hash-threshold", type=int, default=6,
+                        help="dHash bits (of 64) that must differ for a frame to count as changed")
+    parser.add_argument("--diff-threshold", type=float, default=0.02,
+                        help="Fraction of thumbnail cells that must change for a frame to count as changed")
+    parser.add_argument("--labels", default=None,
+                        help="Comma-separated labels to track (default: the Orchestrator's vision_vlm triggers)")
+    parser.add_argument("--event-window", type=int, default=5,
+                        help="Observations per label in the presence window")
+    parser.add_argument("--enter-ratio", type=float, default=0.6,
+                        help="Share of the window a label must be seen in to enter")
+    parser.add_argument("--leave-ratio", type=float, default=0.2,
+                        help="Share of the window at or below which a present label leaves")
+    parser.add_argument("--raw-descriptions", action="store_true",
+                        help="Also send every new description to the Orchestrator, not just events")
+    parser.add_argument("--ptz-size", type=parse_size, default=None,
+                        help="WIDTHxHEIGHT of the PTZ stream (default: the camera frame size)")
+    parser.add_argument("--ptz-interpolation", choices=("bilinear", "nearest"), default="bilinear",
+                        help="Scaling of the PTZ view")
+    parser.add_argument("--ptz-quality", type=int, default=80, help="JPEG quality of the PTZ stream")
+    parser.add_argument("--cache-size", type=int, default=128, help="VLM replies kept in the cache (0 disables)")
+    parser.add_argument("--cache-ttl", type=float, default=30.0, help="Seconds a cached VLM reply stays valid")
+    parser.add_argument("--cache-match-bits", type=int, default=3,
+                        help="dHash bits a frame may differ from a cached one and still reuse its reply")
+    return parser.parse_args(argv)
+
+
+async def main(args=None):
+    """
+    Start the vision agent's WebSocket server.
+    """
+    if args is None:
+        args = parse_args()
+    global ARGS, VLM_CLIENT, VOCABULARY
+    ARGS = args
+    if args.labels:
+        VOCABULARY = [label.strip() for label in args.labels.split(',') if label.strip()]
+    VLM_CLIENT = VLMClient(make_backend(args), max_entries=args.cache_size, ttl=args.cache_ttl,
+                           match_bits=args.cache_match_bits)
+
+    host = "localhost"
+    print(f"Starting WebSocket server on ws://{host}:{args.port} (VLM backend: {VLM_CLIENT.name})")
+
+    try:
+        async with websockets.serve(connection_handler, host, args.port, max_size=16 * 1024 * 1024):
+            # The Orchestrator, when started in this same process, sends PTZ commands without a socket
+            serve_locally(f"ws://{host}:{args.port}", connection_handler)
+            await connect_to_orchestrator(args.orchestrator)
+            READINESS.mark_ready(backend=VLM_CLIENT.name, input_size=args.input_size)
+            await asyncio.Future()  # Run forever
+    except OSError as e:
+        print(f"Failed to start server, maybe the port {args.port} is already in use?")
+        print(e)
+    finally:
+        if CAMERAS:
+            print(f"Vision Agent: {stats_message()}")
+        if ORCHESTRATOR_CONNECTION is not None:
+            await ORCHESTRATOR_CONNECTION.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main(parse_args()))
+    except KeyboardInterrupt:
+        print("\nServer stopped by user.")
@@ -0,0 +1,127 @@
+"""
+Vision Events
+Turns free-text VLM descriptions into per-label presence with hysteresis,
+so the Orchestrator hears "person entered" once instead of every time a
+description mentions a person
+"""
+
+import json
+import re
+from collections import deque
+
+# Words that negate the label right after them: "no person", "without a bottle"
+NEGATIONS = {'no', 'not', 'without', 'none', 'nobody', 'zero'}
+STOPWORDS = {
+    'a', 'an', 'the', 'and', 'or', 'of', 'in', 'on', 'at', 'to', 'with', 'is', 'are', 'was', 'be',
+    'it', 'its', 'this', 'that', 'there', 'their', 'his', 'her', 'some', 'one', 'two', 'very',
+    'i', 'you', 'see', 'image', 'picture', 'frame', 'shows', 'showing', 'visible',
+}
+
+
+def _words(text):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def _singular(word):
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 3 and word.endswith(('ches', 'shes', 'sses', 'xes')):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+
+def _json_labels(text):
+    """Labels from a JSON answer (a list, or an object with objects/labels), else None"""
+    start = min((i for i in (text.find('['), text.find('{')) if i >= 0), default=-1)
+    if start < 0:
+        return None
+    try:
+        data = json.loads(text[start:])
+    except ValueError:
+        return None
+    if isinstance(data, dict):
+        data = data.get('objects', data.get('labels'))
+    if not isinstance(data, list):
+        return None
+    labels = []
+    for item in data:
+        if isinstance(item, dict):
+            item = item.get('label', item.get('name'))
+        if isinstance(item, str):
+            labels.append(item)
+    return labels
+
+
+def parse_labels(text, vocabulary=None):
+    """
+    The set of labels a VLM answer mentions. JSON lists are read as
+    labels; free text is scanned word by word. With a vocabulary, only its
+    (possibly multi-word) labels count, matched with plurals folded and
+    skipped after a negation; without one, every content word is a label.
+    """
+    items = _json_labels(text)
+    if items is None:
+        items = [text]
+    labels = set()
+    for item in items:
+        words = [_singular(w) for w in _words(item)]
+        if vocabulary is None:
+            for i, word in enumerate(words):
+                negated = NEGATIONS.intersection(words[max(0, i - 2):i])
+                if word not in STOPWORDS and word not in NEGATIONS and not negated:
+                    labels.add(word)
+            continue
+        for label in vocabulary:
+            target = [_singular(w) for w in _words(label)]
+            n = len(target)
+            for i in range(len(words) - n + 1):
+                if words[i:i + n] != target:
+                    continue
+                before = words[max(0, i - 2):i]
+                if not NEGATIONS.intersection(before):
+                    labels.add(label)
+                    break
+    return labels
+
+
+class LabelTracker:
+    """
+    Sliding window of the last `window` observations per label. A label
+    enters once it was seen in at least enter_ratio of them and leaves once
+    that share drops to leave_ratio or below; between the two thresholds it
+    keeps its state, so one missed or spurious detection changes nothing.
+    """
+
+    def __init__(self, window=5, enter_ratio=0.6, leave_ratio=0.2):
+        self.window = window
+        self.enter_ratio = enter_ratio
+        self.leave_ratio = leave_ratio
+        self.history = {}  # label -> deque of bools
+        self.present = set()
+        self.events = 0
+
+    def update(self, labels):
+        """
+        Record one observation; returns [(event, label, presence)] for the
+        labels that entered ('enter') or left ('leave') the scene.
+        """
+        events = []
+        for label in set(self.history) | set(labels):
+            history = self.history.get(label)
+            if history is None:
+                history = self.history[label] = deque(maxlen=self.window)
+            history.append(label in labels)
+            presence = sum(history) / self.window
+            if label not in self.present and presence >= self.enter_ratio:
+                self.present.add(label)
+                events.append(('enter', label, presence))
+            elif label in self.present and presence <= self.leave_ratio:
+                self.present.discard(label)
+                events.append(('leave', label, presence))
+            elif label not in self.present and not any(history):
+                # Long gone: stop tracking it
+                del self.history[label]
+        self.events += len(events)
+        return sorted(events)
@@ -0,0 +1,99 @@
+"""
+VLM Backends
+Pluggable vision-language model clients for the vision agent: Ollama's
+chat API, and a local stub for running the pipeline without a model
+"""
+
+import abc
+import asyncio
+import base64
+import json
+import urllib.error
+import urllib.request
+
+DEFAULT_MODEL = "qwen3-vl:2b-instruct"
+
+
+class VLMError(Exception):
+    """The backend could not produce a description for a frame"""
+
+
+class VLMBackend(abc.ABC):
+    """Base class: describe(prompt, jpeg) returns the model's text for one frame"""
+
+    name = 'base'
+
+    @abc.abstractmethod
+    async def describe(self, prompt, jpeg):
+        """The model's answer to prompt about one JPEG frame; raises VLMError on failure"""
+
+
+class OllamaBackend(VLMBackend):
+    """
+    Ollama's /api/chat with the frame attached as an image, the request
+    the web UI used to send itself. The blocking HTTP call runs in the
+    default executor.
+    """
+
+    name = 'ollama'
+
+    def __init__(self, url="http://localhost:11434", model=DEFAULT_MODEL, timeout=60.0):
+        self.url = url.rstrip('/')
+        self.model = model
+        self.timeout = timeout
+
+    def _chat(self, prompt, jpeg):
+        body = json.dumps({
+            'model': self.model,
+            'messages': [{
+                'role': 'user',
+                'content': prompt,
+                'images': [base64.b64encode(jpeg).decode('ascii')],
+            }],
+            'stream': False,
+        }).encode('utf-8')
+        request = urllib.request.Request(f"{self.url}/api/chat", data=body,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                data = json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise VLMError(f"Server error: {e.code} - {e.read().decode('utf-8', 'replace')}") from e
+        except (OSError, ValueError) as e:
+            raise VLMError(f"Cannot reach {self.url}: {e}") from e
+        try:
+            return data['message']['content']
+        except (KeyError, TypeError) as e:
+            raise VLMError(f"Unexpected reply from {self.url}: {data!r}") from e
+
+    async def describe(self, prompt, jpeg):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._chat, prompt, jpeg)
+
+
+class StubBackend(VLMBackend):
+    """
+    Answers with a fixed reply after an optional delay, for testing the
+    agent and the orchestrator rules without a model. The reply may use
+    {calls} and {bytes}.
+    """
+
+    name = 'stub'
+
+    def __init__(self, reply="a person standing at a desk", delay=0.0):
+        self.reply = reply
+        self.delay = delay
+        self.calls = 0
+
+    async def describe(self, prompt, jpeg):
+        self.calls += 1
+        if self.delay > 0:
+            await asyncio.sleep(self.delay)
+        return self.reply.format(calls=self.calls, bytes=len(jpeg))
+
+
+def make_backend(args):
+    """Build the backend selected on the command line"""
+    if args.backend == 'stub':
+        return StubBackend(reply=args.stub_reply, delay=args.stub_delay)
+    return OllamaBackend(url=args.vlm_url, model=args.model, timeout=args.vlm_timeout)
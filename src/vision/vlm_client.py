@@ -0,0 +1,89 @@
+"""
+VLM Client
+Puts a response cache in front of a VLM backend, so a scene that was
+already described is answered without calling the model again
+"""
+
+import time
+from collections import OrderedDict
+
+from frame_sampler import hamming
+
+
+class VLMClient:
+    """
+    Caches backend replies by (prompt, frame dHash) with a TTL and LRU
+    eviction. A lookup also accepts a cached frame of the same prompt whose
+    hash differs in at most match_bits bits, since sensor noise rarely
+    reproduces a hash exactly; the closest such entry wins. ttl=0 or
+    max_entries=0 turns caching off.
+    """
+
+    def __init__(self, backend, max_entries=128, ttl=30.0, match_bits=3):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.match_bits = match_bits
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        # (prompt, hash) -> (content, stored at)
+        self._entries = OrderedDict()
+
+    @property
+    def name(self):
+        return self.backend.name
+
+    def _lookup(self, prompt, frame_hash, now):
+        best_key, best_distance = None, None
+        for key, (content, stored) in list(self._entries.items()):
+            if now - stored > self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                continue
+            if key[0] != prompt:
+                continue
+            distance = hamming(key[1], frame_hash)
+            if distance <= self.match_bits and (best_distance is None or distance < best_distance):
+                best_key, best_distance = key, distance
+        if best_key is None:
+            return None
+        self._entries.move_to_end(best_key)
+        return self._entries[best_key][0]
+
+    def _store(self, prompt, frame_hash, content, now):
+        key = (prompt, frame_hash)
+        self._entries[key] = (content, now)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def describe(self, prompt, frame):
+        """
+        Return (content, cached) for a SampledFrame. Backend errors
+        propagate and are not cached.
+        """
+        caching = self.ttl > 0 and self.max_entries > 0
+        if caching:
+            content = self._lookup(prompt, frame.hash, time.monotonic())
+            if content is not None:
+                self.hits += 1
+                return content, True
+        self.misses += 1
+        content = await self.backend.describe(prompt, frame.jpeg)
+        if caching:
+            self._store(prompt, frame.hash, content, time.monotonic())
+        return content, False
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'cache_entries': len(self._entries),
+            'cache_hits': self.hits,
+            'cache_misses': self.misses,
+            'cache_hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'cache_expired': self.expired,
+            'cache_evictions': self.evictions,
+        }
@@ -0,0 +1,79 @@
+"""The servers and scripts are flat files importing their siblings: make every source directory importable"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SRC = ROOT / "src"
+for directory in (ROOT / "scripts", SRC, *(p for p in sorted(SRC.iterdir()) if p.is_dir())):
+    if str(directory) not in sys.path:
+        sys.path.insert(0, str(directory))
+
+import json
+import types
+
+import pytest
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """Write a PDF with one page per text and return its path"""
+    fitz = pytest.importorskip("fitz")
+
+    def make(texts, name="deck.pdf"):
+        document = fitz.open()
+        for text in texts:
+            page = document.new_page(width=320, height=240)
+            page.insert_text((20, 60), text, fontsize=14)
+        path = tmp_path / name
+        document.save(str(path))
+        document.close()
+        return path
+
+    return make
+
+
+class FakeRecognizer:
+    """Stands in for vosk.KaldiRecognizer: keeps the audio fed per utterance, never endpoints"""
+
+    def __init__(self, model, sample_rate, grammar=None):
+        self.grammar = grammar
+        self.fed = b''
+        self.utterances = []
+
+    def SetWords(self, enabled):
+        pass
+
+    def AcceptWaveform(self, data):
+        self.fed += data
+        return False
+
+    def Result(self):
+        return self.FinalResult()
+
+    def PartialResult(self):
+        return json.dumps({'partial': ''})
+
+    def FinalResult(self):
+        if not self.fed:
+            return json.dumps({'text': ''})
+        self.utterances.append(self.fed)
+        self.fed = b''
+        return json.dumps({'text': f'utterance {len(self.utterances)}'})
+
+
+@pytest.fixture
+def fake_vosk(monkeypatch):
+    """Replace the vosk module; returns the recognizers created, in order"""
+    recognizers = []
+
+    def recognizer(*args):
+        recognizers.append(FakeRecognizer(*args))
+        return recognizers[-1]
+
+    monkeypatch.setitem(sys.modules, 'vosk', types.SimpleNamespace(
+        Model=lambda path: object(), KaldiRecognizer=recognizer))
+    # vosk_stt binds the module at import: reimport it against the fake
+    monkeypatch.delitem(sys.modules, 'vosk_stt', raising=False)
+    yield recognizers
+    sys.modules.pop('vosk_stt', None)
@@ -0,0 +1,41 @@
+"""Recognizer time mapped back onto the capture clock"""
+
+from audio_clock import AudioTimeline, new_clock_id
+
+
+def test_contiguous_audio_keeps_recognizer_time():
+    timeline = AudioTimeline(sample_rate=100)
+    timeline.feed(0, 50)
+    timeline.feed(50, 50)
+    assert timeline.fed_seconds == 1.0
+    assert timeline.to_audio_time(0.75) == 0.75
+
+
+def test_skipped_audio_shifts_later_times():
+    timeline = AudioTimeline(sample_rate=100)
+    timeline.feed(0, 100)      # 0-1 s captured and fed
+    timeline.feed(300, 100)    # 1-3 s gated out, 3-4 s fed
+    assert timeline.to_audio_time(0.5) == 0.5
+    assert timeline.to_audio_time(1.5) == 3.5
+
+
+def test_late_start_is_a_gap_too():
+    timeline = AudioTimeline(sample_rate=100)
+    timeline.feed(250, 100)
+    assert timeline.to_audio_time(0.0) == 2.5
+
+
+def test_words_on_audio_clock_with_offset():
+    timeline = AudioTimeline(sample_rate=100)
+    timeline.feed(0, 100)
+    timeline.feed(500, 200)
+    result = {'result': [{'word': 'next', 'start': 0.2, 'end': 0.6, 'conf': 0.91234}]}
+    # A recognizer created after the first second of fed audio
+    assert timeline.words(result, offset=1.0) == [
+        {'word': 'next', 'start': 5.2, 'end': 5.6, 'conf': 0.912}]
+    assert timeline.words({'text': ''}) == []
+
+
+def test_clock_ids_are_unique():
+    assert new_clock_id('mic') != new_clock_id('mic')
+    assert new_clock_id('mic').startswith('mic-')
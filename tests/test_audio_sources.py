@@ -0,0 +1,61 @@
+"""Audio sources behind one read(timeout) interface"""
+
+import io
+import wave
+
+import pytest
+
+from audio_sources import AudioSource, FileSource, GeneratorSource, StreamSource, open_source
+
+
+def write_wav(path, pcm, sample_rate=8000, channels=1):
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm)
+
+
+def test_wav_file_takes_rate_from_header(tmp_path):
+    pcm = bytes(range(200)) * 10
+    write_wav(tmp_path / "talk.wav", pcm)
+    source = FileSource(tmp_path / "talk.wav", chunk_size=300)
+    assert source.sample_rate == 8000
+    chunks = list(source.chunks())
+    assert [len(c) for c in chunks] == [600, 600, 600, 200]
+    assert b''.join(chunks) == pcm
+
+
+def test_stereo_wav_is_rejected(tmp_path):
+    write_wav(tmp_path / "stereo.wav", bytes(400), channels=2)
+    with pytest.raises(ValueError):
+        FileSource(tmp_path / "stereo.wav")
+
+
+def test_raw_file_via_open_source(tmp_path):
+    (tmp_path / "talk.raw").write_bytes(bytes(1000))
+    source = open_source(str(tmp_path / "talk.raw"), sample_rate=16000, chunk_size=256)
+    assert isinstance(source, FileSource) and source.sample_rate == 16000
+    assert source.read_all() == bytes(1000)
+
+
+def test_stream_drops_odd_trailing_byte():
+    source = StreamSource(io.BytesIO(bytes(7)), chunk_size=8)
+    assert source.read() == bytes(6)
+    assert source.read() == b''
+
+
+def test_generator_skips_empty_chunks_and_ends():
+    source = GeneratorSource([b'\x01\x00', b'', bytearray(b'\x02\x00')])
+    assert source.read() == b'\x01\x00'
+    assert source.read() == b'\x02\x00'
+    assert source.read() == b''
+    assert not source.live
+
+
+def test_source_must_implement_read():
+    class Incomplete(AudioSource):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
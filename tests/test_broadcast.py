@@ -0,0 +1,128 @@
+"""Per-client outboxes: latest-wins coalescing, bounded depth and send timeouts"""
+
+import asyncio
+
+from broadcast import Broadcaster, ClientOutbox
+
+
+class SlowClient:
+    """Records frames; every send waits until released"""
+    remote_address = ('test', 0)
+
+    def __init__(self):
+        self.sent = []
+        self.release = asyncio.Event()
+        self.closed_with = None
+
+    async def send(self, frame):
+        await self.release.wait()
+        self.sent.append(frame)
+
+    async def close(self, code=1000, reason=''):
+        self.closed_with = code
+
+
+async def drain():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def test_latest_wins_per_key():
+    async def run():
+        client = SlowClient()
+        outbox = ClientOutbox(client)
+        outbox.put('first', key='slide')
+        outbox.put('note')
+        outbox.put('second', key='slide')
+        client.release.set()
+        await drain()
+        outbox.close()
+        return client.sent, outbox.dropped
+
+    sent, dropped = asyncio.run(run())
+    assert sent == ['note', 'second']
+    assert dropped == 1
+
+
+def test_frames_of_one_item_stay_together():
+    async def run():
+        client = SlowClient()
+        client.release.set()
+        outbox = ClientOutbox(client)
+        outbox.put(['header-1', b'payload-1'])
+        outbox.put(['header-2', b'payload-2'])
+        await drain()
+        outbox.close()
+        return client.sent
+
+    assert asyncio.run(run()) == ['header-1', b'payload-1', 'header-2', b'payload-2']
+
+
+def test_full_outbox_drops_oldest():
+    async def run():
+        client = SlowClient()
+        outbox = ClientOutbox(client, max_pending=2)
+        await drain()  # the sender is now parked waiting for the first item
+        for n in range(4):
+            outbox.put(f'message-{n}')
+        client.release.set()
+        await drain()
+        outbox.close()
+        return client.sent, outbox.dropped
+
+    sent, dropped = asyncio.run(run())
+    assert sent == ['message-2', 'message-3']
+    assert dropped == 2
+
+
+def test_send_timeout_closes_connection():
+    async def run():
+        client = SlowClient()
+        closed = []
+        outbox = ClientOutbox(client, send_timeout=0.01, on_close=closed.append)
+        outbox.put('stuck')
+        await asyncio.sleep(0.05)
+        return client.closed_with, outbox.closed, closed == [outbox], outbox.put('later')
+
+    closed_with, is_closed, notified, accepted = asyncio.run(run())
+    assert closed_with == 1011
+    assert is_closed and notified
+    assert not accepted
+
+
+def test_slow_client_does_not_hold_up_others():
+    async def run():
+        slow, fast = SlowClient(), SlowClient()
+        fast.release.set()
+        broadcaster = Broadcaster("test")
+        broadcaster.add(slow)
+        broadcaster.add(fast)
+        broadcaster.publish(['update'], key='state')
+        await drain()
+        stats = broadcaster.stats()
+        broadcaster.remove(slow)
+        broadcaster.remove(fast)
+        return slow.sent, fast.sent, stats, len(broadcaster)
+
+    slow_sent, fast_sent, stats, remaining = asyncio.run(run())
+    assert slow_sent == [] and fast_sent == ['update']
+    assert stats['clients'] == 2 and stats['sent'] == 1
+    assert remaining == 0
+
+
+def test_publish_to_selected_clients():
+    async def run():
+        a, b = SlowClient(), SlowClient()
+        a.release.set()
+        b.release.set()
+        broadcaster = Broadcaster("test")
+        broadcaster.add(a)
+        broadcaster.add(b)
+        broadcaster.publish(['only-a'], clients=[a])
+        assert not broadcaster.send(object(), ['nobody'])
+        await drain()
+        broadcaster.remove(a)
+        broadcaster.remove(b)
+        return a.sent, b.sent
+
+    assert asyncio.run(run()) == (['only-a'], [])
@@ -0,0 +1,102 @@
+"""Digital pan/tilt/zoom rendering and the camera commands"""
+
+import math
+import tracemalloc
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from CameraController import CameraController, DigitalPTZ
+
+
+def noise_frame():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (90, 160, 3), dtype=np.uint8)
+
+
+def ptz(zoom, center=(0.5, 0.5), **kwargs):
+    view = DigitalPTZ(use_cv2=False, smoothing=0, **kwargs)
+    view.set_target(zoom=zoom, center=center)
+    return view
+
+
+def test_unzoomed_view_is_the_frame():
+    frame = noise_frame()
+    assert np.array_equal(ptz(1.0).render(frame), frame)
+
+
+def test_nearest_takes_pixel_holding_each_center():
+    frame = noise_frame()
+    view = ptz(2.5, center=(0.3, 0.6), interpolation='nearest')
+    out = view.render(frame)
+    x0, y0, w, h = view.view_box(160, 90)
+    xs = np.floor(x0 + (np.arange(160) + 0.5) * w / 160).astype(int)
+    ys = np.floor(y0 + (np.arange(90) + 0.5) * h / 90).astype(int)
+    assert np.array_equal(out, frame[ys][:, xs])
+
+
+def test_bilinear_matches_pil():
+    frame = noise_frame()
+    view = ptz(2.0, center=(0.25, 0.25), output_size=(80, 45))
+    out = view.render(frame).astype(int)
+    x0, y0, w, h = view.view_box(160, 90)
+    crop = Image.fromarray(frame[int(y0):int(y0 + h), int(x0):int(x0 + w)])
+    expected = np.asarray(crop.resize((80, 45), Image.BILINEAR, reducing_gap=None)).astype(int)
+    # Borders differ in edge handling
+    assert np.abs(out - expected)[1:-1, 1:-1].max() <= 1
+
+
+def test_render_reuses_its_buffer():
+    frame = noise_frame()
+    view = ptz(2.0)
+    first = view.render(frame)
+    assert view.render(frame) is first
+    view.output_size = (40, 30)
+    view._input_shape = None
+    assert view.render(frame).shape == (30, 40, 3)
+
+
+def test_zoom_eases_in_log_space():
+    view = DigitalPTZ(use_cv2=False, smoothing=0.5)
+    view.set_target(zoom=4.0)
+    view.step(now=0.0)
+    view.step(now=0.5)
+    # One time constant covers ~63% of the way, measured in doublings
+    assert math.log2(view.zoom) == pytest.approx(2 * (1 - math.exp(-1)))
+    view.step(now=20.0)
+    assert not view.moving
+    # Settled: the next step snaps to the exact target
+    view.step(now=20.1)
+    assert view.zoom == 4.0
+
+
+def test_view_box_stays_inside_frame():
+    view = ptz(2.0, center=(1.0, 0.0))
+    view.step(now=0)
+    assert view.view_box(160, 90) == (80.0, 0.0, 80.0, 45.0)
+
+
+def test_commands_set_the_target():
+    controller = CameraController(DigitalPTZ(use_cv2=False))
+    controller.zoom_on_object("person", box=[0.4, 0.4, 0.6, 0.5])
+    assert controller.ptz.target_zoom == pytest.approx(3.0)
+    assert controller.ptz.target_center == pytest.approx([0.5, 0.45])
+    controller.zoom_in(level=2)
+    assert controller.ptz.target_zoom == 4.0
+    controller.reset_zoom()
+    controller.tilt(angle=9)
+    assert controller.ptz.target_zoom == 1.0 and controller.ptz.target_center == pytest.approx([0.5, 0.3])
+
+
+def test_bilinear_render_allocates_no_frame_buffers():
+    frame = np.zeros((360, 640, 3), dtype=np.uint8)
+    view = DigitalPTZ(use_cv2=False, smoothing=0.5)
+    view.set_target(zoom=2.5, center=(0.4, 0.6))
+    view.render(frame, now=0.0)
+    tracemalloc.start()
+    view.render(frame, now=0.1)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # A float32 temporary of the visible rows alone would be over 1 MB
+    assert peak < 64 * 1024
@@ -0,0 +1,51 @@
+"""On-disk slide cache keyed by PDF content hash"""
+
+from disk_cache import DiskSlideCache, content_hash, write_atomic
+from render_pool import render_page
+from viewer_profile import RenderVariant
+
+
+def test_content_hash_follows_bytes_not_name(tmp_path):
+    a, b, c = tmp_path / "a.pdf", tmp_path / "b.pdf", tmp_path / "c.pdf"
+    a.write_bytes(b"same deck")
+    b.write_bytes(b"same deck")
+    c.write_bytes(b"edited deck")
+    assert content_hash(a) == content_hash(b)
+    assert content_hash(a) != content_hash(c)
+    assert content_hash(a, chunk_size=3) == content_hash(a)
+
+
+def test_paths_separate_variants(tmp_path):
+    cache = DiskSlideCache(tmp_path)
+    png = cache.path_for("abc", 3, RenderVariant(2.0, 'png', None))
+    jpeg = cache.path_for("abc", 3, RenderVariant(1.25, 'jpeg', 80))
+    assert png == tmp_path / "abc" / "00003_z2_png.png"
+    assert jpeg == tmp_path / "abc" / "00003_z1.25_jpeg_q80.jpg"
+    assert cache.path_for("abc", 3, RenderVariant(1.25, 'jpeg', 60)) != jpeg
+
+
+def test_write_atomic_leaves_no_temp_files(tmp_path):
+    path = tmp_path / "nested" / "slide.png"
+    write_atomic(path, b"first")
+    write_atomic(path, b"second")
+    assert path.read_bytes() == b"second"
+    assert [p.name for p in path.parent.iterdir()] == ["slide.png"]
+
+
+def test_get_counts_hits_and_misses(tmp_path):
+    cache = DiskSlideCache(tmp_path)
+    variant = RenderVariant(2.0, 'png', None)
+    assert cache.get("abc", 0, variant) is None
+    write_atomic(cache.path_for("abc", 0, variant), b"image")
+    assert cache.contains("abc", 0, variant)
+    assert cache.get("abc", 0, variant) == b"image"
+    assert cache.stats() == {'dir': str(tmp_path), 'hits': 1, 'misses': 1}
+
+
+def test_render_worker_fills_the_cache(tmp_path, make_pdf):
+    pdf = make_pdf(["one"])
+    cache = DiskSlideCache(tmp_path / "cache")
+    variant = RenderVariant(1.0, 'png', None)
+    path = cache.path_for(content_hash(pdf), 0, variant)
+    data = render_page(str(pdf), 0, 1.0, 'png', cache_path=str(path))
+    assert cache.get(content_hash(pdf), 0, variant) == data
@@ -0,0 +1,75 @@
+"""Open presentations: path sandboxing, shared sessions and idle closing"""
+
+import pytest
+
+pytest.importorskip("fitz")
+from document_registry import DocumentRegistry
+
+
+def test_open_is_lazy_and_shared(make_pdf, tmp_path):
+    make_pdf(["one", "two"], name="talk.pdf")
+    registry = DocumentRegistry(tmp_path)
+    session = registry.open("talk.pdf")
+    assert session.doc_id == "talk" and session.total_slides == 2
+    assert not session._page_sizes
+    assert session.page_size(1) == (320, 240)
+    assert registry.open("talk") is session
+    assert registry.open(str(tmp_path / "talk.pdf")) is session
+
+
+def test_same_content_under_another_name_shares_session(make_pdf, tmp_path):
+    path = make_pdf(["one"], name="talk.pdf")
+    (tmp_path / "copy.pdf").write_bytes(path.read_bytes())
+    registry = DocumentRegistry(tmp_path)
+    assert registry.open("copy.pdf") is registry.open("talk.pdf")
+    assert len(registry.sessions) == 1
+
+
+def test_paths_outside_docs_dir_are_rejected(make_pdf, tmp_path):
+    make_pdf(["one"], name="talk.pdf")
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    registry = DocumentRegistry(docs)
+    with pytest.raises(ValueError):
+        registry.open("../talk.pdf")
+    with pytest.raises(FileNotFoundError):
+        registry.open("missing.pdf")
+    assert registry.find("../talk.pdf") is None
+
+
+def test_startup_pdf_outside_docs_dir_is_allowed(make_pdf, tmp_path):
+    talk = make_pdf(["one"], name="talk.pdf")
+    make_pdf(["two"], name="other.pdf")
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    registry = DocumentRegistry(docs, allowed=[talk])
+    assert registry.open(str(talk.resolve())).total_slides == 1
+    # Only that file: its neighbours stay outside the sandbox
+    with pytest.raises(ValueError):
+        registry.open(str(tmp_path / "other.pdf"))
+
+
+def test_navigation_is_per_session(make_pdf, tmp_path):
+    make_pdf(["a1", "a2"], name="a.pdf")
+    make_pdf(["b1", "b2", "b3"], name="b.pdf")
+    registry = DocumentRegistry(tmp_path)
+    a, b = registry.open("a.pdf"), registry.open("b.pdf")
+    assert a.next_slide() and not a.next_slide()
+    assert b.go_to_slide(2) and not b.go_to_slide(3)
+    assert (a.current_slide, b.current_slide) == (1, 2)
+    assert a.previous_slide() and not a.previous_slide()
+
+
+def test_close_idle_keeps_active_and_state(make_pdf, tmp_path):
+    make_pdf(["a1", "a2"], name="a.pdf")
+    make_pdf(["b1"], name="b.pdf")
+    registry = DocumentRegistry(tmp_path, idle_timeout=0.0)
+    a = registry.activate(registry.open("a.pdf"))
+    b = registry.open("b.pdf")
+    b.last_used -= 1
+    assert registry.close_idle() == ["b"]
+    assert a.is_open and not b.is_open
+    assert registry.open("b").is_open
+    described = registry.describe()
+    assert described['active'] == "a"
+    assert [d['doc_id'] for d in described['documents']] == ["a", "b"]
@@ -0,0 +1,179 @@
+"""Per-backend action queues between the Orchestrator and its executive agents"""
+
+import asyncio
+import json
+
+import pytest
+
+import orchestrator
+from executive import ActionDispatcher, ControllerBackend, ExecutiveBackend, ExecutiveError, WebSocketBackend
+from local_channel import LOCAL_HANDLERS, open_connection, serve_locally
+from rule_loader import DEFAULT_RULES_PATH, compile_rule_file
+
+
+class Recorder(ExecutiveBackend):
+    """Carries out actions by recording them, after an optional delay"""
+
+    def __init__(self, name, delay=0.0, fail=(), queue_size=16):
+        super().__init__(name, queue_size)
+        self.delay = delay
+        self.fail = fail
+        self.done = []
+
+    async def execute(self, action, params):
+        await asyncio.sleep(self.delay)
+        if action in self.fail:
+            raise ExecutiveError("refused")
+        self.done.append((action, params))
+
+
+async def settle(dispatcher, finished):
+    """Wait until the dispatcher's backends have finished that many actions"""
+    for _ in range(500):
+        if sum(stats.done + stats.failed for stats in dispatcher.actions.values()) >= finished:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("actions did not finish")
+
+
+def test_slow_backend_does_not_hold_up_others():
+    slides, camera = Recorder('slides'), Recorder('camera', delay=0.3)
+    dispatcher = ActionDispatcher()
+    dispatcher.register(slides, ['NEXT_SLIDE'])
+    dispatcher.register(camera, ['ZOOM_IN'])
+
+    async def run():
+        dispatcher.start()
+        dispatcher.dispatch('ZOOM_IN', {'level': 1})
+        dispatcher.dispatch('NEXT_SLIDE', {})
+        dispatcher.dispatch('NEXT_SLIDE', {})
+        await asyncio.sleep(0.1)
+        early = list(slides.done), list(camera.done)
+        await settle(dispatcher, 3)
+        await dispatcher.close()
+        return early
+
+    assert asyncio.run(run()) == ([('NEXT_SLIDE', {}), ('NEXT_SLIDE', {})], [])
+    assert camera.done == [('ZOOM_IN', {'level': 1})]
+    assert dispatcher.stats()['actions']['NEXT_SLIDE']['done'] == 2
+
+
+def test_full_queue_drops_and_failures_are_counted():
+    backend = Recorder('slides', fail=('GO_TO_SLIDE',), queue_size=2)
+    dispatcher = ActionDispatcher()
+    dispatcher.register(backend, ['NEXT_SLIDE', 'GO_TO_SLIDE'])
+
+    async def run():
+        # Not started yet: the queue fills up
+        results = [dispatcher.dispatch('NEXT_SLIDE', {}) for _ in range(3)]
+        dispatcher.start()
+        await settle(dispatcher, 2)
+        dispatcher.dispatch('GO_TO_SLIDE', {'page': 2})
+        await settle(dispatcher, 3)
+        await dispatcher.close()
+        return results
+
+    assert asyncio.run(run()) == [True, True, False]
+    actions = dispatcher.stats()['actions']
+    assert actions['NEXT_SLIDE']['dropped'] == 1 and actions['NEXT_SLIDE']['done'] == 2
+    assert actions['GO_TO_SLIDE']['failed'] == 1
+
+
+def test_unrouted_action_is_ignored():
+    assert not ActionDispatcher().dispatch('NEXT_SLIDE', {})
+
+
+def test_controller_backend_maps_params_to_arguments():
+    class Controller:
+        def __init__(self):
+            self.calls = []
+
+        def open_presentation(self, file_path=None):
+            self.calls.append(file_path)
+
+    controller = Controller()
+    backend = ControllerBackend('slides', controller, {
+        'OPEN_PRESENTATION': ('open_presentation', {'path': 'file_path'}),
+        'NEXT_SLIDE': ('next_slide', {}),
+    })
+    assert backend.handles('OPEN_PRESENTATION')
+    # Listed, but the controller has no such method
+    assert not backend.handles('NEXT_SLIDE') and not backend.handles('TILT')
+
+    asyncio.run(backend.execute('OPEN_PRESENTATION', {'path': 'deck.pdf'}))
+    assert controller.calls == ['deck.pdf']
+    with pytest.raises(ExecutiveError):
+        asyncio.run(backend.execute('OPEN_PRESENTATION', {'doc_id': 'deck'}))
+
+
+def controller_args():
+    return orchestrator.parse_args(['--slides', 'controller', '--camera', 'controller'])
+
+
+def test_every_rule_action_runs_on_the_controllers():
+    rules = compile_rule_file(DEFAULT_RULES_PATH, 3.0).rules
+    actions = {rule['action'] for source_rules in rules.values() for rule in source_rules}
+    dispatcher = orchestrator.build_dispatcher(controller_args(), actions)
+
+    async def run():
+        for source_rules in rules.values():
+            for rule in source_rules:
+                params = dict(rule['params'], query='pricing') if rule.get('capture') else rule['params']
+                await dispatcher.routes[rule['action']].execute(rule['action'], params)
+
+    asyncio.run(run())
+    # Every action the controllers are routed for has a method to go to
+    for action in orchestrator.SLIDE_ACTIONS + orchestrator.CAMERA_ACTIONS:
+        assert isinstance(dispatcher.routes[action], ControllerBackend)
+    asyncio.run(dispatcher.routes['OPEN_PRESENTATION'].execute('OPEN_PRESENTATION', {'path': 'deck.pdf'}))
+
+
+def test_rule_action_without_agent_is_refused():
+    with pytest.raises(ValueError, match='DANCE'):
+        orchestrator.build_dispatcher(controller_args(), {'NEXT_SLIDE', 'DANCE'})
+
+
+@pytest.fixture
+def agent_uri():
+    uri = "ws://localhost:9997"
+    received = []
+
+    async def handler(connection):
+        async for message in connection:
+            command = json.loads(message)
+            received.append(command)
+            ok = command['params'].get('level', 1) < 5
+            await connection.send(json.dumps({'type': 'ptz_result', 'ok': ok, 'error': 'too far'}))
+
+    serve_locally(uri, handler)
+    yield uri, received
+    LOCAL_HANDLERS.pop(uri, None)
+
+
+def test_websocket_backend_waits_for_reply(agent_uri):
+    uri, received = agent_uri
+    backend = WebSocketBackend('vision_agent', uri, lambda action, params: {'params': params},
+                               reply_type='ptz_result', connect=open_connection, timeout=1.0)
+
+    async def run():
+        await backend.execute('ZOOM_IN', {'level': 2})
+        with pytest.raises(ExecutiveError, match='too far'):
+            await backend.execute('ZOOM_IN', {'level': 9})
+        await backend.close()
+
+    asyncio.run(run())
+    assert [command['params'] for command in received] == [{'level': 2}, {'level': 9}]
+
+
+def test_unreachable_agent_fails_action():
+    backend = WebSocketBackend('pdf_server', 'ws://localhost:9', lambda action, params: {}, timeout=1.0)
+    with pytest.raises(ExecutiveError):
+        asyncio.run(backend.execute('NEXT_SLIDE', {}))
+
+
+def test_backend_must_implement_execute():
+    class Incomplete(ExecutiveBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete('incomplete')
@@ -0,0 +1,95 @@
+"""Change detection in front of the vision model"""
+
+import asyncio
+import io
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from frame_sampler import FrameSampler, block_mean, dhash, hamming
+from vlm_backends import OllamaBackend, StubBackend, VLMBackend, VLMError, make_backend
+
+
+def jpeg(pixels):
+    buffer = io.BytesIO()
+    Image.fromarray(pixels.astype(np.uint8)).save(buffer, format='JPEG', quality=95)
+    return buffer.getvalue()
+
+
+def scene(width=640, height=480, box=None):
+    """A horizontal gradient, optionally with a bright box (x, y, size)"""
+    pixels = np.tile(np.linspace(0, 200, width), (height, 1))
+    if box is not None:
+        x, y, size = box
+        pixels[y:y + size, x:x + size] = 255
+    return np.stack([pixels] * 3, axis=-1)
+
+
+def test_block_mean_averages_blocks():
+    gray = np.arange(16, dtype=np.float32).reshape(4, 4)
+    assert block_mean(gray, 2, 2).tolist() == [[2.5, 4.5], [10.5, 12.5]]
+
+
+def test_dhash_ignores_exposure():
+    gray = scene()[..., 0]
+    assert hamming(dhash(gray), dhash(gray * 0.5 + 20)) == 0
+    assert hamming(dhash(gray), dhash(gray[:, ::-1])) > 32
+
+
+def test_unchanged_frames_are_skipped():
+    sampler = FrameSampler()
+    first = sampler.sample(jpeg(scene()))
+    assert first is not None and first.distance is None
+    assert max(first.width, first.height) <= sampler.input_size
+    assert sampler.sample(jpeg(scene())) is None
+    assert sampler.stats()['skipped'] == 1
+
+
+def test_small_object_is_a_change():
+    sampler = FrameSampler()
+    sampler.sample(jpeg(scene()))
+    frame = sampler.sample(jpeg(scene(box=(300, 200, 120))))
+    assert frame is not None and frame.difference > sampler.diff_threshold
+
+
+def test_force_and_reset_accept_unchanged_frames():
+    sampler = FrameSampler()
+    sampler.sample(jpeg(scene()))
+    assert sampler.sample(jpeg(scene()), force=True) is not None
+    sampler.reset()
+    assert sampler.sample(jpeg(scene())) is not None
+    assert sampler.stats()['accepted'] == 3
+
+
+def test_undecodable_and_tiny_frames_are_rejected():
+    sampler = FrameSampler()
+    with pytest.raises(ValueError):
+        sampler.sample(b'not a jpeg')
+    with pytest.raises(ValueError):
+        sampler.sample(jpeg(scene(16, 16)))
+
+
+def test_stub_backend_formats_reply():
+    backend = StubBackend(reply="call {calls}, {bytes} bytes")
+    assert asyncio.run(backend.describe("what?", b'1234')) == "call 1, 4 bytes"
+
+
+def test_ollama_backend_reports_unreachable_server():
+    backend = OllamaBackend(url="http://127.0.0.1:9", timeout=1.0)
+    with pytest.raises(VLMError):
+        asyncio.run(backend.describe("what?", b'1234'))
+
+
+def test_make_backend_from_args():
+    args = SimpleNamespace(backend='stub', stub_reply='ok', stub_delay=0.0)
+    assert isinstance(make_backend(args), StubBackend)
+
+
+def test_backend_must_implement_describe():
+    class Incomplete(VLMBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
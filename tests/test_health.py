@@ -0,0 +1,78 @@
+"""Readiness reporting and the launcher's readiness probe"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from health import FAILED, READY, STARTING, Readiness, is_health_request
+
+
+def test_readiness_lifecycle():
+    readiness = Readiness("Test Server")
+    message = json.loads(readiness.message())
+    assert message['state'] == STARTING and message['startup_seconds'] is None
+    readiness.mark_ready(profile='balanced')
+    message = json.loads(readiness.message())
+    assert readiness.is_ready and message['state'] == READY
+    assert message['startup_seconds'] >= 0 and message['detail'] == {'profile': 'balanced'}
+    readiness.mark_failed(OSError("port in use"))
+    assert json.loads(readiness.message())['error'] == "port in use"
+    assert readiness.state == FAILED
+
+
+def test_is_health_request():
+    assert is_health_request({'type': 'health'})
+    assert not is_health_request({'type': 'stats'})
+    assert not is_health_request(['health'])
+
+
+class HealthProbe:
+    """A websocket that sends one health request and records the reply"""
+
+    def __init__(self):
+        self.sent = []
+
+    def __aiter__(self):
+        async def messages():
+            yield json.dumps({'type': 'health'})
+        return messages()
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+
+def test_pdf_server_reports_disk_cache(monkeypatch, tmp_path):
+    pytest.importorskip("fitz")
+    import pdf_server
+    from disk_cache import DiskSlideCache
+
+    monkeypatch.setattr(pdf_server, 'DISK_CACHE', DiskSlideCache(tmp_path))
+    probe = HealthProbe()
+    asyncio.run(pdf_server.handle_health_client(probe))
+    (reply,) = probe.sent
+    assert reply['component'] == "PDF Server"
+    assert reply['detail']['disk_cache'] == {'dir': str(tmp_path), 'hits': 0, 'misses': 0}
+
+
+def test_probe_waits_until_ready():
+    websockets = pytest.importorskip("websockets")
+    from wait_ready import probe_websocket
+
+    readiness = Readiness("Test Server")
+
+    async def handler(websocket, path=None):
+        async for message in websocket:
+            # Chatter that is not a health reply must be skipped
+            await websocket.send(json.dumps({'type': 'caption', 'text': 'hello'}))
+            await websocket.send(readiness.message())
+
+    async def run():
+        async with websockets.serve(handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            asyncio.get_running_loop().call_later(0.2, readiness.mark_ready)
+            return await probe_websocket(f"ws://127.0.0.1:{port}", time.monotonic() + 5, 0.05)
+
+    reply = asyncio.run(run())
+    assert reply['state'] == READY
@@ -0,0 +1,52 @@
+"""Latency profiles and applying them to a recognizer"""
+
+import sys
+import types
+
+import pytest
+
+from latency_profiles import PROFILES, apply_endpointer, get_profile
+
+
+class EndpointingRecognizer:
+    def __init__(self):
+        self.calls = []
+
+    def SetEndpointerMode(self, mode):
+        self.calls.append(('mode', mode))
+
+    def SetEndpointerDelays(self, t_start_max, t_end, t_max):
+        self.calls.append(('delays', t_start_max, t_end, t_max))
+
+
+def test_profiles_trade_latency_for_throughput():
+    low, balanced, high = (PROFILES[n] for n in ('low_latency', 'balanced', 'throughput'))
+    assert low.feed_frames < balanced.feed_frames < high.feed_frames
+    assert low.t_end < balanced.t_end < high.t_end
+    assert low.partials and not high.partials
+
+
+def test_unknown_profile():
+    assert get_profile('balanced') is PROFILES['balanced']
+    with pytest.raises(ValueError):
+        get_profile('fastest')
+
+
+def test_apply_endpointer(monkeypatch):
+    modes = types.SimpleNamespace(SHORT='short-mode', DEFAULT='default-mode', LONG='long-mode')
+    monkeypatch.setitem(sys.modules, 'vosk', types.SimpleNamespace(EndpointerMode=modes))
+    recognizer = EndpointingRecognizer()
+    assert apply_endpointer(recognizer, PROFILES['low_latency'])
+    assert recognizer.calls == [('mode', 'short-mode'), ('delays', 5.0, 0.3, 10.0)]
+
+
+def test_apply_endpointer_on_old_vosk(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'vosk', types.SimpleNamespace())
+    assert not apply_endpointer(object(), PROFILES['balanced'])
+
+
+def test_benchmark_summary(fake_vosk):
+    from latency_benchmark import percentile, summarize
+    assert percentile([3, 1, 2, 4], 0.5) == 3
+    assert summarize([]) is None
+    assert summarize([0.1, 0.2, 0.3]) == {'words': 3, 'median_ms': 200, 'p90_ms': 300, 'max_ms': 300}
@@ -0,0 +1,72 @@
+"""In-process channels standing in for websockets"""
+
+import asyncio
+
+import pytest
+import websockets
+
+from local_channel import LOCAL_HANDLERS, open_connection, serve_locally
+
+
+@pytest.fixture
+def echo_server():
+    uri = "ws://localhost:9999"
+    received = []
+
+    async def handler(connection):
+        async for message in connection:
+            received.append(message)
+            await connection.send(message.upper())
+
+    serve_locally(uri, handler)
+    yield uri, received
+    LOCAL_HANDLERS.pop(uri, None)
+
+
+def test_round_trip_without_network(echo_server):
+    uri, received = echo_server
+
+    async def run():
+        connection = await open_connection(uri)
+        await connection.send("next")
+        reply = await connection.recv()
+        await connection.close()
+        return connection, reply
+
+    connection, reply = asyncio.run(run())
+    assert reply == "NEXT" and received == ["next"]
+    assert connection.remote_address == ('local', uri)
+
+
+def test_closed_channel_raises_connection_closed(echo_server):
+    uri, _ = echo_server
+
+    async def run():
+        connection = await open_connection(uri)
+        await connection.close()
+        with pytest.raises(websockets.exceptions.ConnectionClosed):
+            await connection.send("late")
+        with pytest.raises(websockets.exceptions.ConnectionClosed):
+            await connection.recv()
+        # The server side's handler saw the end of the stream and finished
+        await asyncio.wait_for(connection.peer._task, 1)
+        return [message async for message in connection]
+
+    assert asyncio.run(run()) == []
+
+
+def test_handler_exit_closes_client():
+    uri = "ws://localhost:9998"
+
+    async def handler(connection):
+        await connection.send("bye")
+
+    serve_locally(uri, handler)
+    try:
+        async def run():
+            connection = await open_connection(uri)
+            return [message async for message in connection]
+
+        assert asyncio.run(run()) == ["bye"]
+    finally:
+        LOCAL_HANDLERS.pop(uri, None)
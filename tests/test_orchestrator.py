@@ -0,0 +1,161 @@
+"""Rule matching on streaming partials and their finals"""
+
+import asyncio
+import json
+
+from orchestrator import OrchestratorAgent
+
+
+def run_agent(messages, rules_path=None):
+    """Feed messages (audio unless they say otherwise) to an agent and return the (action, params) it delegated"""
+    fired = []
+
+    async def run():
+        agent = OrchestratorAgent(rules_path) if rules_path else OrchestratorAgent()
+        agent.dispatcher.dispatch = lambda action, params: fired.append((action, params))
+        for message in messages:
+            agent.apply_rules(dict({'source': 'audio_stt'}, **message))
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    return fired
+
+
+def partial(utterance_id, revision, content):
+    return {'type': 'partial', 'utterance_id': utterance_id, 'revision': revision, 'content': content}
+
+
+def final(utterance_id, content):
+    return {'type': 'final', 'utterance_id': utterance_id, 'content': content}
+
+
+def test_stable_partial_fires_before_final():
+    fired = run_agent([partial(0, 0, 'next'), partial(0, 1, 'next')])
+    assert fired == [('NEXT_SLIDE', {})]
+
+
+def test_unsettled_partial_waits():
+    assert run_agent([partial(0, 0, 'next')]) == []
+
+
+def test_final_does_not_fire_again():
+    fired = run_agent([partial(0, 0, 'next'), partial(0, 1, 'next one'), final(0, 'next one')])
+    assert fired == [('NEXT_SLIDE', {})]
+
+
+def test_revised_words_are_left_to_the_final():
+    fired = run_agent([partial(0, 0, 'text'), partial(0, 1, 'next'), final(0, 'next')])
+    assert fired == [('NEXT_SLIDE', {})]
+
+
+def test_stale_revision_is_ignored():
+    fired = run_agent([partial(0, 1, 'previous'), partial(0, 0, 'previous')])
+    assert fired == []
+
+
+def test_capture_query_comes_from_the_final():
+    fired = run_agent([
+        partial(0, 0, 'the slide about'),
+        partial(0, 1, 'the slide about pri'),
+        final(0, 'the slide about pricing plans'),
+    ])
+    assert fired == [('GO_TO_TOPIC', {'query': 'pricing plans'})]
+
+
+def test_final_without_partials():
+    assert run_agent([final(3, 'previous')]) == [('PREVIOUS_SLIDE', {})]
+
+
+def command(content):
+    return {'type': 'command', 'content': content}
+
+
+def test_command_fires_once_with_its_dictation():
+    fired = run_agent([command('next'), final(0, 'next')])
+    assert fired == [('NEXT_SLIDE', {})]
+
+
+def test_command_ignores_capture_rules():
+    assert run_agent([command('slide about')]) == []
+
+
+def timed(utterance_id, content, end, clock='capture-1', conf=1.0):
+    """A final whose words end 0.3 s apart, the last at end seconds of audio"""
+    words = content.split()
+    timings = [{'word': w, 'start': end - 0.3 * (len(words) - i), 'end': end - 0.3 * (len(words) - 1 - i),
+                'conf': conf} for i, w in enumerate(words)]
+    return dict(final(utterance_id, content), words=timings, clock=clock)
+
+
+def test_cooldown_uses_when_words_were_spoken():
+    # Both arrive at once, but were spoken 3.3 s apart: past the 2 s cooldown
+    fired = run_agent([timed(0, 'next', 10.0), timed(1, 'next', 13.3)])
+    assert fired == [('NEXT_SLIDE', {}), ('NEXT_SLIDE', {})]
+    assert run_agent([timed(0, 'next', 10.0), timed(1, 'next', 11.0)]) == [('NEXT_SLIDE', {})]
+
+
+def said(utterance_id, content, audio_time, clock='capture-1'):
+    """Two agreeing partials, spoken at audio_time seconds of audio, then their final"""
+    return [dict(partial(utterance_id, revision, content), audio_time=audio_time, clock=clock) for revision in (0, 1)] + [
+        dict(final(utterance_id, content), audio_time=audio_time, clock=clock)]
+
+
+def test_partial_cooldown_uses_when_words_were_spoken():
+    # Triggers fired from partials are stamped with their audio time too
+    fired = run_agent(said(0, 'next', 10.0) + said(1, 'next', 13.3))
+    assert fired == [('NEXT_SLIDE', {}), ('NEXT_SLIDE', {})]
+    assert run_agent(said(0, 'next', 10.0) + said(1, 'next', 11.0)) == [('NEXT_SLIDE', {})]
+
+
+def test_phrase_window_uses_audio_time():
+    assert run_agent([timed(0, 'open', 1.0), timed(1, 'presentation', 2.0)]) == [('OPEN_PRESENTATION', {})]
+    assert run_agent([timed(0, 'open', 1.0), timed(1, 'presentation', 9.0)]) == []
+
+
+def test_clock_change_starts_matching_over():
+    fired = run_agent([timed(0, 'open', 1.0, clock='capture-1'), timed(0, 'presentation', 1.5, clock='capture-2')])
+    assert fired == []
+
+
+def test_min_confidence(tmp_path):
+    rules = tmp_path / "rules.json"
+    rules.write_text(json.dumps({'audio_stt': [
+        {'trigger': 'next', 'action': 'NEXT_SLIDE', 'min_confidence': 0.8}]}), encoding='utf-8')
+    assert run_agent([timed(0, 'next', 1.0, conf=0.5)], rules) == []
+    assert run_agent([timed(0, 'next', 1.0, conf=0.9)], rules) == [('NEXT_SLIDE', {})]
+    # Partials carry no confidences: the rule waits for the final
+    assert run_agent([partial(0, 0, 'next'), partial(0, 1, 'next'), timed(0, 'next', 1.0, conf=0.5)], rules) == []
+
+
+def vision(content, event=None):
+    message = {'source': 'vision_vlm', 'content': content}
+    if event:
+        message['event'] = event
+    return message
+
+
+def test_vision_rules_follow_events(tmp_path):
+    rules = tmp_path / "rules.json"
+    rules.write_text(json.dumps({'vision_vlm': [
+        {'trigger': 'person', 'action': 'ZOOM_ON_OBJECT', 'params': {'target': 'person'}},
+        {'trigger': 'person', 'action': 'RESET_VIEW', 'event': 'leave'}]}), encoding='utf-8')
+    assert run_agent([vision('person', 'enter')], rules) == [('ZOOM_ON_OBJECT', {'target': 'person'})]
+    assert run_agent([vision('person', 'leave')], rules) == [('RESET_VIEW', {})]
+    # Plain descriptions keep firing the rules without an event
+    assert run_agent([vision('a person at a desk')], rules) == [('ZOOM_ON_OBJECT', {'target': 'person'})]
+
+
+def test_interleaved_clocks_match_separately():
+    # Each stream completes its own trigger while the other one talks
+    fired = run_agent([timed(0, 'open', 1.0, clock='stream1'), timed(0, 'open', 5.0, clock='stream2'),
+                       timed(1, 'presentation', 1.5, clock='stream1'), timed(1, 'next', 5.5, clock='stream2')])
+    assert fired == [('OPEN_PRESENTATION', {}), ('NEXT_SLIDE', {})]
+
+
+def test_end_of_stream_drops_clock_state():
+    agent = OrchestratorAgent()
+    agent.dispatcher.dispatch = lambda action, params: None
+    agent.apply_rules(dict(timed(0, 'open', 1.0, clock='stream1'), source='audio_stt'))
+    agent.apply_rules(dict(timed(0, 'next', 1.0, clock='stream2'), source='audio_stt'))
+    agent.apply_rules({'source': 'audio_stt', 'type': 'end_of_stream', 'clock': 'stream1', 'content': ''})
+    assert list(agent.audio_clocks) == ['stream2']
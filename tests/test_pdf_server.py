@@ -0,0 +1,70 @@
+"""Slide delivery to viewers over the JSON and binary protocols"""
+
+import asyncio
+import base64
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fitz")
+import pdf_server
+from slide_cache import RenderedSlide
+
+DECK = SimpleNamespace(doc_id='deck', total_slides=2)
+
+
+class RecordingClient:
+    remote_address = ('test', 0)
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, frame):
+        self.sent.append(frame)
+
+
+def publish(*slides):
+    """Publish slides to a JSON and a binary viewer; returns both"""
+    json_client, binary_client = RecordingClient(), RecordingClient()
+
+    async def run():
+        for client in (json_client, binary_client):
+            pdf_server.CONNECTED_CLIENTS.add(client)
+        pdf_server.CLIENT_PROTOCOLS[binary_client] = 'binary'
+        try:
+            for number, slide in enumerate(slides):
+                pdf_server.publish_slide(DECK, slide, number, [json_client, binary_client])
+            await asyncio.sleep(0.01)
+        finally:
+            for client in (json_client, binary_client):
+                pdf_server.CONNECTED_CLIENTS.remove(client)
+            pdf_server.CLIENT_PROTOCOLS.clear()
+
+    asyncio.run(run())
+    return json_client, binary_client
+
+
+def test_json_viewer_gets_base64():
+    json_client, _ = publish(RenderedSlide(b'image-bytes'))
+    (frame,) = json_client.sent
+    message = json.loads(frame)
+    assert message['type'] == 'slide_update'
+    assert message['doc_id'] == 'deck'
+    assert base64.b64decode(message['image']) == b'image-bytes'
+
+
+def test_binary_viewer_gets_metadata_then_image():
+    _, binary_client = publish(RenderedSlide(b'image-bytes', mime_type='image/png'))
+    header, payload = binary_client.sent
+    metadata = json.loads(header)
+    assert metadata['encoding'] == 'binary'
+    assert metadata['size'] == len(payload)
+    assert 'image' not in metadata
+    assert payload == b'image-bytes'
+
+
+def test_newer_slide_replaces_unsent_one():
+    json_client, binary_client = publish(RenderedSlide(b'old'), RenderedSlide(b'new'))
+    assert [json.loads(f)['slide_number'] for f in json_client.sent] == [1]
+    assert binary_client.sent[1:] == [b'new']
@@ -0,0 +1,41 @@
+"""Page rendering in worker processes"""
+
+import asyncio
+import os
+
+import render_pool
+from render_pool import RenderPool, render_page
+
+PNG_MAGIC = b'\x89PNG'
+
+
+def test_render_page_in_process(make_pdf):
+    path = make_pdf(["one", "two"])
+    data = render_page(str(path), 1, 1.0, 'png')
+    assert data.startswith(PNG_MAGIC)
+    assert render_page(str(path), 2, 1.0, 'png') is None
+
+
+def test_worker_reopens_changed_file(make_pdf):
+    path = make_pdf(["one"])
+    first = render_pool._get_document(str(path))
+    assert render_pool._get_document(str(path)) is first
+    make_pdf(["one", "two", "three"])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert len(render_pool._get_document(str(path))) == 3
+
+
+def test_pool_renders_off_the_event_loop(make_pdf):
+    path = make_pdf(["one"])
+
+    async def run():
+        pool = RenderPool(max_workers=1, preload_paths=[path])
+        try:
+            return await pool.render(path, 0, 1.0, 'png'), await pool.render(path, 5, 1.0, 'png')
+        finally:
+            pool.shutdown()
+
+    data, missing = asyncio.run(run())
+    assert data.startswith(PNG_MAGIC)
+    assert missing is None
@@ -0,0 +1,74 @@
+"""Fixed-capacity capture buffer and its overflow policies"""
+
+import threading
+
+import numpy as np
+import pytest
+
+from ring_buffer import AudioRingBuffer
+
+
+def pcm(start, n):
+    return np.arange(start, start + n, dtype='<i2').tobytes()
+
+
+def samples(data):
+    return np.frombuffer(data, dtype='<i2').tolist()
+
+
+def test_reads_wrap_around_in_order():
+    ring = AudioRingBuffer(capacity_seconds=1.0, sample_rate=10)
+    ring.write(pcm(0, 8))
+    assert samples(ring.read(6)) == list(range(6))
+    ring.write(pcm(8, 6))  # wraps past the end of the buffer
+    assert samples(ring.read(8)) == list(range(6, 14))
+    assert ring.depth == 0 and ring.overruns == 0
+
+
+def test_drop_oldest_keeps_latest_audio():
+    ring = AudioRingBuffer(capacity_seconds=1.0, sample_rate=10, policy='drop_oldest')
+    ring.write(pcm(0, 8))
+    ring.write(pcm(8, 5))
+    assert ring.overruns == 1 and ring.samples_dropped == 3
+    assert samples(ring.read(10)) == list(range(3, 13))
+
+
+def test_skip_to_live_discards_backlog():
+    ring = AudioRingBuffer(capacity_seconds=1.0, sample_rate=10, policy='skip_to_live')
+    ring.write(pcm(0, 8))
+    ring.write(pcm(8, 5))
+    assert ring.samples_dropped == 8
+    assert samples(ring.read(10, timeout=0)) == list(range(8, 13))
+
+
+def test_oversized_write_keeps_its_newest_part():
+    ring = AudioRingBuffer(capacity_seconds=1.0, sample_rate=10)
+    ring.write(pcm(0, 25))
+    assert ring.samples_dropped == 15
+    assert samples(ring.read(10)) == list(range(15, 25))
+
+
+def test_read_timeout_returns_what_is_buffered():
+    ring = AudioRingBuffer(capacity_seconds=1.0, sample_rate=10)
+    assert ring.read(4, timeout=0.01) is None
+    ring.write(pcm(0, 2))
+    assert samples(ring.read(4, timeout=0.01)) == [0, 1]
+
+
+def test_read_wakes_on_write():
+    ring = AudioRingBuffer(capacity_seconds=1.0, sample_rate=10)
+    writer = threading.Timer(0.05, ring.write, args=(pcm(0, 4),))
+    writer.start()
+    assert samples(ring.read(4, timeout=5)) == [0, 1, 2, 3]
+    writer.join()
+
+
+def test_stats_and_unknown_policy():
+    ring = AudioRingBuffer(capacity_seconds=1.0, sample_rate=10)
+    ring.write(pcm(0, 15))
+    ring.read(5)
+    stats = ring.stats()
+    assert stats['dropped_seconds'] == 0.5 and stats['written_seconds'] == 1.0
+    assert stats['max_depth_seconds'] == 1.0 and stats['depth_seconds'] == 0.5
+    with pytest.raises(ValueError):
+        AudioRingBuffer(policy='block')
@@ -0,0 +1,82 @@
+"""Rule file validation, compilation and hot reload"""
+
+import asyncio
+import json
+import os
+
+import pytest
+
+from rule_loader import (DEFAULT_RULES_PATH, RuleFileWatcher, compile_rule_file,
+                         read_rule_file, validate_rules)
+
+RULES = {'audio_stt': [{'trigger': 'next', 'action': 'NEXT_SLIDE'}]}
+
+
+def write(path, data):
+    path.write_text(json.dumps(data), encoding='utf-8')
+
+
+def test_shipped_rules_compile():
+    rule_set = compile_rule_file(DEFAULT_RULES_PATH, window=3.0)
+    assert rule_set.rule_count > 0
+    assert set(rule_set.matchers) == set(rule_set.rules)
+
+
+def test_grammar_leaves_out_capture_rules():
+    grammar = compile_rule_file(DEFAULT_RULES_PATH, window=3.0).grammar('audio_stt')
+    assert 'next' in grammar and 'open presentation' in grammar
+    assert 'slide about' not in grammar
+
+
+def test_params_default_to_empty():
+    rules = validate_rules(RULES)
+    assert rules['audio_stt'][0]['params'] == {}
+
+
+@pytest.mark.parametrize('data', [
+    [],
+    {'audio_stt': {}},
+    {'audio_stt': ['next']},
+    {'audio_stt': [{'trigger': '!!', 'action': 'NEXT_SLIDE'}]},
+    {'audio_stt': [{'trigger': 'next', 'action': ''}]},
+    {'audio_stt': [{'trigger': 'next', 'action': 'NEXT_SLIDE', 'params': []}]},
+    {'audio_stt': [{'trigger': 'next', 'action': 'NEXT_SLIDE', 'capture': 'all'}]},
+])
+def test_invalid_rules_are_rejected(data):
+    with pytest.raises(ValueError):
+        validate_rules(data)
+
+
+def test_yaml_rule_file(tmp_path):
+    pytest.importorskip("yaml")
+    path = tmp_path / "rules.yaml"
+    path.write_text("audio_stt:\n  - trigger: next\n    action: NEXT_SLIDE\n", encoding='utf-8')
+    assert read_rule_file(path) == RULES
+
+
+def test_watcher_reloads_changed_file_and_keeps_rules_on_error(tmp_path):
+    path = tmp_path / "rules.json"
+    write(path, RULES)
+    reloaded = []
+    watcher = RuleFileWatcher(path, window=3.0, on_reload=reloaded.append, interval=0.01)
+
+    def touch(data, bump):
+        path.write_text(data, encoding='utf-8')
+        os.utime(path, ns=(bump, bump))
+
+    async def run():
+        task = asyncio.create_task(watcher.run())
+        await asyncio.sleep(0.05)
+        assert reloaded == []  # unchanged file
+        touch('{"audio_stt": [', 10 ** 18)
+        await asyncio.sleep(0.1)
+        assert reloaded == []  # invalid file is rejected
+        touch(json.dumps({'audio_stt': RULES['audio_stt'] * 2}), 2 * 10 ** 18)
+        for _ in range(100):
+            if reloaded:
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(run())
+    assert [r.rule_count for r in reloaded] == [2]
@@ -0,0 +1,58 @@
+"""LRU behaviour and memory accounting of the rendered slide cache"""
+
+from slide_cache import RenderedSlide, SlideCache
+
+
+def slide(size):
+    return RenderedSlide(b'x' * size)
+
+
+def test_make_key_normalizes():
+    assert SlideCache.make_key('deck.pdf', '3', 2, 'PNG') == ('deck.pdf', 3, 2.0, 'png')
+
+
+def test_hit_and_miss_counts():
+    cache = SlideCache(max_bytes=1000)
+    key = SlideCache.make_key('deck', 0, 2.0, 'png')
+    assert cache.get(key) is None
+    cache.put(key, slide(10))
+    assert cache.get(key).data == b'x' * 10
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+
+
+def test_evicts_least_recently_used_over_budget():
+    cache = SlideCache(max_bytes=250)
+    keys = [SlideCache.make_key('deck', page, 2.0, 'png') for page in range(3)]
+    cache.put(keys[0], slide(100))
+    cache.put(keys[1], slide(100))
+    cache.get(keys[0])  # keys[1] is now the oldest
+    cache.put(keys[2], slide(100))
+    assert keys[1] not in cache
+    assert keys[0] in cache and keys[2] in cache
+    assert cache.current_bytes == 200
+    assert cache.evictions == 1
+
+
+def test_oversized_slide_is_not_cached():
+    cache = SlideCache(max_bytes=50)
+    cache.put(SlideCache.make_key('deck', 0, 2.0, 'png'), slide(100))
+    assert len(cache) == 0
+
+
+def test_replacing_an_entry_keeps_accounting():
+    cache = SlideCache(max_bytes=1000)
+    key = SlideCache.make_key('deck', 0, 2.0, 'png')
+    cache.put(key, slide(100))
+    cache.put(key, slide(40))
+    assert cache.current_bytes == 40
+
+
+def test_base64_materialized_later_is_accounted():
+    cache = SlideCache(max_bytes=1000)
+    key = SlideCache.make_key('deck', 0, 2.0, 'png')
+    cache.put(key, slide(30))
+    cache.get(key).base64  # 40 more bytes
+    cache.get(key)
+    assert cache.current_bytes == 70
+
@@ -0,0 +1,51 @@
+"""BM25 topic search over slide text"""
+
+from slide_index import SlideIndex, normalize, tokenize
+from render_pool import build_text_index
+
+DECK = [
+    "Welcome\nAgenda for today",
+    "Pricing\nPlans and prices for every team",
+    "Roadmap\nWe mention pricing once here",
+    "Questions",
+]
+
+
+def test_tokenize_drops_stopwords_and_stems():
+    assert tokenize("Show us the slide about Pricing") == ["pric"]
+    assert normalize("prices") == normalize("pricing") == normalize("price")
+
+
+def test_title_outranks_mention():
+    index = SlideIndex.build("hash", DECK)
+    pages = [page for page, _ in index.search("pricing")]
+    assert pages == [1, 2]
+
+
+def test_unknown_terms_find_nothing():
+    index = SlideIndex.build("hash", DECK)
+    assert index.search("kubernetes") == []
+    assert index.search("the slide about") == []
+
+
+def test_limit_and_tie_order():
+    index = SlideIndex.build("hash", ["alpha", "alpha", "alpha"])
+    assert [page for page, _ in index.search("alpha", limit=2)] == [0, 1]
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = SlideIndex.build("hash", DECK)
+    path = tmp_path / "index.json"
+    index.save(path)
+    loaded = SlideIndex.load(path, "hash")
+    assert loaded.search("roadmap") == index.search("roadmap")
+    assert SlideIndex.load(path, "other-hash") is None
+    assert SlideIndex.load(tmp_path / "missing.json", "hash") is None
+
+
+def test_worker_builds_index_from_pdf(make_pdf, tmp_path):
+    pdf = make_pdf(["Welcome", "Pricing plans"])
+    data = build_text_index(str(pdf), "hash", str(tmp_path / "index.json"))
+    index = SlideIndex.from_dict(data)
+    assert index.search("pricing")[0][0] == 1
+    assert SlideIndex.load(tmp_path / "index.json", "hash") is not None
@@ -0,0 +1,78 @@
+"""Independent recognizer streams over one shared model"""
+
+import asyncio
+
+import pytest
+
+from stream_pool import PoolFullError, RecognizerPool
+from test_vad import loud, silence, tone
+from vad import VoiceActivityGate
+
+
+def test_stream_results_and_recognizer_reuse(fake_vosk):
+    async def run():
+        pool = RecognizerPool(model=object(), max_streams=2)
+        results = []
+        stream = pool.open_stream(lambda s, kind, text, words: results.append((s.stream_id, kind, text)))
+        for _ in range(3):
+            assert stream.feed(bytes(3200))
+        await stream.finish()
+        assert pool.stats()['open'] == 0 and pool.stats()['idle_recognizers'] == 1
+        again = pool.open_stream(lambda *args: None, sample_rate=16000)
+        other_rate = pool.open_stream(lambda *args: None, sample_rate=8000)
+        await pool.shutdown()
+        return results, stream, again, other_rate
+
+    results, stream, again, other_rate = asyncio.run(run())
+    assert results == [(1, 'final', 'utterance 1')]
+    assert stream.chunks == 3 and stream.audio_seconds == pytest.approx(0.3)
+    assert again.recognizer is stream.recognizer
+    assert other_rate.recognizer is not stream.recognizer
+    assert fake_vosk[0].utterances == [bytes(9600)]
+
+
+def test_pool_rejects_streams_beyond_limit(fake_vosk):
+    async def run():
+        pool = RecognizerPool(model=object(), max_streams=1)
+        pool.open_stream(lambda *args: None)
+        with pytest.raises(PoolFullError):
+            pool.open_stream(lambda *args: None)
+        stats = pool.stats()
+        await pool.shutdown()
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats['rejected'] == 1 and stats['open'] == 1
+
+
+def test_backed_up_stream_drops_chunks(fake_vosk):
+    async def run():
+        pool = RecognizerPool(model=object())
+        stream = pool.open_stream(lambda *args: None)
+        # Nothing is decoded until the loop gets control back
+        accepted = [stream.feed(bytes(320)) for _ in range(stream.queue.maxsize + 2)]
+        await pool.shutdown()
+        return accepted, stream.dropped
+
+    accepted, dropped = asyncio.run(run())
+    assert accepted[-3:] == [True, False, False] and dropped == 2
+
+
+def test_segments_in_one_chunk_get_their_own_finals(fake_vosk):
+    async def run():
+        pool = RecognizerPool(model=object(),
+                              vad_factory=lambda rate: VoiceActivityGate(rate, hangover_ms=400, preroll_ms=100))
+        results = []
+        stream = pool.open_stream(lambda s, kind, text, words: results.append((kind, text, s.utterance_id)))
+        stream.feed(silence(1000))
+        stream.feed(tone(200) + silence(600, seed=1) + tone(200, amplitude=4000))
+        stream.feed(silence(600, seed=2))
+        await stream.finish()
+        await pool.shutdown()
+        return results
+
+    assert asyncio.run(run()) == [('final', 'utterance 1', 0), ('final', 'utterance 2', 1)]
+    first, second = fake_vosk[0].utterances
+    # The second segment's onset went to the second utterance, not the first
+    assert not loud(first[-640:])
+    assert loud(second[:2 * 16000 * 200 // 1000])
@@ -0,0 +1,35 @@
+"""Process supervision: restart backoff and usage reporting"""
+
+import asyncio
+import os
+import sys
+
+from supervisor import Component, Supervisor, process_usage, usage_row
+
+
+def test_crashed_component_is_restarted_with_backoff():
+    component = Component("crasher", [sys.executable, "-c", "import sys; sys.exit(3)"],
+                          "http://127.0.0.1:9/", ready_timeout=5.0)
+    supervisor = Supervisor([component], base_backoff=0.01, stable_after=60.0)
+
+    async def run():
+        task = asyncio.create_task(supervisor.supervise(component))
+        while component.starts < 3:
+            await asyncio.sleep(0.01)
+        await supervisor.shutdown()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(asyncio.wait_for(run(), 30))
+    assert component.failures >= 2
+    assert component.ready_seconds is None
+
+
+def test_usage_of_this_process():
+    usage = process_usage(os.getpid())
+    if usage is None:
+        return  # neither psutil nor /proc
+    cpu, rss = usage
+    assert cpu > 0 and rss > 0
+    line, sample = usage_row("tests", os.getpid(), "running", 0, usage, None)
+    assert "tests" in line and "MB" in line
+    assert sample[1] == cpu
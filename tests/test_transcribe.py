@@ -0,0 +1,31 @@
+"""Batch transcription: quiet-point splitting and decoding"""
+
+import numpy as np
+
+from transcribe import split_segments, transcribe_pcm
+
+RATE = 16000
+
+
+def test_short_audio_is_one_segment():
+    pcm = bytes(2 * RATE * 10)
+    assert split_segments(pcm, RATE, segment_seconds=30.0) == [(0, len(pcm))]
+
+
+def test_cut_moves_to_quietest_frame():
+    rng = np.random.default_rng(0)
+    samples = rng.integers(-8000, 8000, RATE * 10).astype('<i2')
+    # A quiet 20 ms gap at 4.5 s, within 1 s of the 4 s target
+    quiet = int(4.5 * RATE)
+    samples[quiet:quiet + 320] = 0
+    pcm = samples.tobytes()
+    segments = split_segments(pcm, RATE, segment_seconds=4.0, search_seconds=1.0)
+    assert segments[0] == (0, 2 * quiet)
+    assert segments[-1][1] == len(pcm)
+    assert all(a[1] == b[0] for a, b in zip(segments, segments[1:]))
+
+
+def test_transcribe_pcm_feeds_everything_once(fake_vosk):
+    pcm = bytes(range(256)) * 1000
+    assert transcribe_pcm(object(), pcm, RATE) == 'utterance 1'
+    assert fake_vosk[0].utterances == [pcm]
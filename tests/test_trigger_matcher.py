@@ -0,0 +1,61 @@
+"""Whole-word, incremental trigger matching"""
+
+import pytest
+
+from trigger_matcher import TriggerMatcher, tokenize
+
+RULES = [
+    {'trigger': 'next', 'action': 'NEXT_SLIDE'},
+    {'trigger': 'next slide please', 'action': 'NEXT_SLIDE_POLITE'},
+    {'trigger': 'go back', 'action': 'PREVIOUS_SLIDE'},
+]
+
+
+def actions(matches):
+    return [m.rule['action'] for m in matches]
+
+
+def test_tokenize_drops_punctuation():
+    assert tokenize("Go BACK, now!") == ["go", "back", "now"]
+
+
+def test_whole_words_only():
+    matcher = TriggerMatcher(RULES)
+    assert actions(matcher.match_all(tokenize("the nextgen platform"))) == []
+    assert actions(matcher.match_all(tokenize("on to the next one"))) == ['NEXT_SLIDE']
+
+
+def test_multi_word_trigger_fed_word_by_word():
+    matcher = TriggerMatcher(RULES)
+    found = []
+    for t, word in enumerate(["next", "slide", "please"]):
+        found += matcher.feed(word, float(t))
+    assert actions(found) == ['NEXT_SLIDE', 'NEXT_SLIDE_POLITE']
+    assert (found[1].start_time, found[1].end_time) == (0.0, 2.0)
+
+
+def test_words_outside_window_do_not_match():
+    matcher = TriggerMatcher(RULES, window=3.0)
+    assert matcher.feed("go", 0.0) == []
+    assert matcher.feed("back", 5.0) == []
+    assert matcher.feed("go", 6.0) == []
+    assert actions(matcher.feed("back", 7.0)) == ['PREVIOUS_SLIDE']
+
+
+def test_reset_forgets_partial_matches():
+    matcher = TriggerMatcher(RULES)
+    matcher.feed("go", 0.0)
+    matcher.reset()
+    assert matcher.feed("back", 0.5) == []
+
+
+def test_match_all_leaves_incremental_state_alone():
+    matcher = TriggerMatcher(RULES)
+    matcher.feed("go", 0.0)
+    assert actions(matcher.match_all(["go", "back"])) == ['PREVIOUS_SLIDE']
+    assert actions(matcher.feed("back", 0.5)) == ['PREVIOUS_SLIDE']
+
+
+def test_empty_trigger_is_rejected():
+    with pytest.raises(ValueError):
+        TriggerMatcher([{'trigger': '...', 'action': 'NOTHING'}])
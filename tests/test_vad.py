@@ -0,0 +1,113 @@
+"""Voice activity gating, segment splitting and finalizing at segment ends"""
+
+import numpy as np
+
+from vad import VoiceActivityGate
+
+RATE = 16000
+
+
+def silence(ms, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(-30, 30, RATE * ms // 1000).astype('<i2').tobytes()
+
+
+def tone(ms, amplitude=8000):
+    t = np.arange(RATE * ms // 1000) / RATE
+    return (amplitude * np.sin(2 * np.pi * 440 * t)).astype('<i2').tobytes()
+
+
+def loud(piece):
+    samples = np.frombuffer(piece, dtype='<i2')
+    return bool(len(samples)) and int(np.abs(samples).max()) > 1000
+
+
+def test_silence_is_gated():
+    gate = VoiceActivityGate()
+    audio, ended = gate.process(silence(1000))
+    assert audio == b'' and not ended
+    assert gate.frames_in == 50 and gate.frames_passed == 0
+
+
+def test_onset_includes_preroll():
+    gate = VoiceActivityGate(preroll_ms=300)
+    gate.process(silence(1000))
+    audio, ended = gate.process(silence(200, seed=1) + tone(200))
+    assert not ended and gate.segments == 1
+    # 300 ms of pre-roll (ending with the two trigger frames), then the rest of the tone
+    assert len(audio) == 2 * RATE * (300 + 160) // 1000
+    assert not loud(audio[:2 * RATE * 240 // 1000])
+
+
+def test_partial_frames_carry_over():
+    gate = VoiceActivityGate()
+    gate.process(silence(1000))
+    data = silence(200, seed=1) + tone(400)
+    passed = b''.join(gate.process(data[i:i + 1000])[0] for i in range(0, len(data), 1000))
+    assert len(passed) % (2 * gate.frame_length) == 0
+    assert gate.segments == 1
+
+
+def test_hangover_closes_segment():
+    gate = VoiceActivityGate(hangover_ms=400)
+    gate.process(silence(1000))
+    gate.process(tone(200))
+    audio, ended = gate.process(silence(300, seed=1))
+    assert not ended and len(audio) == 2 * RATE * 300 // 1000
+    audio, ended = gate.process(silence(300, seed=2))
+    assert ended and not gate.in_speech
+    assert gate.last_ends == [2 * RATE * 100 // 1000]
+    assert gate.split(audio) == [(audio, True)]
+
+
+def test_split_at_segment_end_before_next_onset():
+    gate = VoiceActivityGate(hangover_ms=400, preroll_ms=100)
+    gate.process(silence(1000))
+    audio, ended = gate.process(tone(200) + silence(600, seed=1) + tone(200, amplitude=4000))
+    assert ended and len(gate.last_ends) == 1
+    (first, first_ended), (second, second_ended) = gate.split(audio)
+    assert first_ended and not second_ended
+    assert first + second == audio
+    assert loud(first) and not loud(first[-2 * gate.frame_length:])
+    assert loud(second[-2 * gate.frame_length:])
+
+
+def test_split_without_segment_end():
+    gate = VoiceActivityGate()
+    assert gate.split(b'') == [(b'', False)]
+    gate.process(silence(1000))
+    audio, _ = gate.process(tone(200))
+    assert gate.split(audio) == [(audio, False)]
+
+
+def test_runs_report_capture_positions():
+    gate = VoiceActivityGate(preroll_ms=100)
+    gate.process(silence(1000))
+    audio, _ = gate.process(tone(200))
+    # 100 ms of pre-roll ending with the two trigger frames, then the tone: one contiguous run
+    assert gate.last_runs == [(RATE * 940 // 1000, len(audio) // 2)]
+
+
+def test_gap_advances_capture_position():
+    gate = VoiceActivityGate(preroll_ms=40)
+    gate.process(silence(1000))
+    gate.gap(RATE)
+    gate.process(tone(100))
+    assert gate.last_runs[0][0] == RATE * 2000 // 1000
+
+
+def test_process_audio_finalizes_before_next_onset(fake_vosk, tmp_path):
+    from audio_sources import GeneratorSource
+    from vosk_stt import VoskSTT
+
+    gate = VoiceActivityGate(hangover_ms=400, preroll_ms=100)
+    chunks = [silence(1000), tone(200) + silence(600, seed=1) + tone(200, amplitude=4000), silence(600, seed=2)]
+    stt = VoskSTT(str(tmp_path), vad=gate, source=GeneratorSource(chunks))
+    finals = []
+    stt.process_audio(lambda text, utterance_id, words: finals.append((text, utterance_id)))
+
+    assert finals == [('utterance 1', 0), ('utterance 2', 1)]
+    first, second = fake_vosk[0].utterances
+    # The second segment's onset went to the second utterance, not the first
+    assert not loud(first[-2 * gate.frame_length:])
+    assert loud(second[:2 * RATE * 200 // 1000])
@@ -0,0 +1,38 @@
+"""Per-viewer render resolution and format negotiation"""
+
+from viewer_profile import RenderVariant, ViewerProfile, snap_zoom
+
+
+def test_snap_zoom_rounds_up_and_clamps():
+    assert snap_zoom(1.1) == 1.25
+    assert snap_zoom(1.25) == 1.25
+    assert snap_zoom(0.01) == 0.25
+    assert snap_zoom(40) == 4.0
+
+
+def test_viewport_scales_with_device_pixel_ratio():
+    profile = ViewerProfile.from_hello({'viewport': {'width': 960, 'height': 540, 'device_pixel_ratio': 2}})
+    assert (profile.width, profile.height) == (1920, 1080)
+    # A 720x540 pt page is limited by height: 1080 / 540 = 2.0
+    assert profile.variant_for(720, 540).zoom == 2.0
+
+
+def test_no_viewport_uses_default_zoom():
+    profile = ViewerProfile.from_hello({'viewport': {'width': 'wide'}}, default_zoom=1.5)
+    assert profile.variant_for(720, 540).zoom == 1.5
+
+
+def test_format_preference_and_quality():
+    profile = ViewerProfile.from_hello({'formats': ['avif', 'JPG', 'png'], 'quality': 300})
+    variant = profile.variant_for(720, 540)
+    assert variant.fmt == 'jpeg'
+    assert variant.quality == 100
+    assert variant.cache_format == 'jpeg:100'
+    assert variant.mime_type == 'image/jpeg'
+
+
+def test_unsupported_formats_fall_back_to_default():
+    profile = ViewerProfile.from_hello({'formats': ['gif']}, default_format='png')
+    variant = profile.variant_for(720, 540)
+    assert variant == RenderVariant(2.0, 'png', None)
+    assert variant.cache_format == 'png'
@@ -0,0 +1,38 @@
+"""Labels from VLM answers and their enter/leave hysteresis"""
+
+from vision_events import LabelTracker, parse_labels
+
+
+def test_free_text_labels():
+    labels = parse_labels("Two people and a cardboard box, no bottles on the desk")
+    assert {'people', 'cardboard', 'box', 'desk'} <= labels
+    assert 'bottle' not in labels and 'two' not in labels
+
+
+def test_vocabulary_labels():
+    vocabulary = ['person', 'coffee cup', 'bottle']
+    assert parse_labels("A person holding coffee cups", vocabulary) == {'person', 'coffee cup'}
+    assert parse_labels("A desk without a bottle", vocabulary) == set()
+    assert parse_labels("batches of boxes", ['batch', 'box']) == {'batch', 'box'}
+
+
+def test_json_labels():
+    assert parse_labels('Sure: ["person", "laptop"]') == {'person', 'laptop'}
+    assert parse_labels('{"objects": [{"label": "chairs"}]}', ['chair']) == {'chair'}
+
+
+def test_label_enters_and_leaves_once():
+    tracker = LabelTracker(window=5, enter_ratio=0.6, leave_ratio=0.2)
+    seen = [True, True, False, True, True, False, True, False, False, False, False]
+    events = [tracker.update({'person'} if s else set()) for s in seen]
+    assert events[3] == [('enter', 'person', 0.6)]
+    assert events[9] == [('leave', 'person', 0.2)]
+    assert sum(len(e) for e in events) == 2
+    assert tracker.present == set() and tracker.events == 2
+
+
+def test_single_spurious_detection_changes_nothing():
+    tracker = LabelTracker()
+    assert [tracker.update(labels) for labels in ({'cat'}, set(), set(), set(), set(), set())] == [[]] * 6
+    # Forgotten once it has left the window
+    assert tracker.history == {}
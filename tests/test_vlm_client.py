@@ -0,0 +1,89 @@
+"""The VLM reply cache and the per-camera frame mailbox"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import vision_agent
+from test_frame_sampler import jpeg, scene
+from vlm_backends import StubBackend, VLMError
+from vlm_client import VLMClient
+
+
+def frame(frame_hash):
+    return SimpleNamespace(hash=frame_hash, jpeg=b'jpeg')
+
+
+def describe(client, prompt, frame_hash):
+    return asyncio.run(client.describe(prompt, frame(frame_hash)))
+
+
+def test_near_hash_of_same_prompt_hits():
+    backend = StubBackend(reply="reply {calls}")
+    client = VLMClient(backend)
+    assert describe(client, "what?", 0b1111) == ("reply 1", False)
+    assert describe(client, "what?", 0b1011) == ("reply 1", True)
+    assert describe(client, "what?", 0b10110000) == ("reply 2", False)
+    assert describe(client, "who?", 0b1111) == ("reply 3", False)
+    assert client.stats()['cache_hits'] == 1 and backend.calls == 3
+
+
+def test_expired_and_evicted_entries_miss(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('vlm_client.time.monotonic', lambda: now[0])
+    client = VLMClient(StubBackend(reply="reply {calls}"), max_entries=1, ttl=10.0)
+    describe(client, "what?", 1)
+    now[0] += 11
+    assert describe(client, "what?", 1) == ("reply 2", False)
+    describe(client, "who?", 1)
+    assert describe(client, "what?", 1) == ("reply 4", False)
+    stats = client.stats()
+    assert stats['cache_expired'] == 1 and stats['cache_evictions'] == 2
+
+
+def test_errors_are_not_cached():
+    class Failing(StubBackend):
+        async def describe(self, prompt, jpeg):
+            self.calls += 1
+            raise VLMError("down")
+
+    client = VLMClient(Failing())
+    for _ in range(2):
+        with pytest.raises(VLMError):
+            describe(client, "what?", 1)
+    assert client.backend.calls == 2 and client.stats()['cache_entries'] == 0
+
+
+def test_disabled_cache_always_calls_backend():
+    client = VLMClient(StubBackend(reply="reply {calls}"), ttl=0)
+    describe(client, "what?", 1)
+    assert describe(client, "what?", 1) == ("reply 2", False)
+
+
+def test_busy_camera_keeps_only_newest_frame(monkeypatch):
+    sent = []
+    args = vision_agent.parse_args(['--backend', 'stub'])
+    monkeypatch.setattr(vision_agent, 'ARGS', args)
+    monkeypatch.setattr(vision_agent, 'VLM_CLIENT', VLMClient(StubBackend(reply="seen {calls}", delay=0.05)))
+    monkeypatch.setattr(vision_agent, 'CAMERAS', {})
+    monkeypatch.setattr(vision_agent, 'CONNECTED_CLIENTS',
+                        SimpleNamespace(send=lambda websocket, message: sent.append(json.loads(message))))
+    frames = [jpeg(scene(box=(x, 100, 150))) for x in (0, 200, 400)]
+
+    async def run():
+        camera = vision_agent.get_camera('desk')
+        camera.submit('client', frames[0], "what?")
+        await asyncio.sleep(0.01)
+        # The VLM is busy with the first frame: the second is replaced by the third
+        camera.submit('client', frames[1], "what?")
+        camera.submit('client', frames[2], "what?")
+        while len(sent) < 2:
+            await asyncio.sleep(0.01)
+        await camera.analysis.worker
+        return camera
+
+    camera = asyncio.run(run())
+    assert [reply['content'] for reply in sent] == ["seen 1", "seen 2"]
+    assert camera.stats()['dropped'] == 1